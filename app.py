@@ -1,31 +1,34 @@
-import os
 import sys
 import logging
 from pathlib import Path
-from src.controllers.main_controller import MainController
 from src.models.database import Database
 from src.utils.config_manager import ConfigManager
 from src.utils.logger import setup_logger
 
 def main():
+    # Batch commands (export, import, print-batch, ...) run headless without Tk
+    if len(sys.argv) > 1:
+        from src.cli import main as cli_main
+        sys.exit(cli_main(sys.argv[1:]))
+    
     # Set up logging
     setup_logger()
     logger = logging.getLogger('invoice_manager')
     logger.info("Starting Invoice Manager application")
     
-    # Create 'temp' directory if it doesn't exist
-    temp_dir = os.path.join(os.getcwd(), 'temp')
-    os.makedirs(temp_dir, exist_ok=True)
-    
     # Load configuration
     config = ConfigManager()
     
     # Initialize database connection
-    db = Database(config.get_database_uri())
+    db = Database(config.get_database_uri(), config.get_pool_options())
     db.initialize()
+    db.setup_change_log(**config.get_sync_options())
+    if config.get('diagnostics', 'profile_queries'):
+        db.enable_profiling(**config.get_profiler_options())
     
     # Start the controller which will initialize the UI
-    app = MainController(db)
+    from src.controllers.main_controller import MainController
+    app = MainController(db, config)
     app.run()
     
     logger.info("Application closed")
@@ -0,0 +1,193 @@
+"""Load test for the local HTTP/JSON API.
+
+Seeds a temporary SQLite database, starts ApiServer on a free port and drives
+it with concurrent keep-alive connections. The request mix is mostly invoice
+and item lookups by ID plus a share of payment posts. It runs once without
+batching (window 0) and once with the given batch window. Reports requests
+per second, latency percentiles, and how many bulk queries and commits the
+server ran.
+
+Each run then checks that payments posted concurrently against one invoice
+settle it, since the batched writer applies them in the same transaction.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_api --requests 5000 --connections 32 --window-ms 2
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import logging
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert
+from src.models.database import Database
+from src.models.invoice_model import Invoice, InvoiceItem
+from src.models.item_model import Item
+from src.utils.api_server import ApiServer
+
+
+def seed(db, invoices, items):
+    session = db.get_session()
+    session.execute(insert(Item), [
+        {'id': number, 'item_code': f"TKW-{number:03d}", 'name': f"Item {number}", 'price': 100.0}
+        for number in range(1, items + 1)
+    ])
+    session.execute(insert(Invoice), [
+        {
+            'id': number,
+            'invoice_number': f"INV-{number:03d}",
+            'date': '2025-04-05',
+            'customer_name': f"Customer {number}",
+            'total_amount': 300.0,
+            'payment_status': 'pending'
+        }
+        for number in range(1, invoices + 1)
+    ])
+    session.execute(insert(InvoiceItem), [
+        {'invoice_id': number, 'item_id': line + 1, 'description': f"Item {line + 1}", 'quantity': 1, 'price': 100.0}
+        for number in range(1, invoices + 1)
+        for line in range(3)
+    ])
+    session.commit()
+    session.close()
+
+
+async def request(reader, writer, method, path, payload=None):
+    body = json.dumps(payload).encode('utf-8') if payload is not None else b''
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(body)}\r\n\r\n".encode('latin-1') + body
+    )
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.lower() == 'content-length':
+            length = int(value)
+    return status, await reader.readexactly(length)
+
+
+async def drive(port, total_requests, connections, invoices, items, write_share, seed_value):
+    rng = random.Random(seed_value)
+    plan = []
+    for _ in range(total_requests):
+        roll = rng.random()
+        if roll < write_share:
+            plan.append(('POST', '/payments', {'invoice_id': rng.randint(1, invoices), 'amount': 10.0}))
+        elif roll < write_share + (1 - write_share) * 0.7:
+            plan.append(('GET', f"/invoices/{rng.randint(1, invoices)}", None))
+        else:
+            plan.append(('GET', f"/items/{rng.randint(1, items)}", None))
+
+    latencies = []
+    statuses = {}
+    queue = asyncio.Queue()
+    for entry in plan:
+        queue.put_nowait(entry)
+
+    async def client():
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        try:
+            while not queue.empty():
+                method, path, payload = queue.get_nowait()
+                started = time.perf_counter()
+                status, _ = await request(reader, writer, method, path, payload)
+                latencies.append(time.perf_counter() - started)
+                statuses[status] = statuses.get(status, 0) + 1
+        finally:
+            writer.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(connections)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'seconds': elapsed,
+        'requests_per_second': len(latencies) / elapsed,
+        'latency_ms': {
+            'p50': latencies[len(latencies) // 2] * 1000,
+            'p95': latencies[int(len(latencies) * 0.95)] * 1000,
+            'max': latencies[-1] * 1000
+        },
+        'statuses': statuses
+    }
+
+
+async def settle_concurrently(port, invoice_id, total, installments):
+    """Pay ``total`` in equal installments over separate connections at once; returns the invoice status"""
+    async def pay():
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        try:
+            status, _ = await request(reader, writer, 'POST', '/payments',
+                                      {'invoice_id': invoice_id, 'amount': total / installments})
+            return status
+        finally:
+            writer.close()
+
+    statuses = await asyncio.gather(*(pay() for _ in range(installments)))
+    if any(status != 201 for status in statuses):
+        raise RuntimeError(f"Payments for invoice {invoice_id} failed: {statuses}")
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        _, body = await request(reader, writer, 'GET', f"/invoices/{invoice_id}")
+    finally:
+        writer.close()
+    return json.loads(body)['payment_status']
+
+
+def run(requests=5000, connections=32, window_ms=2.0, invoices=2000, items=500, write_share=0.1):
+    work_dir = tempfile.mkdtemp(prefix='bench_api_')
+    db = Database(f"sqlite:///{os.path.join(work_dir, 'bench.db')}")
+    db.initialize()
+    # One extra invoice per run for the same-invoice payment check
+    seed(db, invoices + 2, items)
+
+    results = {'requests': requests, 'connections': connections, 'write_share': write_share}
+    for check_invoice, (name, window) in enumerate((('unbatched', 0.0), ('batched', window_ms / 1000.0)),
+                                                   start=invoices + 1):
+        server = ApiServer(db, port=0, batch_window=window)
+        server.start()
+        try:
+            stats = asyncio.run(drive(server.port, requests, connections, invoices, items, write_share, 42))
+            metrics = server.get_metrics()
+            stats['same_invoice_payments'] = asyncio.run(settle_concurrently(server.port, check_invoice, 300.0, 2))
+        finally:
+            server.stop()
+        stats['server'] = {
+            key: metrics[key] for key in (
+                'invoice_batches', 'invoice_avg_batch_size', 'item_batches', 'item_avg_batch_size',
+                'writer_batches', 'writer_avg_batch_size', 'write_commits', 'write_fallbacks', 'errors'
+            )
+        }
+        if stats['same_invoice_payments'] != 'completed':
+            raise RuntimeError(f"Concurrent payments left invoice {check_invoice} {stats['same_invoice_payments']}")
+        results[name] = stats
+
+    results['speedup'] = results['batched']['requests_per_second'] / results['unbatched']['requests_per_second']
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--connections', type=int, default=32)
+    parser.add_argument('--window-ms', type=float, default=2.0)
+    parser.add_argument('--write-share', type=float, default=0.1)
+    args = parser.parse_args()
+
+    logging.getLogger('invoice_manager').setLevel(logging.WARNING)
+    print(json.dumps(run(args.requests, args.connections, args.window_ms, write_share=args.write_share), indent=2))
+
+
+if __name__ == "__main__":
+    main()
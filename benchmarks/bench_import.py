@@ -0,0 +1,107 @@
+"""Bulk item import versus adding items one at a time.
+
+Writes a CSV catalog with a few invalid rows, then imports it into a temporary
+SQLite database with BulkImporter. For comparison, a sample of the same rows
+goes through the old per-record path (validate, add, commit, refresh) and its
+time is extrapolated to the full file.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_import --rows 50000 --sample 1000
+"""
+import os
+import sys
+import csv
+import json
+import time
+import random
+import logging
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.models.database import Database
+from src.models.item_model import Item
+from src.controllers.item_controller import ItemController
+from src.utils.bulk_importer import BulkImporter
+
+
+def write_catalog(path, rows, invalid_every=500, seed=42):
+    """Write a catalog CSV where every ``invalid_every``-th row fails validation"""
+    rng = random.Random(seed)
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Item Name', 'Unit Price'])
+        for number in range(rows):
+            if invalid_every and number % invalid_every == invalid_every - 1:
+                writer.writerow([f"Item {number}", 'n/a'])
+            else:
+                writer.writerow([f"Item {number}", f"{rng.uniform(1, 500):.2f}"])
+
+
+def add_one_by_one(db, path, sample, validator):
+    """The previous access pattern: one session, commit and refresh per item"""
+    added = 0
+    with open(path, newline='') as f:
+        reader = csv.DictReader(f)
+        for number, row in enumerate(reader):
+            if number >= sample:
+                break
+            item_data = {'name': row['Item Name'], 'price': row['Unit Price']}
+            if not validator(item_data)[0]:
+                continue
+            session = db.get_session()
+            item = Item(item_code=f"ONE-{number:06d}", name=item_data['name'], price=float(item_data['price']))
+            session.add(item)
+            session.commit()
+            session.refresh(item)
+            session.close()
+            added += 1
+    return added
+
+
+def run(rows=50000, sample=1000):
+    work_dir = tempfile.mkdtemp(prefix='bench_import_')
+    db = Database(f"sqlite:///{os.path.join(work_dir, 'bench.db')}")
+    db.initialize()
+
+    catalog = os.path.join(work_dir, 'catalog.csv')
+    write_catalog(catalog, rows)
+    validator = ItemController(db, None)._validate_item_data
+
+    start = time.perf_counter()
+    added = add_one_by_one(db, catalog, min(sample, rows), validator)
+    per_row_seconds = time.perf_counter() - start
+
+    result = BulkImporter(db).import_items(catalog, validator)
+
+    return {
+        'rows': rows,
+        'per_row': {
+            'sample_rows': min(sample, rows),
+            'added': added,
+            'seconds': per_row_seconds,
+            'estimated_seconds_for_all_rows': per_row_seconds * rows / max(min(sample, rows), 1)
+        },
+        'bulk': {
+            'imported': result['imported'],
+            'rejected': result['failed'],
+            'seconds': result['seconds'],
+            'rows_per_second': result['total'] / result['seconds'] if result['seconds'] else 0.0,
+            'error_report': result['error_report']
+        }
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=50000)
+    parser.add_argument('--sample', type=int, default=1000)
+    args = parser.parse_args()
+
+    logging.getLogger('invoice_manager').setLevel(logging.WARNING)
+    print(json.dumps(run(args.rows, args.sample), indent=2))
+
+
+if __name__ == "__main__":
+    main()
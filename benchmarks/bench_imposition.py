@@ -0,0 +1,97 @@
+"""Batch PDF throughput: one invoice per page versus 2-up and 4-up imposition.
+
+The 1-up path mirrors the existing batch flow (one PDF per invoice, then merged);
+the imposed paths render every invoice into a single PDF with several invoices
+per A4/Letter sheet. Reports pages and invoices per second for each.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_imposition --invoices 400 --sheet A4
+"""
+import os
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyPDF2 import PdfReader
+from src.utils.artifact_store import ArtifactStore
+from src.utils.print_manager import PrintManager
+
+
+def make_invoices(count, seed=42):
+    """Build (invoice_data, items_data) tuples with 1-4 lines each"""
+    rng = random.Random(seed)
+    invoices = []
+    for number in range(1, count + 1):
+        items = []
+        for line in range(rng.randint(1, 4)):
+            quantity = rng.randint(1, 5)
+            price = round(rng.uniform(50, 2500), 2)
+            items.append({
+                'item_id': rng.randint(1, 500),
+                'description': f"Kitchenware item {line + 1}",
+                'quantity': quantity,
+                'price': price
+            })
+        invoices.append(({
+            'invoice_number': f"INV-{number:05d}",
+            'date': '2025-04-05',
+            'customer_name': f"Customer {number}",
+            'customer_address': f"{number} Rizal Street\nMexico, Pampanga",
+            'total_amount': sum(item['quantity'] * item['price'] for item in items),
+            'mode_of_payment': 'Gcash'
+        }, items))
+    return invoices
+
+
+def run(invoices=200, sheet_size='A4', logo_path=None):
+    """Time each layout and return pages/sec and invoices/sec per layout"""
+    work_dir = tempfile.mkdtemp(prefix='bench_imposition_')
+    print_manager = PrintManager(artifact_store=ArtifactStore(work_dir, cleanup_interval=3600))
+    invoice_data_list = make_invoices(invoices)
+    results = {'invoices': invoices, 'sheet_size': sheet_size}
+
+    # One 100x150mm page per invoice, merged into one PDF like the existing batch flow
+    start = time.perf_counter()
+    pdf_paths = [print_manager.generate_invoice_pdf(data, items, logo_path) for data, items in invoice_data_list]
+    merged_path = print_manager._merge_pdfs(pdf_paths)
+    elapsed = time.perf_counter() - start
+    results['1up'] = _layout_result(merged_path, invoices, elapsed)
+
+    for per_sheet in (2, 4):
+        start = time.perf_counter()
+        pdf_path = print_manager.generate_imposed_pdf(invoice_data_list, logo_path, per_sheet, sheet_size)
+        elapsed = time.perf_counter() - start
+        results[f'{per_sheet}up'] = _layout_result(pdf_path, invoices, elapsed) if pdf_path else None
+
+    return results
+
+
+def _layout_result(pdf_path, invoices, elapsed):
+    pages = len(PdfReader(pdf_path).pages)
+    return {
+        'seconds': elapsed,
+        'pages': pages,
+        'pages_per_second': pages / elapsed if elapsed else 0.0,
+        'invoices_per_second': invoices / elapsed if elapsed else 0.0
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--invoices', type=int, default=200)
+    parser.add_argument('--sheet', default='A4', choices=['A4', 'Letter'])
+    parser.add_argument('--logo', default=None, help="Optional logo image to include")
+    args = parser.parse_args()
+
+    logging.getLogger('invoice_manager').setLevel(logging.WARNING)
+    print(json.dumps(run(args.invoices, args.sheet, args.logo), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Bulk invoice+items loading versus the old per-invoice path.
+
+Seeds a temporary SQLite database, then loads the same IDs twice: once the old
+way (a session and query per invoice, then a lazy load of its items) and once
+through load_invoices_with_items. Reports wall time and statement counts.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_invoice_loader --ids 1000 --lines 3
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event, insert
+from src.models.database import Database
+from src.models.invoice_model import Invoice, InvoiceItem
+from src.models.invoice_loader import load_invoices_with_items
+
+
+def seed(db, invoices, lines):
+    """Insert ``invoices`` invoices with ``lines`` line items each"""
+    session = db.get_session()
+    session.execute(insert(Invoice), [
+        {
+            'id': number,
+            'invoice_number': f"INV-{number:06d}",
+            'date': '2025-04-05',
+            'customer_name': f"Customer {number}",
+            'customer_address': "Mexico, Pampanga",
+            'total_amount': 100.0 * lines,
+            'mode_of_payment': 'Gcash',
+            'payment_status': 'pending'
+        }
+        for number in range(1, invoices + 1)
+    ])
+    session.execute(insert(InvoiceItem), [
+        {'invoice_id': number, 'item_id': line + 1, 'description': f"Item {line + 1}", 'quantity': 1, 'price': 100.0}
+        for number in range(1, invoices + 1)
+        for line in range(lines)
+    ])
+    session.commit()
+    session.close()
+
+
+def load_one_by_one(db, invoice_ids):
+    """The previous access pattern: one session and two queries per invoice"""
+    details = {}
+    for invoice_id in invoice_ids:
+        session = db.get_session()
+        invoice = session.query(Invoice).filter(Invoice.id == invoice_id).first()
+        if invoice:
+            details[invoice_id] = (invoice.to_dict(), [item.to_dict() for item in invoice.items])
+        session.close()
+    return details
+
+
+def load_bulk(db, invoice_ids):
+    session = db.get_session()
+    details = load_invoices_with_items(session, invoice_ids)
+    session.close()
+    return details
+
+
+def run(ids=1000, lines=3):
+    work_dir = tempfile.mkdtemp(prefix='bench_loader_')
+    db = Database(f"sqlite:///{os.path.join(work_dir, 'bench.db')}")
+    db.initialize()
+    seed(db, ids, lines)
+
+    statements = {'count': 0}
+    event.listen(db.engine, 'before_cursor_execute',
+                 lambda *args: statements.__setitem__('count', statements['count'] + 1))
+
+    invoice_ids = list(range(1, ids + 1))
+    results = {'ids': ids, 'lines_per_invoice': lines}
+    for name, loader in (('per_invoice', load_one_by_one), ('bulk', load_bulk)):
+        statements['count'] = 0
+        start = time.perf_counter()
+        details = loader(db, invoice_ids)
+        elapsed = time.perf_counter() - start
+        results[name] = {
+            'seconds': elapsed,
+            'statements': statements['count'],
+            'invoices_loaded': len(details),
+            'lines_loaded': sum(len(items) for _, items in details.values())
+        }
+
+    results['speedup'] = results['per_invoice']['seconds'] / results['bulk']['seconds']
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--ids', type=int, default=1000)
+    parser.add_argument('--lines', type=int, default=3)
+    args = parser.parse_args()
+
+    logging.getLogger('invoice_manager').setLevel(logging.WARNING)
+    print(json.dumps(run(args.ids, args.lines), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Diffed line item saves versus deleting and reinserting every line.
+
+Seeds a temporary SQLite database with invoices of ``--lines`` line items,
+then saves an edit of each invoice twice: once the old way (delete all of
+its items, add them back as new rows, recalculate the total from the
+relationship) and once through save_line_items, which only writes the lines
+that changed. Each edit changes the quantity of ``--changed`` lines and
+appends one line. Reports wall time, SQL statements, and how many of the
+invoice's line item IDs survived the save.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_line_items --invoices 50 --lines 200 --changed 1
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event, select
+from src.models.database import Database
+from src.models.invoice_model import Invoice, InvoiceItem
+from src.models.invoice_writer import save_line_items
+from benchmarks.bench_invoice_loader import seed
+
+
+def edited_lines(session, invoice_id, changed):
+    """The invoice's lines as the dialog would send them back after an edit"""
+    items_data = [
+        {'id': item.id, 'item_id': item.item_id, 'description': item.description,
+         'quantity': item.quantity, 'price': item.price}
+        for item in session.scalars(
+            select(InvoiceItem).where(InvoiceItem.invoice_id == invoice_id).order_by(InvoiceItem.id)
+        )
+    ]
+    for item_data in items_data[:changed]:
+        item_data['quantity'] += 1
+    items_data.append({'item_id': 1, 'description': "Added line", 'quantity': 1, 'price': 50.0})
+    return items_data
+
+
+def save_reinsert(session, invoice_id, items_data):
+    """The previous update_invoice: delete every line and add them all back"""
+    invoice = session.get(Invoice, invoice_id)
+    session.query(InvoiceItem).filter(InvoiceItem.invoice_id == invoice_id).delete()
+    for item_data in items_data:
+        item_data = {key: value for key, value in item_data.items() if key != 'id'}
+        session.add(InvoiceItem(invoice_id=invoice_id, **item_data))
+    invoice.calculate_total()
+
+
+def save_diffed(session, invoice_id, items_data):
+    invoice = session.get(Invoice, invoice_id)
+    invoice.total_amount, _ = save_line_items(session, invoice_id, items_data)
+
+
+def line_ids(db, invoice_id):
+    with db.unit_of_work(read_only=True) as session:
+        return set(session.scalars(select(InvoiceItem.id).where(InvoiceItem.invoice_id == invoice_id)))
+
+
+def run(invoices=50, lines=200, changed=1):
+    work_dir = tempfile.mkdtemp(prefix='bench_line_items_')
+    db = Database(f"sqlite:///{os.path.join(work_dir, 'bench.db')}")
+    db.initialize()
+    seed(db, invoices, lines)
+
+    statements = []
+    count = lambda *args: statements.append(1)
+
+    results = {'invoices': invoices, 'lines_per_invoice': lines, 'lines_changed': changed}
+    for name, save in (('reinsert', save_reinsert), ('diffed', save_diffed)):
+        seconds = 0.0
+        kept = 0
+        statements.clear()
+        for invoice_id in range(1, invoices + 1):
+            with db.unit_of_work(read_only=True) as session:
+                items_data = edited_lines(session, invoice_id, changed)
+            before = line_ids(db, invoice_id)
+
+            event.listen(db.engine, 'before_cursor_execute', count)
+            start = time.perf_counter()
+            with db.unit_of_work() as session:
+                save(session, invoice_id, items_data)
+            seconds += time.perf_counter() - start
+            event.remove(db.engine, 'before_cursor_execute', count)
+
+            kept += len(before & line_ids(db, invoice_id))
+        results[name] = {
+            'seconds': seconds,
+            'ms_per_save': seconds / invoices * 1000,
+            'statements_per_save': len(statements) / invoices,
+            'line_ids_kept_per_save': kept / invoices
+        }
+
+    results['speedup'] = results['reinsert']['seconds'] / results['diffed']['seconds']
+    db.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--invoices', type=int, default=50)
+    parser.add_argument('--lines', type=int, default=200)
+    parser.add_argument('--changed', type=int, default=1)
+    args = parser.parse_args()
+
+    logging.getLogger('invoice_manager').setLevel(logging.WARNING)
+    print(json.dumps(run(args.invoices, args.lines, args.changed), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Print spooler throughput benchmark against the fake lp stand-in.
+
+Measures how long the caller is blocked while queueing jobs (what the UI sees)
+and how long the spooler takes to drain the queue through ``fake_lp.py``.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_print_spooler --jobs 1000 --delay 0.005
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.models.database import Database
+from src.utils.print_spooler import PrintSpooler
+
+FAKE_LP = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fake_lp.py')
+
+
+def run(jobs=200, delay=0.005, fail_rate=0.0, max_in_flight=1, work_dir=None):
+    """Queue ``jobs`` print jobs and wait for the spooler to drain them"""
+    work_dir = work_dir or tempfile.mkdtemp(prefix='bench_spooler_')
+    db = Database(f"sqlite:///{os.path.join(work_dir, 'bench.db')}")
+    db.initialize()
+
+    pdf_path = os.path.join(work_dir, 'invoice.pdf')
+    with open(pdf_path, 'wb') as pdf_file:
+        pdf_file.write(b"%PDF-1.4\n%%EOF\n")
+
+    os.environ['FAKE_LP_DELAY'] = str(delay)
+    os.environ['FAKE_LP_FAIL_RATE'] = str(fail_rate)
+
+    spooler = PrintSpooler(
+        db,
+        command=[sys.executable, FAKE_LP],
+        media='Custom.100x150mm',
+        max_in_flight=max_in_flight,
+        retry_delay=0.01,
+        poll_interval=0.05
+    )
+    spooler.start()
+
+    start = time.perf_counter()
+    for index in range(jobs):
+        spooler.enqueue(pdf_path, description=f"BENCH-{index:05d}")
+    enqueue_seconds = time.perf_counter() - start
+
+    drained = spooler.wait_until_idle(timeout=max(60, jobs * (delay + 0.5)))
+    drain_seconds = time.perf_counter() - start
+    metrics = spooler.get_metrics()
+    spooler.stop()
+
+    return {
+        'jobs': jobs,
+        'drained': drained,
+        'enqueue_seconds': enqueue_seconds,
+        'enqueue_ms_per_job': enqueue_seconds * 1000.0 / jobs if jobs else 0.0,
+        'drain_seconds': drain_seconds,
+        'jobs_per_second': jobs / drain_seconds if drain_seconds else 0.0,
+        'completed': metrics['completed'],
+        'failed': metrics['failed'],
+        'retried': metrics['retried']
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--jobs', type=int, default=200)
+    parser.add_argument('--delay', type=float, default=0.005, help="Seconds fake lp takes per job")
+    parser.add_argument('--fail-rate', type=float, default=0.0)
+    parser.add_argument('--max-in-flight', type=int, default=1)
+    args = parser.parse_args()
+
+    logging.getLogger('invoice_manager').setLevel(logging.WARNING)
+    result = run(args.jobs, args.delay, args.fail_rate, args.max_in_flight)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""Hydration benchmark for the list screens: full ORM objects vs projections.
+
+Seeds a temporary SQLite database with --rows invoices and one payment per
+invoice. It then loads each list both ways:
+- the old way: query the full ORM objects and call to_dict() on each one
+  (for payments, to_dict() lazy-loads every payment's invoice for its number);
+- the new way: the projection selects from src.models.projections, wrapped
+  in slotted records (payments get their invoice number from a SQL join).
+
+For every load it reports wall time, the number of SQL statements, the
+tracemalloc peak while loading and the memory still held by the result list.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_projections --rows 100000
+"""
+import os
+import sys
+import gc
+import json
+import time
+import logging
+import argparse
+import tempfile
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event, insert
+from src.models.database import Database
+from src.models.invoice_model import Invoice
+from src.models.payment_model import Payment
+from src.models.projections import InvoiceRow, PaymentRow, invoice_rows, payment_rows, fetch_records
+
+
+def seed(db, rows, chunk=10000):
+    start = datetime(2020, 1, 1)
+    with db.unit_of_work() as session:
+        for first in range(0, rows, chunk):
+            numbers = range(first + 1, min(first + chunk, rows) + 1)
+            session.execute(insert(Invoice), [{
+                'id': number,
+                'invoice_number': f"INV-{number:07d}",
+                'date': (start + timedelta(days=number % 1500)).strftime('%Y-%m-%d'),
+                'customer_name': f"Customer {number % 5000:04d}",
+                'customer_address': f"{number % 900} Rizal Street, San Fernando, Pampanga",
+                'total_amount': float(number % 10000) + 0.5,
+                'mode_of_payment': 'cash',
+                'payment_status': 'completed'
+            } for number in numbers])
+            session.execute(insert(Payment), [{
+                'invoice_id': number,
+                'amount': float(number % 10000) + 0.5,
+                'payment_date': start + timedelta(days=number % 1500),
+                'payment_method': 'cash',
+                'reference_number': f"REF-{number:07d}"
+            } for number in numbers])
+
+
+def orm_invoices(session):
+    return [invoice.to_dict() for invoice in session.query(Invoice).order_by(Invoice.date.desc()).all()]
+
+
+def projected_invoices(session):
+    return fetch_records(session, invoice_rows().order_by(Invoice.date.desc()), InvoiceRow)
+
+
+def orm_payments(session):
+    return [payment.to_dict() for payment in session.query(Payment).order_by(Payment.payment_date.desc()).all()]
+
+
+def projected_payments(session):
+    return fetch_records(session, payment_rows().order_by(Payment.payment_date.desc()), PaymentRow)
+
+
+def measure(db, load):
+    statements = []
+    count = lambda *args: statements.append(1)
+    event.listen(db.engine, 'before_cursor_execute', count)
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    with db.unit_of_work(read_only=True) as session:
+        records = load(session)
+    elapsed = time.perf_counter() - started
+    # The session is closed, so only the result list is left
+    gc.collect()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    event.remove(db.engine, 'before_cursor_execute', count)
+
+    return {
+        'rows': len(records),
+        'seconds': elapsed,
+        'sql_statements': len(statements),
+        'peak_mb': peak / 1048576,
+        'retained_mb': retained / 1048576,
+        'retained_bytes_per_row': retained / max(1, len(records))
+    }
+
+
+def run(rows=100000):
+    work_dir = tempfile.mkdtemp(prefix='bench_projections_')
+    db = Database(f"sqlite:///{os.path.join(work_dir, 'bench.db')}")
+    db.initialize()
+    seed(db, rows)
+
+    results = {'rows': rows}
+    for name, old, new in (('invoices', orm_invoices, projected_invoices),
+                           ('payments', orm_payments, projected_payments)):
+        before = measure(db, old)
+        after = measure(db, new)
+        results[name] = {
+            'orm_to_dict': before,
+            'projection': after,
+            'speedup': before['seconds'] / after['seconds'],
+            'peak_memory_ratio': before['peak_mb'] / after['peak_mb'],
+            'retained_memory_ratio': before['retained_mb'] / after['retained_mb']
+        }
+    db.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100000)
+    args = parser.parse_args()
+
+    logging.getLogger('invoice_manager').setLevel(logging.WARNING)
+    print(json.dumps(run(args.rows), indent=2))
+
+
+if __name__ == "__main__":
+    main()
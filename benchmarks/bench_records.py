@@ -0,0 +1,115 @@
+"""Memory held by the invoice and payment lists a view keeps between loads.
+
+Seeds a temporary SQLite database with --rows invoices and one payment per
+invoice, then builds the two lists the payment view holds at the same time
+in three shapes:
+- dicts: to_dict() on full ORM objects (what the views used to keep);
+- records: a list of slotted projection records (fetch_records);
+- table: a column-oriented RecordTable (fetch_table, what views keep now).
+
+For each shape it reports the bytes per row still allocated once the session
+is closed (tracemalloc), and the time to build both lists and to iterate
+them once the way a grid refresh does.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_records --rows 200000
+"""
+import os
+import sys
+import gc
+import json
+import time
+import logging
+import argparse
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy.orm import joinedload
+from src.models.database import Database
+from src.models.invoice_model import Invoice
+from src.models.payment_model import Payment
+from src.models.projections import (
+    InvoiceRow, PaymentRow, invoice_rows, payment_rows, fetch_records, fetch_table
+)
+from benchmarks.bench_projections import seed
+
+
+def as_dicts(session):
+    invoices = [invoice.to_dict() for invoice in session.query(Invoice).order_by(Invoice.date.desc())]
+    # Eager-load the invoices so this run measures memory, not 200k lazy loads
+    payments = [payment.to_dict() for payment in session.query(Payment).options(
+        joinedload(Payment.invoice)
+    ).order_by(Payment.payment_date.desc())]
+    return invoices, payments
+
+
+def as_records(session):
+    return (fetch_records(session, invoice_rows().order_by(Invoice.date.desc()), InvoiceRow),
+            fetch_records(session, payment_rows().order_by(Payment.payment_date.desc()), PaymentRow))
+
+
+def as_table(session):
+    return (fetch_table(session, invoice_rows().order_by(Invoice.date.desc()), InvoiceRow),
+            fetch_table(session, payment_rows().order_by(Payment.payment_date.desc()), PaymentRow))
+
+
+def grid_pass(invoices, payments):
+    """Touch the fields the payment view formats for its two grids"""
+    total = 0
+    for invoice in invoices:
+        total += len(invoice['invoice_number']) + len(invoice['payment_status'])
+    for payment in payments:
+        total += len(payment['invoice_number']) + int(payment['amount'])
+    return total
+
+
+def measure(db, build, rows):
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    with db.unit_of_work(read_only=True) as session:
+        invoices, payments = build(session)
+    built = time.perf_counter() - started
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    started = time.perf_counter()
+    grid_pass(invoices, payments)
+    iterated = time.perf_counter() - started
+
+    return {
+        'retained_mb': retained / 1048576,
+        'bytes_per_row': retained / (2 * rows),
+        'build_seconds': built,
+        'grid_pass_seconds': iterated
+    }
+
+
+def run(rows=200000):
+    work_dir = tempfile.mkdtemp(prefix='bench_records_')
+    db = Database(f"sqlite:///{os.path.join(work_dir, 'bench.db')}")
+    db.initialize()
+    seed(db, rows)
+
+    results = {'rows': rows}
+    for name, build in (('dicts', as_dicts), ('records', as_records), ('table', as_table)):
+        results[name] = measure(db, build, rows)
+    results['table_vs_dicts_memory_ratio'] = results['dicts']['retained_mb'] / results['table']['retained_mb']
+    db.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=200000)
+    args = parser.parse_args()
+
+    logging.getLogger('invoice_manager').setLevel(logging.WARNING)
+    print(json.dumps(run(args.rows), indent=2))
+
+
+if __name__ == "__main__":
+    main()
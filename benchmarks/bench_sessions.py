@@ -0,0 +1,142 @@
+"""Session and connection stress test: 10k loads, some of them failing.
+
+Runs the same mix of loads twice: a client page query, and every
+``--fail-every``-th load raising halfway through its query. The first run
+uses the old controller pattern: a thread per load, get_session(), and
+close() only on the happy path. The second runs Database.unit_of_work() on
+the shared worker pool. For each run it reports connections opened, peak
+and final checked-out connections, and how many sessions were still
+holding a connection when their load ended.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_sessions --loads 10000 --fail-every 10
+"""
+import os
+import sys
+import gc
+import json
+import time
+import logging
+import argparse
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event, insert
+from src.models.database import Database
+from src.models.client_model import Client
+
+
+class LoadFailed(Exception):
+    pass
+
+
+def seed(db, clients):
+    session = db.get_session()
+    session.execute(insert(Client), [{'name': f"Client {number:05d}"} for number in range(clients)])
+    session.commit()
+    session.close()
+
+
+def legacy_load(db, number, fail_every, leaked):
+    """get_session() with close() only on the happy path, as the controllers used to do"""
+    try:
+        session = db.get_session()
+        session.query(Client).order_by(Client.name).limit(20).all()
+        if fail_every and number % fail_every == 0:
+            raise LoadFailed(number)
+        session.close()
+    except LoadFailed:
+        if session.in_transaction():
+            leaked.append(number)
+
+
+def unit_of_work_load(db, number, fail_every, leaked):
+    try:
+        with db.unit_of_work(read_only=True) as session:
+            session.query(Client).order_by(Client.name).limit(20).all()
+            if fail_every and number % fail_every == 0:
+                raise LoadFailed(number)
+    except LoadFailed:
+        if session.in_transaction():
+            leaked.append(number)
+
+
+def run_legacy(db, loads, fail_every, burst, leaked):
+    for first in range(0, loads, burst):
+        threads = [threading.Thread(target=legacy_load, args=(db, number, fail_every, leaked))
+                   for number in range(first, min(first + burst, loads))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+
+def run_unit_of_work(db, loads, fail_every, burst, leaked):
+    for first in range(0, loads, burst):
+        futures = [db.submit(unit_of_work_load, db, number, fail_every, leaked)
+                   for number in range(first, min(first + burst, loads))]
+        for future in futures:
+            future.result()
+
+
+def measure(db, runner, loads, fail_every, burst):
+    db.engine.dispose()
+    opened = []
+    event.listen(db.engine.pool, 'connect', lambda *args: opened.append(1))
+    leaked = []
+
+    started = time.perf_counter()
+    runner(db, loads, fail_every, burst, leaked)
+    elapsed = time.perf_counter() - started
+    checked_out_before_gc = db.engine.pool.checkedout()
+    gc.collect()
+    metrics = db.get_pool_metrics()
+
+    return {
+        'seconds': elapsed,
+        'loads': loads,
+        'failed_loads': loads // fail_every if fail_every else 0,
+        'sessions_left_holding_a_connection': len(leaked),
+        'connections_opened': len(opened),
+        'peak_checked_out': metrics['peak_checked_out'],
+        'checked_out_after_run': checked_out_before_gc,
+        'checked_out_after_gc': metrics['checked_out'],
+        'pool_timeouts': metrics['timeouts']
+    }
+
+
+def run(loads=10000, fail_every=10, burst=50, clients=500):
+    work_dir = tempfile.mkdtemp(prefix='bench_sessions_')
+    db = Database(f"sqlite:///{os.path.join(work_dir, 'bench.db')}", {'pool_timeout': 5})
+    db.initialize()
+    seed(db, clients)
+
+    results = {
+        'legacy_thread_per_load': measure(db, run_legacy, loads, fail_every, burst),
+        'unit_of_work_worker_pool': measure(db, run_unit_of_work, loads, fail_every, burst)
+    }
+    uow = results['unit_of_work_worker_pool']
+    results['no_connection_growth'] = (
+        uow['checked_out_after_run'] == 0
+        and uow['sessions_left_holding_a_connection'] == 0
+        and uow['connections_opened'] <= db.pool_options['worker_threads']
+    )
+    db.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--loads', type=int, default=10000)
+    parser.add_argument('--fail-every', type=int, default=10, help="Every Nth load raises (0 for none)")
+    parser.add_argument('--burst', type=int, default=50, help="Loads started together before waiting")
+    args = parser.parse_args()
+
+    logging.getLogger('invoice_manager').setLevel(logging.CRITICAL)
+    print(json.dumps(run(args.loads, args.fail_every, args.burst), indent=2))
+
+
+if __name__ == "__main__":
+    main()
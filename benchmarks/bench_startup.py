@@ -0,0 +1,129 @@
+"""Startup import profile driven by ``python -X importtime``.
+
+Imports each target module in a fresh interpreter with -X importtime and
+reports its cumulative import time (median of several runs). It also
+reports the slowest imported packages and which heavy optional libraries
+(reportlab, PyPDF2, pandas) were pulled in at import. With --first-paint it
+also times MainController construction through the first painted dashboard;
+that needs customtkinter and a display.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_startup --repeat 5
+    python -m benchmarks.bench_startup --module src.controllers.print_controller --first-paint
+"""
+import os
+import sys
+import json
+import logging
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_MODULES = [
+    'src.controllers.main_controller',
+    'src.controllers.print_controller',
+    'src.cli',
+]
+HEAVY_PACKAGES = ['reportlab', 'PyPDF2', 'pandas', 'openpyxl', 'customtkinter']
+
+FIRST_PAINT_SCRIPT = """
+import time
+started = time.perf_counter()
+import os, tempfile, logging
+logging.getLogger('invoice_manager').setLevel(logging.WARNING)
+from src.models.database import Database
+from src.utils.config_manager import ConfigManager
+from src.controllers.main_controller import MainController
+db = Database('sqlite:///' + os.path.join(tempfile.mkdtemp(), 'paint.db'))
+db.initialize()
+app = MainController(db, ConfigManager())
+app.view.setup()
+app.root.update()
+print(time.perf_counter() - started)
+app.print_controller.shutdown()
+app.root.destroy()
+"""
+
+
+def profile_import(module):
+    """Import ``module`` once under -X importtime and parse the report
+
+    Returns:
+        Dict mapping imported module name to (self_us, cumulative_us), or an error string
+    """
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        return completed.stderr.strip().splitlines()[-1]
+
+    timings = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        timings[name.strip()] = (int(self_us), int(cumulative_us))
+    return timings
+
+
+def run(modules=None, repeat=5, top=10, first_paint=False):
+    results = {}
+    for module in modules or DEFAULT_MODULES:
+        runs = []
+        for _ in range(repeat):
+            timings = profile_import(module)
+            if isinstance(timings, str):
+                runs = timings
+                break
+            runs.append(timings)
+        if isinstance(runs, str):
+            results[module] = {'error': runs}
+            continue
+
+        totals = [timings[module][1] / 1000.0 for timings in runs]
+        last = runs[-1]
+        # Top-level packages only, so nested modules are not counted twice
+        packages = {name: cumulative for name, (_, cumulative) in last.items() if '.' not in name}
+        slowest = sorted(packages.items(), key=lambda entry: entry[1], reverse=True)[:top]
+        results[module] = {
+            'import_ms_median': statistics.median(totals),
+            'import_ms_min': min(totals),
+            'slowest_packages_ms': {name: cumulative / 1000.0 for name, cumulative in slowest},
+            'heavy_packages_imported': [name for name in HEAVY_PACKAGES if name in last]
+        }
+
+    if first_paint:
+        paints = []
+        for _ in range(repeat):
+            completed = subprocess.run([sys.executable, '-c', FIRST_PAINT_SCRIPT], cwd=ROOT,
+                                       capture_output=True, text=True)
+            if completed.returncode != 0:
+                paints = completed.stderr.strip().splitlines()[-1:]
+                break
+            paints.append(float(completed.stdout.strip().splitlines()[-1]) * 1000.0)
+        if paints and isinstance(paints[0], float):
+            results['first_paint_ms_median'] = statistics.median(paints)
+        else:
+            results['first_paint_error'] = paints[0] if paints else "No output"
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--module', action='append', dest='modules',
+                        help="Module to profile (repeatable; default: GUI, print and CLI entry points)")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--first-paint', action='store_true')
+    args = parser.parse_args()
+
+    logging.getLogger('invoice_manager').setLevel(logging.WARNING)
+    print(json.dumps(run(args.modules, args.repeat, args.top, args.first_paint), indent=2))
+
+
+if __name__ == "__main__":
+    main()
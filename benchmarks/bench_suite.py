@@ -0,0 +1,262 @@
+"""Benchmark suite: controllers, PDF generation and grid rendering on generated data.
+
+Generates a dataset with DatasetGenerator (see ``invoice-manager generate``)
+into a temporary SQLite file, then times the operations behind each screen
+through the real controllers with a NullView standing in for the GUI:
+invoice, payment, client and item list loads and searches, invoice reads,
+updates and inserts, the dashboard query, and PrintManager.generate_invoice_pdf.
+When Tk can open a display it also times filling and sorting the invoice
+grid and loading a 200-line invoice into the line item grid. Without a
+display those are reported as skipped; run under ``xvfb-run`` on headless
+machines.
+
+Every benchmark runs --repeat times and reports its median and minimum in
+milliseconds. Save the output with ``invoice-manager bench suite --save
+baseline.json`` and check a later run with ``--compare baseline.json``.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_suite --invoices 20000 --repeat 5
+    xvfb-run python -m benchmarks.bench_suite
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import tempfile
+import statistics
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.models.database import Database
+from src.utils.dataset_generator import DatasetGenerator
+from src.views.null_view import NullView
+from src.controllers.invoice_controller import InvoiceController
+from src.controllers.payment_controller import PaymentController
+from src.controllers.client_controller import ClientController
+from src.controllers.item_controller import ItemController
+from src.controllers.dashboard_controller import DashboardController
+
+# Seconds to wait for a background load to reach the view
+LOAD_TIMEOUT = 120
+
+# Lines of the invoice used for the line item grid and large PDF benchmarks
+LARGE_INVOICE_LINES = 200
+
+
+def measure(operation, repeat):
+    """Median and minimum wall time of ``operation()`` over ``repeat`` runs, in milliseconds"""
+    runs = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        operation()
+        runs.append((time.perf_counter() - started) * 1000)
+    return {'median_ms': statistics.median(runs), 'min_ms': min(runs)}
+
+
+def loaded(view, display, start):
+    """Operation that starts a background load and waits for its ``display`` call"""
+    def operation():
+        mark = view.mark()
+        start()
+        if view.wait_for(display, mark, timeout=LOAD_TIMEOUT) is None:
+            raise RuntimeError(f"{display} was not called: {view.last_message()}")
+    return operation
+
+
+def controllers(db):
+    """Controllers wired to NullViews the way HeadlessController does it"""
+    main_view = NullView()
+    created = {
+        'invoices': InvoiceController(db, main_view),
+        'payments': PaymentController(db, main_view),
+        'clients': ClientController(db, main_view),
+        'items': ItemController(db, main_view),
+        'dashboard': DashboardController(db, main_view)
+    }
+    for controller in created.values():
+        controller.view = NullView()
+    return created
+
+
+def large_invoice(invoice_controller, items):
+    """Add an invoice with LARGE_INVOICE_LINES lines; returns its ID"""
+    success, invoice_id = invoice_controller.add_invoice(
+        {'invoice_number': 'INV-BENCH-LARGE', 'date': date.today().isoformat(), 'customer_name': "Benchmark Customer",
+         'customer_address': "1 Rizal Street, San Fernando, Pampanga", 'total_amount': 0.0,
+         'mode_of_payment': 'Gcash'},
+        [{'item_id': item.id, 'description': item.name, 'quantity': 1 + number % 3, 'price': item.price}
+         for number, item in enumerate(items.records[:LARGE_INVOICE_LINES])]
+    )
+    if not success:
+        raise RuntimeError(f"Could not add the large invoice: {invoice_id}")
+    return invoice_id
+
+
+def controller_benchmarks(db, repeat):
+    controller = controllers(db)
+    invoices = controller['invoices']
+    payments = controller['payments']
+    clients = controller['clients']
+    items = controller['items']
+    dashboard = controller['dashboard']
+
+    catalog = invoices.get_items()
+    large_id = large_invoice(invoices, catalog)
+    results = {}
+
+    results['invoices.load_all'] = measure(
+        loaded(invoices.view, 'display_invoices', lambda: invoices.load_invoices()), repeat)
+    results['invoices.load_past_30_days'] = measure(
+        loaded(invoices.view, 'display_invoices', lambda: invoices.load_invoices('past_30_days')), repeat)
+    results['invoices.get_invoice_200_lines'] = measure(lambda: invoices.get_invoice(large_id), repeat)
+    results['invoices.get_invoices_100'] = measure(lambda: invoices.get_invoices(list(range(1, 101))), repeat)
+
+    def update_one_line():
+        invoice_data, items_data = invoices.get_invoice(large_id)
+        items_data[0]['quantity'] = 2 if items_data[0]['quantity'] != 2 else 3
+        success, message = invoices.update_invoice(large_id, {'customer_name': invoice_data['customer_name']}, items_data)
+        if not success:
+            raise RuntimeError(message)
+    results['invoices.update_invoice_200_lines'] = measure(update_one_line, repeat)
+
+    counter = iter(range(1, repeat + 1))
+
+    def add_invoice():
+        success, message = invoices.add_invoice(
+            {'invoice_number': f"INV-BENCH-{next(counter)}", 'date': date.today().isoformat(),
+             'customer_name': "Benchmark Customer", 'customer_address': "", 'total_amount': 0.0,
+             'mode_of_payment': 'Gcash'},
+            [{'item_id': item.id, 'description': item.name, 'quantity': 1, 'price': item.price}
+             for item in catalog.records[:5]]
+        )
+        if not success:
+            raise RuntimeError(message)
+    results['invoices.add_invoice_5_lines'] = measure(add_invoice, repeat)
+
+    results['payments.load_payments'] = measure(
+        loaded(payments.view, 'display_payments', payments.load_payments), repeat)
+    results['payments.load_invoices_pending'] = measure(
+        loaded(payments.view, 'display_invoices', lambda: payments.load_invoices('pending')), repeat)
+
+    results['clients.load_page'] = measure(
+        loaded(clients.view, 'display_clients', lambda: clients.load_clients(page=1, per_page=20)), repeat)
+    results['clients.search'] = measure(
+        loaded(clients.view, 'display_clients', lambda: clients.load_clients(search_text="santos")), repeat)
+    results['items.load_page'] = measure(
+        loaded(items.view, 'display_items', lambda: items.load_items(page=1, per_page=20)), repeat)
+    results['items.search'] = measure(
+        loaded(items.view, 'display_items', lambda: items.load_items(search_text="rice")), repeat)
+
+    results['dashboard.get_dashboard_data'] = measure(dashboard.get_dashboard_data, repeat)
+    return results, large_id
+
+
+def pdf_benchmarks(db, large_id, repeat):
+    from src.utils.artifact_store import ArtifactStore
+    from src.utils.print_manager import PrintManager
+    print_manager = PrintManager(artifact_store=ArtifactStore(tempfile.mkdtemp(prefix='bench_pdf_')))
+    invoices = InvoiceController(db, NullView())
+    details = invoices.get_invoices([1, large_id])
+
+    results = {}
+    for name, invoice_id in (('pdf.invoice_small', 1), (f"pdf.invoice_{LARGE_INVOICE_LINES}_lines", large_id)):
+        invoice_data, items_data = details[invoice_id]
+
+        def generate():
+            if not print_manager.generate_invoice_pdf(invoice_data, items_data):
+                raise RuntimeError(f"No PDF generated for invoice {invoice_id}")
+        results[name] = measure(generate, repeat)
+    return results
+
+
+def render_benchmarks(db, large_id, repeat):
+    """Grid rendering on a real Tk root; returns a 'skipped' reason when no display is available"""
+    try:
+        import customtkinter as ctk
+        root = ctk.CTk()
+    except Exception as e:
+        return {'render': {'skipped': f"No display for Tk ({str(e).splitlines()[0]}); run under xvfb-run"}}
+
+    from src.views.invoice_view import InvoiceView
+    from src.views.line_item_grid import LineItemGrid
+    from src.models.projections import fetch_table, invoice_rows, InvoiceRow
+    from src.models.invoice_model import Invoice
+
+    results = {}
+    try:
+        root.geometry("1200x700")
+        invoice_controller = InvoiceController(db, NullView())
+        with db.unit_of_work(read_only=True) as session:
+            rows = fetch_table(session, invoice_rows().order_by(Invoice.date.desc()), InvoiceRow)
+        view = InvoiceView(root, invoice_controller)
+        root.update()
+
+        def display():
+            view.display_invoices(rows)
+            root.update_idletasks()
+        results[f"render.invoice_grid_{len(rows)}_rows"] = measure(display, repeat)
+
+        def sort():
+            view._sort_by_column("Customer", reset=False)
+            root.update_idletasks()
+        results['render.invoice_grid_sort'] = measure(sort, repeat)
+
+        view.search_var.set("santos")
+
+        def search():
+            view._filter_invoices()
+            root.update_idletasks()
+        results['render.invoice_grid_filter'] = measure(search, repeat)
+        view.destroy()
+
+        grid = LineItemGrid(root, invoice_controller.get_items())
+        grid.pack(fill="both", expand=True)
+        _, items_data = invoice_controller.get_invoice(large_id)
+
+        def load_lines():
+            grid.load(items_data)
+            root.update_idletasks()
+        results[f"render.line_item_grid_{len(items_data)}_lines"] = measure(load_lines, repeat)
+    finally:
+        root.destroy()
+    return results
+
+
+def run(invoices=20000, repeat=5, seed=42):
+    work_dir = tempfile.mkdtemp(prefix='bench_suite_')
+    path = os.path.join(work_dir, 'bench.db')
+    generated = DatasetGenerator(invoices, seed=seed).write(path)
+
+    db = Database(f"sqlite:///{path}")
+    db.initialize()
+    try:
+        results, large_id = controller_benchmarks(db, repeat)
+        results.update(pdf_benchmarks(db, large_id, repeat))
+        results.update(render_benchmarks(db, large_id, repeat))
+    finally:
+        db.close()
+
+    return {
+        'dataset': {key: value for key, value in generated.items() if key != 'seconds'},
+        'generate_seconds': generated['seconds'],
+        'repeat': repeat,
+        'benchmarks': results
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--invoices', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    logging.getLogger('invoice_manager').setLevel(logging.WARNING)
+    print(json.dumps(run(args.invoices, args.repeat, args.seed), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Stand-in for the CUPS ``lp`` command used by the print spooler benchmarks.
+
+Accepts the same ``-o option=value`` arguments as lp, pretends to spool the file
+and exits with lp's conventions (0 on success, 1 on error).
+
+Environment variables:
+    FAKE_LP_DELAY      Seconds each job takes to submit (default 0.01)
+    FAKE_LP_FAIL_RATE  Probability between 0 and 1 that a job fails (default 0)
+    FAKE_LP_LOG        Optional file that receives one line per printed file
+"""
+import os
+import sys
+import random
+import time
+
+
+def main(argv):
+    files = []
+    args = iter(argv)
+    for arg in args:
+        if arg in ('-o', '-d', '-n'):
+            next(args, None)  # Skip the option value
+        elif not arg.startswith('-'):
+            files.append(arg)
+
+    if not files:
+        print("lp: no files given", file=sys.stderr)
+        return 1
+
+    time.sleep(float(os.environ.get('FAKE_LP_DELAY', '0.01')))
+
+    if random.random() < float(os.environ.get('FAKE_LP_FAIL_RATE', '0')):
+        print("lp: printer not responding", file=sys.stderr)
+        return 1
+
+    for path in files:
+        if not os.path.exists(path):
+            print(f"lp: Error - unable to access \"{path}\" - No such file or directory", file=sys.stderr)
+            return 1
+
+    log_path = os.environ.get('FAKE_LP_LOG')
+    if log_path:
+        with open(log_path, 'a') as log_file:
+            for path in files:
+                log_file.write(f"{path}\n")
+
+    print(f"request id is fake-{os.getpid()} ({len(files)} file(s))")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
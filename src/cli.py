@@ -0,0 +1,338 @@
+"""Headless command line interface for batch jobs.
+
+Runs the same controller logic as the GUI against a null view, without
+starting Tk:
+
+    invoice-manager export invoices --format csv --output invoices.csv
+    invoice-manager import items catalog.xlsx
+    invoice-manager print-batch --status pending --per-sheet 4
+    invoice-manager recalc
+    invoice-manager bench bench_invoice_loader
+    invoice-manager bench suite --compare baseline.json
+    invoice-manager vacuum
+    invoice-manager serve --port 8765
+    invoice-manager --profile-queries export invoices -o /dev/null
+    invoice-manager generate --invoices 1000000 --output loadtest.db
+
+From a source checkout, use ``python app.py <command> ...``.
+"""
+import os
+import sys
+import json
+import glob
+import logging
+import argparse
+import subprocess
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='invoice-manager',
+        description="Invoice Manager batch commands (run without arguments to start the GUI)"
+    )
+    parser.add_argument('-v', '--verbose', action='store_true', help="Echo informational log messages")
+    parser.add_argument('--profile-queries', action='store_true',
+                        help="Time every SQL statement and print the slowest ones to standard error at the end")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    export_parser = subparsers.add_parser('export', help="Export records to CSV or JSON")
+    export_parser.add_argument('entity', choices=['invoices', 'clients', 'items', 'payments'])
+    export_parser.add_argument('--format', choices=['csv', 'json'], default='csv')
+    export_parser.add_argument('--output', '-o', help="Output file (default: standard output)")
+    export_parser.add_argument('--date-filter', choices=['today', 'past_7_days', 'past_30_days'],
+                               help="Only export recent invoices")
+
+    import_parser = subparsers.add_parser('import', help="Import clients or items from CSV or Excel")
+    import_parser.add_argument('entity', choices=['clients', 'items'])
+    import_parser.add_argument('file')
+
+    print_parser = subparsers.add_parser('print-batch', help="Print invoices as one batch document")
+    print_parser.add_argument('--ids', type=int, nargs='+', help="Invoice IDs to print")
+    print_parser.add_argument('--status', choices=['pending', 'partial', 'completed', 'cancelled'],
+                              help="Print every invoice with this payment status")
+    print_parser.add_argument('--date-filter', choices=['today', 'past_7_days', 'past_30_days'])
+    print_parser.add_argument('--per-sheet', type=int, choices=[1, 2, 4],
+                              help="Invoices per sheet (default: printing.invoices_per_sheet)")
+    print_parser.add_argument('--no-wait', action='store_true',
+                              help="Return once jobs are queued instead of waiting for the printer")
+
+    subparsers.add_parser('recalc', help="Recompute invoice totals and payment statuses")
+
+    bench_parser = subparsers.add_parser('bench', help="Run benchmarks from the benchmarks directory")
+    bench_parser.add_argument('names', nargs='*', help="Benchmark modules to run (default: all)")
+    bench_parser.add_argument('--save', metavar='FILE', help="Write the results to FILE as a baseline")
+    bench_parser.add_argument('--compare', metavar='FILE', help="Flag timings that regressed against a saved baseline")
+    bench_parser.add_argument('--threshold', type=float, default=0.2,
+                              help="Relative slowdown reported as a regression (default: 0.2 = 20%%)")
+
+    subparsers.add_parser('vacuum', help="Compact the database and clean up generated PDFs")
+
+    generate_parser = subparsers.add_parser('generate', help="Create a database of synthetic data for load testing")
+    generate_parser.add_argument('--invoices', type=int, default=100000, help="Invoices to generate (default: 100000)")
+    generate_parser.add_argument('--clients', type=int, help="Clients to generate (default: invoices / 20)")
+    generate_parser.add_argument('--items', type=int, help="Catalog items to generate (default: invoices / 50)")
+    generate_parser.add_argument('--seed', type=int, default=42, help="Random seed (default: 42)")
+    generate_parser.add_argument('--end-date', help="Date of the newest invoice, YYYY-MM-DD (default: today)")
+    generate_parser.add_argument('--output', '-o', default='loadtest.db', help="SQLite file to create")
+    generate_parser.add_argument('--force', action='store_true', help="Replace the output file if it exists")
+
+    serve_parser = subparsers.add_parser('serve', help="Run the local HTTP/JSON API until interrupted")
+    serve_parser.add_argument('--host', help="Address to bind (default: api.host)")
+    serve_parser.add_argument('--port', type=int, help="Port to listen on (default: api.port)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    from src.utils.logger import setup_logger
+    setup_logger(console_level=logging.INFO if args.verbose else logging.WARNING)
+    logger = logging.getLogger('invoice_manager')
+    logger.info(f"Running headless command: {args.command}")
+
+    if args.command == 'bench':
+        return run_benchmarks(args.names, args.save, args.compare, args.threshold)
+    if args.command == 'generate':
+        return run_generate(args)
+
+    from src.models.database import Database
+    from src.utils.config_manager import ConfigManager
+    from src.controllers.headless_controller import HeadlessController
+
+    config = ConfigManager()
+    db = Database(config.get_database_uri(), config.get_pool_options())
+    if not db.initialize():
+        print("Could not open the database", file=sys.stderr)
+        return 1
+    db.setup_change_log(**config.get_sync_options())
+
+    if args.profile_queries or config.get('diagnostics', 'profile_queries'):
+        db.enable_profiling(**config.get_profiler_options())
+
+    app = HeadlessController(db, config)
+    try:
+        handler = {
+            'export': run_export,
+            'import': run_import,
+            'print-batch': run_print_batch,
+            'recalc': run_recalc,
+            'vacuum': run_vacuum,
+            'serve': run_serve
+        }[args.command]
+        return handler(app, args)
+    finally:
+        app.shutdown()
+        if db.profiler:
+            print(db.profiler.format_report(), file=sys.stderr)
+
+
+def run_export(app, args):
+    if args.output:
+        with open(args.output, 'w', newline='', encoding='utf-8') as output:
+            count = app.export(args.entity, output, args.format, args.date_filter)
+    else:
+        count = app.export(args.entity, sys.stdout, args.format, args.date_filter)
+
+    if count is None:
+        print(f"Failed to export {args.entity}", file=sys.stderr)
+        return 1
+    if args.output:
+        print(f"Exported {count} {args.entity} to {args.output}")
+    return 0
+
+
+def run_import(app, args):
+    result = app.import_file(args.entity, args.file)
+    if result.get('error'):
+        print(f"Import failed: {result['error']}", file=sys.stderr)
+        return 1
+
+    print(f"Imported {result['imported']} of {result['total']} {args.entity} in {result['seconds']:.1f}s")
+    if result['failed']:
+        print(f"{result['failed']} row(s) rejected, see {result['error_report']}", file=sys.stderr)
+        return 2
+    return 0
+
+
+def run_print_batch(app, args):
+    invoice_ids = args.ids
+    if not invoice_ids:
+        if not args.status and not args.date_filter:
+            print("Select invoices with --ids, --status or --date-filter", file=sys.stderr)
+            return 1
+        invoices = app.fetch_records('invoices', args.date_filter)
+        if invoices is None:
+            print("Failed to load invoices", file=sys.stderr)
+            return 1
+        invoice_ids = [
+            invoice['id'] for invoice in invoices
+            if not args.status or invoice['payment_status'] == args.status
+        ]
+        if not invoice_ids:
+            print("No invoices match the selection")
+            return 0
+
+    success, message = app.print_batch(invoice_ids, per_sheet=args.per_sheet, wait=not args.no_wait)
+    print(message, file=sys.stdout if success else sys.stderr)
+    return 0 if success else 1
+
+
+def run_recalc(app, args):
+    success, result = app.recalc()
+    if not success:
+        print(f"Recalculation failed: {result}", file=sys.stderr)
+        return 1
+    print(f"Checked {result['invoices']} invoices: {result['totals_updated']} totals and "
+          f"{result['statuses_updated']} payment statuses updated")
+    return 0
+
+
+def run_vacuum(app, args):
+    success, message = app.vacuum()
+    print(message, file=sys.stdout if success else sys.stderr)
+    return 0 if success else 1
+
+
+def run_serve(app, args):
+    from src.utils.api_server import create_api_server
+    server = create_api_server(app.db, app.config.get('api'), host=args.host, port=args.port)
+    print(f"Serving the API on http://{server.host}:{server.port} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def run_generate(args):
+    from datetime import datetime
+    from src.utils.dataset_generator import DatasetGenerator
+    try:
+        end_date = datetime.strptime(args.end_date, '%Y-%m-%d').date() if args.end_date else None
+    except ValueError:
+        print(f"Invalid --end-date {args.end_date}, expected YYYY-MM-DD", file=sys.stderr)
+        return 1
+
+    generator = DatasetGenerator(args.invoices, clients=args.clients, items=args.items,
+                                 seed=args.seed, end_date=end_date)
+    try:
+        counts = generator.write(
+            args.output, overwrite=args.force,
+            progress_callback=lambda done: print(f"\r{done}/{args.invoices} invoices", end='', file=sys.stderr)
+        )
+    except FileExistsError:
+        print(f"{args.output} already exists (use --force to replace it)", file=sys.stderr)
+        return 1
+    print(file=sys.stderr)
+    print(f"Wrote {counts['clients']} clients, {counts['items']} items, {counts['invoices']} invoices, "
+          f"{counts['invoice_items']} line items and {counts['payments']} payments to {args.output} "
+          f"in {counts['seconds']:.1f}s")
+    print("Point database.path in config/config.json at it to open it in the application")
+    return 0
+
+
+def run_benchmarks(names, save=None, compare=None, threshold=0.2):
+    """Run benchmark modules with their default settings and print the results as JSON
+
+    Each benchmark runs in its own interpreter because Database is a
+    process-wide singleton bound to the first URI it was created with.
+    With ``save`` the results are also written to that file; with
+    ``compare`` they are checked against a file written that way earlier.
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    available = sorted(
+        os.path.splitext(os.path.basename(path))[0]
+        for path in glob.glob(os.path.join(root, 'benchmarks', 'bench_*.py'))
+    )
+    if not available:
+        print("No benchmarks found (they are not included in packaged builds)", file=sys.stderr)
+        return 1
+
+    baseline = None
+    if compare:
+        try:
+            with open(compare, encoding='utf-8') as baseline_file:
+                baseline = json.load(baseline_file)
+        except (OSError, ValueError) as e:
+            print(f"Could not read baseline {compare}: {str(e)}", file=sys.stderr)
+            return 1
+
+    selected = [name if name.startswith('bench_') else f"bench_{name}" for name in names] or available
+    unknown = [name for name in selected if name not in available]
+    if unknown:
+        print(f"Unknown benchmark(s): {', '.join(unknown)}. Available: {', '.join(available)}", file=sys.stderr)
+        return 1
+
+    results = {}
+    exit_code = 0
+    for name in selected:
+        completed = subprocess.run(
+            [sys.executable, '-m', f"benchmarks.{name}"], cwd=root, capture_output=True, text=True
+        )
+        try:
+            results[name] = json.loads(completed.stdout)
+        except ValueError:
+            results[name] = {'error': completed.stderr.strip().splitlines()[-1:] or "No output"}
+            exit_code = 1
+    print(json.dumps(results, indent=2, default=str))
+
+    if save:
+        with open(save, 'w', encoding='utf-8') as baseline_file:
+            json.dump(results, baseline_file, indent=2, default=str)
+        print(f"Saved baseline to {save}", file=sys.stderr)
+
+    if baseline is not None:
+        regressions = compare_benchmarks(baseline, results, threshold)
+        if regressions:
+            exit_code = exit_code or 2
+    return exit_code
+
+
+# Timings compared against a baseline; everything else in the results is context
+TIMING_SUFFIXES = ('_ms', 'seconds')
+# Slowdowns smaller than this many milliseconds are noise, whatever their ratio
+MIN_REGRESSION_MS = 1.0
+
+
+def _timings(results, prefix=''):
+    """Flatten nested benchmark results to {dotted.path: milliseconds} for their timing values"""
+    timings = {}
+    for key, value in results.items():
+        path = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            timings.update(_timings(value, path))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool) and key.endswith(TIMING_SUFFIXES):
+            timings[path] = value if key.endswith('_ms') else value * 1000.0
+    return timings
+
+
+def compare_benchmarks(baseline, results, threshold):
+    """Print the timings that got slower than ``baseline`` by more than ``threshold``
+
+    Only timings present in both runs are compared.
+
+    Returns:
+        List of (path, baseline ms, current ms) regressions
+    """
+    before = _timings(baseline)
+    after = _timings(results)
+    regressions = []
+    improvements = 0
+    for path in sorted(before.keys() & after.keys()):
+        old, new = before[path], after[path]
+        if new > old * (1 + threshold) and new - old >= MIN_REGRESSION_MS:
+            regressions.append((path, old, new))
+        elif old > new * (1 + threshold) and old - new >= MIN_REGRESSION_MS:
+            improvements += 1
+
+    compared = len(before.keys() & after.keys())
+    for path, old, new in regressions:
+        print(f"REGRESSION {path}: {old:.2f} ms -> {new:.2f} ms (+{(new / old - 1) * 100 if old else 0:.0f}%)",
+              file=sys.stderr)
+    print(f"Compared {compared} timings against the baseline: {len(regressions)} regressed, "
+          f"{improvements} improved by more than {threshold:.0%}", file=sys.stderr)
+    return regressions
+
+
+if __name__ == "__main__":
+    sys.exit(main())
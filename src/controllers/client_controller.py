@@ -2,9 +2,15 @@ import logging
 import threading
 from sqlalchemy.exc import SQLAlchemyError
 from src.models.client_model import Client
-from src.views.client_view import ClientView
+from src.models.projections import ClientRow, client_rows, fetch_records, count_rows
+from src.utils.bulk_importer import BulkImporter
+from src.utils.change_feed import updated_row_ids
+from src.utils.mutations import run_mutation
 
 class ClientController:
+    # Tables shown by this controller's page; it is refreshed when one of them changes
+    tables = ('clients',)
+    
     def __init__(self, db, main_view):
         self.db = db
         self.main_view = main_view
@@ -13,44 +19,82 @@ class ClientController:
     
     def load_view(self, parent_frame):
         """Load the client view into the parent frame"""
+        # Imported here so the controller also works headless, without loading the GUI toolkit
+        from src.views.client_view import ClientView
         self.view = ClientView(parent_frame, self)
         self.load_clients()
     
+    def refresh_view(self):
+        """Reload the current page of a cached view after the data changed"""
+        self.load_clients(page=self.view.current_page, per_page=self.view.per_page, search_text=self.view.search_var.get())
+    
+    def save_in_background(self, mutation, *args, **callbacks):
+        """Run one of this controller's add/update/delete methods off the Tk thread (see run_mutation)"""
+        return run_mutation(self.db, self.view, mutation, *args, **callbacks)
+    
+    def apply_changes(self, rows):
+        """Patch updated clients on the visible page in place
+        
+        Returns:
+            False when the page has to be reloaded instead (inserts, deletes,
+            rows off the page, an active search or a changed sort order)
+        """
+        ids = updated_row_ids(rows, 'clients')
+        if ids is None or self.view.search_var.get():
+            return False
+        shown = {record['id']: record for record in self.view.clients_data}
+        if not ids <= shown.keys():
+            return False
+        if not ids:
+            return True
+        
+        def fetch_rows():
+            try:
+                with self.db.unit_of_work(read_only=True) as session:
+                    records = fetch_records(session, client_rows().where(Client.id.in_(ids)), ClientRow)
+                
+                if len(records) != len(ids) or any(record['name'] != shown[record['id']]['name'] for record in records):
+                    self.view.after(0, self.refresh_view)
+                else:
+                    self.view.after(0, lambda: self.view.update_clients(records))
+            except SQLAlchemyError as e:
+                self.logger.error(f"Error fetching changed clients: {str(e)}")
+                self.view.after(0, self.refresh_view)
+        
+        self.db.submit(fetch_rows)
+        return True
+    
     def load_clients(self, page=1, per_page=20, search_text=""):
         """Load clients from the database with pagination support"""
         self.logger.info(f"Loading clients page {page}, per_page {per_page}, search '{search_text}'")
         
-        # Use a separate thread for database operations
+        # Run the query on the shared database worker pool
         def fetch_clients():
             try:
-                session = self.db.get_session()
-                
-                # Base query
-                query = session.query(Client)
-                
-                # Apply search filter if provided
-                if search_text:
-                    search_text_like = f"%{search_text}%"
-                    query = query.filter(
-                        (Client.name.ilike(search_text_like)) |
-                        (Client.company.ilike(search_text_like)) |
-                        (Client.email.ilike(search_text_like)) |
-                        (Client.phone.ilike(search_text_like)) |
-                        (Client.city.ilike(search_text_like))
-                    )
-                
-                # Get total count for pagination
-                total_count = query.count()
-                
-                # Apply pagination
-                query = query.order_by(Client.name)
-                query = query.limit(per_page).offset((page - 1) * per_page)
-                
-                # Execute query
-                clients = query.all()
-                clients_data = [client.to_dict() for client in clients]
-                
-                session.close()
+                with self.db.unit_of_work(read_only=True) as session:
+                    # Only the columns the grid shows
+                    query = client_rows()
+                    
+                    # Apply search filter if provided
+                    if search_text:
+                        search_text_like = f"%{search_text}%"
+                        query = query.filter(
+                            (Client.name.ilike(search_text_like)) |
+                            (Client.company.ilike(search_text_like)) |
+                            (Client.email.ilike(search_text_like)) |
+                            (Client.mobile.ilike(search_text_like)) |
+                            (Client.city.ilike(search_text_like))
+                        )
+                    
+                    # Get total count for pagination
+                    total_count = count_rows(session, query)
+                    
+                    # Apply pagination
+                    query = query.order_by(Client.name)
+                    query = query.limit(per_page).offset((page - 1) * per_page)
+                    
+                    # Execute query
+                    clients_data = fetch_records(session, query, ClientRow)
                 
                 # Update UI in the main thread
                 pagination_info = {
@@ -66,9 +110,7 @@ class ClientController:
                 self.logger.error(f"Error fetching clients: {str(e)}")
                 self.view.after(0, lambda: self.view.show_error("Failed to load clients"))
         
-        thread = threading.Thread(target=fetch_clients)
-        thread.daemon = True
-        thread.start()
+        self.db.submit(fetch_clients)
     
     def add_client(self, client_data):
         """Add a new client to the database"""
@@ -80,16 +122,13 @@ class ClientController:
             return validation_result
         
         try:
-            session = self.db.get_session()
-            new_client = Client(**client_data)
-            session.add(new_client)
-            session.commit()
-            session.refresh(new_client)
-            client_id = new_client.id
-            session.close()
+            with self.db.unit_of_work() as session:
+                new_client = Client(**client_data)
+                session.add(new_client)
+                session.flush()
+                client_id = new_client.id
             
             self.logger.info(f"Client added successfully with ID: {client_id}")
-            self.load_clients(page=self.view.current_page, per_page=self.view.per_page, search_text=self.view.search_var.get())
             return True, client_id
         
         except SQLAlchemyError as e:
@@ -106,23 +145,18 @@ class ClientController:
             return validation_result
         
         try:
-            session = self.db.get_session()
-            client = session.query(Client).filter(Client.id == client_id).first()
-            
-            if not client:
-                session.close()
-                self.logger.warning(f"Client with ID {client_id} not found")
-                return False, "Client not found"
-            
-            # Update client attributes
-            for key, value in client_data.items():
-                setattr(client, key, value)
-            
-            session.commit()
-            session.close()
+            with self.db.unit_of_work() as session:
+                client = session.query(Client).filter(Client.id == client_id).first()
+                
+                if not client:
+                    self.logger.warning(f"Client with ID {client_id} not found")
+                    return False, "Client not found"
+                
+                # Update client attributes
+                for key, value in client_data.items():
+                    setattr(client, key, value)
             
             self.logger.info(f"Client updated successfully: {client_id}")
-            self.load_clients(page=self.view.current_page, per_page=self.view.per_page, search_text=self.view.search_var.get())
             return True, client_id
         
         except SQLAlchemyError as e:
@@ -134,39 +168,51 @@ class ClientController:
         self.logger.info(f"Deleting client with ID: {client_id}")
         
         try:
-            session = self.db.get_session()
-            client = session.query(Client).filter(Client.id == client_id).first()
-            
-            if not client:
-                session.close()
-                self.logger.warning(f"Client with ID {client_id} not found")
-                return False, "Client not found"
-            
-            session.delete(client)
-            session.commit()
-            session.close()
+            with self.db.unit_of_work() as session:
+                client = session.query(Client).filter(Client.id == client_id).first()
+                
+                if not client:
+                    self.logger.warning(f"Client with ID {client_id} not found")
+                    return False, "Client not found"
+                
+                session.delete(client)
             
             self.logger.info(f"Client deleted successfully: {client_id}")
-            self.load_clients(page=self.view.current_page, per_page=self.view.per_page, search_text=self.view.search_var.get())
             return True, None
         
         except SQLAlchemyError as e:
             self.logger.error(f"Error deleting client: {str(e)}")
             return False, str(e)
     
+    def import_clients(self, file_path):
+        """Import clients from a CSV or Excel file in the background"""
+        self.logger.info(f"Starting client import from {file_path}")
+
+        def run_import():
+            result = self.import_clients_file(file_path)
+            if self.view:
+                self.view.after(0, lambda: self.view.show_import_result(result))
+
+        thread = threading.Thread(target=run_import)
+        thread.daemon = True
+        thread.start()
+
+    def import_clients_file(self, file_path):
+        """Import clients synchronously and return the import summary"""
+        importer = BulkImporter(self.db)
+        try:
+            return importer.import_clients(file_path, self._validate_client_data)
+        except (OSError, ValueError, ImportError, SQLAlchemyError) as e:
+            self.logger.error(f"Error importing clients: {str(e)}")
+            return {'total': 0, 'imported': 0, 'failed': 0, 'errors': [], 'error_report': None,
+                    'seconds': 0.0, 'error': str(e)}
+
     def get_client(self, client_id):
         """Get a specific client by ID"""
         try:
-            session = self.db.get_session()
-            client = session.query(Client).filter(Client.id == client_id).first()
-            
-            if not client:
-                session.close()
-                return None
-            
-            client_data = client.to_dict()
-            session.close()
-            return client_data
+            with self.db.unit_of_work(read_only=True) as session:
+                client = session.query(Client).filter(Client.id == client_id).first()
+                return client.to_dict() if client else None
         
         except SQLAlchemyError as e:
             self.logger.error(f"Error fetching client: {str(e)}")
@@ -0,0 +1,149 @@
+import csv
+import json
+import logging
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import joinedload
+from src.models.client_model import Client
+from src.models.item_model import Item
+from src.models.invoice_model import Invoice
+from src.models.payment_model import Payment
+from src.models.projections import filter_by_date
+from src.views.null_view import NullView
+from src.utils.artifact_store import create_pdf_store
+from src.utils.config_manager import ConfigManager
+from src.controllers.client_controller import ClientController
+from src.controllers.invoice_controller import InvoiceController
+from src.controllers.payment_controller import PaymentController
+from src.controllers.item_controller import ItemController
+
+class HeadlessController:
+    """Runs the application's controllers without a GUI
+
+    Mirrors MainController, but every controller gets a NullView instead of a
+    customtkinter view, so batch jobs reuse the exact same queries, validation
+    and printing logic without starting Tk.
+    """
+
+    # Seconds to wait for a background load or batch to report back
+    TIMEOUT = 600
+
+    def __init__(self, db, config=None):
+        self.logger = logging.getLogger('invoice_manager')
+        self.db = db
+        self.config = config or ConfigManager()
+        self.view = NullView()
+
+        self.client_controller = ClientController(self.db, self.view)
+        self.invoice_controller = InvoiceController(self.db, self.view)
+        self.payment_controller = PaymentController(self.db, self.view)
+        self.item_controller = ItemController(self.db, self.view)
+        for controller in (self.client_controller, self.invoice_controller,
+                           self.payment_controller, self.item_controller):
+            controller.view = NullView()
+
+        # Created on first use since it starts the print spooler
+        self._print_controller = None
+
+    @property
+    def print_controller(self):
+        if self._print_controller is None:
+            from src.controllers.print_controller import PrintController
+            self._print_controller = PrintController(self.db, self.view, self.config)
+            self._print_controller.view = NullView()
+        return self._print_controller
+
+    def fetch_records(self, entity, date_filter=None, page_size=1000):
+        """Load all clients, items, invoices or payments as full record dicts
+
+        The controllers' list loaders only select the columns their grids
+        show, so exports read the complete rows here instead.
+
+        Returns:
+            List of record dicts, or None if loading failed
+        """
+        if entity == 'clients':
+            query_for = lambda session: session.query(Client).order_by(Client.name)
+        elif entity == 'items':
+            query_for = lambda session: session.query(Item).order_by(Item.date_added.desc())
+        elif entity == 'invoices':
+            query_for = lambda session: filter_by_date(session.query(Invoice), date_filter).order_by(Invoice.date.desc())
+        elif entity == 'payments':
+            query_for = lambda session: session.query(Payment).options(
+                joinedload(Payment.invoice)
+            ).order_by(Payment.payment_date.desc())
+        else:
+            raise ValueError(f"Unknown record type: {entity}")
+
+        try:
+            with self.db.unit_of_work(read_only=True) as session:
+                return [record.to_dict() for record in query_for(session).yield_per(page_size)]
+        except SQLAlchemyError as e:
+            self.logger.error(f"Error fetching {entity}: {str(e)}")
+            return None
+
+    def export(self, entity, output, file_format='csv', date_filter=None):
+        """Write all records of one type to a CSV or JSON file object
+
+        Returns:
+            Number of records written, or None if loading failed
+        """
+        records = self.fetch_records(entity, date_filter)
+        if records is None:
+            return None
+
+        if file_format == 'json':
+            json.dump(records, output, indent=2, default=str)
+            output.write("\n")
+        else:
+            fieldnames = list(records[0].keys()) if records else []
+            writer = csv.DictWriter(output, fieldnames=fieldnames)
+            writer.writeheader()
+            writer.writerows(records)
+
+        self.logger.info(f"Exported {len(records)} {entity}")
+        return len(records)
+
+    def import_file(self, entity, file_path):
+        """Import clients or items from a CSV or Excel file"""
+        if entity == 'clients':
+            return self.client_controller.import_clients_file(file_path)
+        if entity == 'items':
+            return self.item_controller.import_items_file(file_path)
+        raise ValueError(f"Cannot import {entity}")
+
+    def print_batch(self, invoice_ids, per_sheet=None, wait=True):
+        """Queue invoices for printing as one batch document
+
+        Returns:
+            Tuple (success, message)
+        """
+        controller = self.print_controller
+        view = controller.view
+
+        mark = view.mark()
+        controller.print_multiple_invoices(invoice_ids, per_sheet=per_sheet)
+        result = view.wait_for('show_info', mark, self.TIMEOUT)
+        if result is None:
+            return False, view.last_message() or "Timed out while preparing the batch"
+
+        if wait and not controller.print_spooler.wait_until_idle(self.TIMEOUT):
+            return False, f"{result[0]}, but the print queue did not drain in time"
+        return controller.get_print_queue_status()['failed'] == 0, result[0]
+
+    def recalc(self):
+        """Recompute invoice totals and payment statuses"""
+        return self.invoice_controller.recalculate_invoices()
+
+    def vacuum(self):
+        """Compact the database and clean up generated PDFs"""
+        success, message = self.db.vacuum()
+        if success:
+            removed = create_pdf_store(self.config.get('storage')).cleanup()
+            message += f", removed {removed['removed_files']} temporary PDF(s)"
+        return success, message
+
+    def shutdown(self):
+        """Stop background workers started by the print controller"""
+        if self._print_controller:
+            self._print_controller.shutdown()
+        self.db.close()
@@ -1,60 +1,57 @@
 import logging
-import threading
-from datetime import datetime, timedelta
+from datetime import datetime
 from sqlalchemy.exc import SQLAlchemyError
-from src.models.invoice_model import Invoice, InvoiceItem
-from src.models.client_model import Client
-from src.views.invoice_view import InvoiceView
+from sqlalchemy.orm import selectinload
+from src.models.invoice_model import Invoice
+from src.models.invoice_loader import load_invoices_with_items, BULK_LOAD_CHUNK_SIZE
+from src.models.invoice_writer import save_line_items
+from src.models.projections import InvoiceRow, invoice_rows, fetch_table, filter_by_date
+from src.models.reference_data import reference_cache
 import os
+from src.utils.mutations import run_mutation
 
 class InvoiceController:
+    # Tables shown by this controller's page; it is refreshed when one of them changes
+    tables = ('invoices', 'invoice_items')
+    
     def __init__(self, db, main_view):
         self.db = db
         self.main_view = main_view
         self.view = None
+        self.date_filter = None  # Filter of the last load, reused when a cached view is refreshed
         self.logger = logging.getLogger('invoice_manager')
     
     def load_view(self, parent_frame):
         """Load the invoice view into the parent frame"""
+        from src.views.invoice_view import InvoiceView
         self.view = InvoiceView(parent_frame, self)
         self.load_invoices()
     
+    def refresh_view(self):
+        """Reload a cached view with its current filter after the data changed"""
+        self.load_invoices(self.date_filter)
+    
+    def save_in_background(self, mutation, *args, **callbacks):
+        """Run one of this controller's add/update/delete methods off the Tk thread (see run_mutation)"""
+        return run_mutation(self.db, self.view, mutation, *args, **callbacks)
+    
     def load_invoices(self, date_filter=None):
         """Load invoices from the database with optional date filter"""
         self.logger.info(f"Loading invoices with date filter: {date_filter}")
+        self.date_filter = date_filter
         
-        # Use a separate thread for database operations
+        # Run the query on the shared database worker pool
         def fetch_invoices():
             try:
-                session = self.db.get_session()
-                
-                # Base query
-                query = session.query(Invoice)
-                
-                # Apply date filter if provided
-                if date_filter:
-                    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+                with self.db.unit_of_work(read_only=True) as session:
+                    # Grid columns only, with the date filter applied if provided
+                    query = filter_by_date(invoice_rows(), date_filter)
                     
-                    if date_filter == "today":
-                        # Invoices from today
-                        query = query.filter(Invoice.date == today.strftime('%Y-%m-%d'))
-                    elif date_filter == "past_7_days":
-                        # Invoices from the past 7 days
-                        seven_days_ago = today - timedelta(days=7)
-                        query = query.filter(Invoice.date >= seven_days_ago.strftime('%Y-%m-%d'))
-                    elif date_filter == "past_30_days":
-                        # Invoices from the past 30 days
-                        thirty_days_ago = today - timedelta(days=30)
-                        query = query.filter(Invoice.date >= thirty_days_ago.strftime('%Y-%m-%d'))
-                
-                # Order by most recent first
-                query = query.order_by(Invoice.date.desc())
-                
-                # Execute query
-                invoices = query.all()
-                invoices_data = [invoice.to_dict() for invoice in invoices]
-                
-                session.close()
+                    # Order by most recent first
+                    query = query.order_by(Invoice.date.desc())
+                    
+                    # Execute query
+                    invoices_data = fetch_table(session, query, InvoiceRow)
                 
                 # Update UI in the main thread
                 self.view.after(0, lambda: self.view.display_invoices(invoices_data))
@@ -63,30 +60,28 @@ class InvoiceController:
                 self.logger.error(f"Error fetching invoices: {str(e)}")
                 self.view.after(0, lambda: self.view.show_error("Failed to load invoices"))
         
-        thread = threading.Thread(target=fetch_invoices)
-        thread.daemon = True
-        thread.start()
+        self.db.submit(fetch_invoices)
     
     def get_clients(self):
-        """Get all clients for the dropdown"""
-        try:
-            session = self.db.get_session()
-            clients = session.query(Client).order_by(Client.name).all()
-            clients_data = [{'id': client.id, 'name': client.name, 'address': client.address} for client in clients]
-            session.close()
-            return clients_data
-        except SQLAlchemyError as e:
-            self.logger.error(f"Error fetching clients: {str(e)}")
-            return []
+        """Get all clients for the dropdown, from the shared reference cache
+        
+        Returns:
+            ReferenceSet of (id, name, address) records with by_id/by_name maps
+        """
+        return reference_cache(self.db).clients()
     
-    def generate_invoice_number(self):
-        """Generate a sequential invoice number in the format INV-001"""
+    def generate_invoice_number(self, session=None):
+        """Generate a sequential invoice number in the format INV-001
+        
+        Pass an open session to also see invoices added but not yet committed in it.
+        """
         try:
-            session = self.db.get_session()
+            if session is None:
+                with self.db.unit_of_work(read_only=True) as own_session:
+                    return self.generate_invoice_number(own_session)
             
             # Get the highest invoice number
             last_invoice = session.query(Invoice).order_by(Invoice.id.desc()).first()
-            session.close()
             
             if last_invoice and last_invoice.invoice_number:
                 try:
@@ -119,28 +114,18 @@ class InvoiceController:
             invoice_data['payment_status'] = 'pending'
         
         try:
-            session = self.db.get_session()
-            
-            # Create invoice
-            new_invoice = Invoice(**invoice_data)
-            session.add(new_invoice)
-            session.flush()  # This gives us the invoice ID without committing
-            
-            # Add invoice items
-            for item_data in items_data:
-                item_data['invoice_id'] = new_invoice.id
-                item = InvoiceItem(**item_data)
-                session.add(item)
-            
-            # Calculate invoice total
-            new_invoice.calculate_total()
-            
-            session.commit()
-            invoice_id = new_invoice.id
-            session.close()
+            with self.db.unit_of_work() as session:
+                # Create invoice
+                new_invoice = Invoice(**invoice_data)
+                session.add(new_invoice)
+                session.flush()  # This gives us the invoice ID without committing
+                
+                # Add invoice items in one executemany
+                total, _ = save_line_items(session, new_invoice.id, items_data)
+                new_invoice.total_amount = total
+                invoice_id = new_invoice.id
             
             self.logger.info(f"Invoice added successfully with ID: {invoice_id}")
-            self.load_invoices()
             return True, invoice_id
         
         except SQLAlchemyError as e:
@@ -152,35 +137,26 @@ class InvoiceController:
         self.logger.info(f"Updating invoice with ID: {invoice_id}")
         
         try:
-            session = self.db.get_session()
-            invoice = session.query(Invoice).filter(Invoice.id == invoice_id).first()
-            
-            if not invoice:
-                session.close()
-                self.logger.warning(f"Invoice with ID {invoice_id} not found")
-                return False, "Invoice not found"
-            
-            # Update invoice attributes
-            for key, value in invoice_data.items():
-                setattr(invoice, key, value)
-            
-            # Delete existing items
-            session.query(InvoiceItem).filter(InvoiceItem.invoice_id == invoice_id).delete()
-            
-            # Add updated items
-            for item_data in items_data:
-                item_data['invoice_id'] = invoice_id
-                item = InvoiceItem(**item_data)
-                session.add(item)
-            
-            # Recalculate invoice total
-            invoice.calculate_total()
-            
-            session.commit()
-            session.close()
+            with self.db.unit_of_work() as session:
+                invoice = session.query(Invoice).filter(Invoice.id == invoice_id).first()
+                
+                if not invoice:
+                    self.logger.warning(f"Invoice with ID {invoice_id} not found")
+                    return False, "Invoice not found"
+                
+                # Update invoice attributes
+                for key, value in invoice_data.items():
+                    setattr(invoice, key, value)
+                
+                # Write only the line items that changed, keeping the rest in place
+                total, counts = save_line_items(session, invoice_id, items_data)
+                invoice.total_amount = total
+                self.logger.debug(
+                    f"Invoice {invoice_id} line items: {counts['updated']} updated, "
+                    f"{counts['inserted']} inserted, {counts['deleted']} deleted"
+                )
             
             self.logger.info(f"Invoice updated successfully: {invoice_id}")
-            self.load_invoices()
             return True, invoice_id
         
         except SQLAlchemyError as e:
@@ -192,58 +168,101 @@ class InvoiceController:
         self.logger.info(f"Deleting invoice with ID: {invoice_id}")
         
         try:
-            session = self.db.get_session()
-            invoice = session.query(Invoice).filter(Invoice.id == invoice_id).first()
-            
-            if not invoice:
-                session.close()
-                self.logger.warning(f"Invoice with ID {invoice_id} not found")
-                return False, "Invoice not found"
-            
-            session.delete(invoice)  # This will cascade delete invoice items
-            session.commit()
-            session.close()
+            with self.db.unit_of_work() as session:
+                invoice = session.query(Invoice).filter(Invoice.id == invoice_id).first()
+                
+                if not invoice:
+                    self.logger.warning(f"Invoice with ID {invoice_id} not found")
+                    return False, "Invoice not found"
+                
+                session.delete(invoice)  # This will cascade delete invoice items
             
             self.logger.info(f"Invoice deleted successfully: {invoice_id}")
-            self.load_invoices()
             return True, None
         
         except SQLAlchemyError as e:
             self.logger.error(f"Error deleting invoice: {str(e)}")
             return False, str(e)
     
+    def recalculate_invoices(self):
+        """Recompute every invoice total from its line items and, for invoices
+        with payments, the payment status from the amount paid
+        
+        Invoices without payments keep their status since it may have been set
+        by hand; cancelled invoices are left alone.
+        
+        Returns:
+            Tuple (success, summary dict or error message)
+        """
+        self.logger.info("Recalculating invoice totals and payment statuses")
+        summary = {'invoices': 0, 'totals_updated': 0, 'statuses_updated': 0}
+        
+        try:
+            with self.db.unit_of_work() as session:
+                invoice_ids = [invoice_id for (invoice_id,) in session.query(Invoice.id).order_by(Invoice.id)]
+                
+                for start in range(0, len(invoice_ids), BULK_LOAD_CHUNK_SIZE):
+                    chunk = invoice_ids[start:start + BULK_LOAD_CHUNK_SIZE]
+                    invoices = session.query(Invoice).options(
+                        selectinload(Invoice.items), selectinload(Invoice.payments)
+                    ).filter(Invoice.id.in_(chunk)).all()
+                    
+                    for invoice in invoices:
+                        summary['invoices'] += 1
+                        old_total = invoice.total_amount
+                        if abs(invoice.calculate_total() - (old_total or 0.0)) > 0.005:
+                            summary['totals_updated'] += 1
+                        
+                        if invoice.payments and invoice.payment_status != 'cancelled':
+                            total_payments = sum(payment.amount for payment in invoice.payments)
+                            if total_payments >= invoice.total_amount:
+                                new_status = 'completed'
+                            elif total_payments > 0:
+                                new_status = 'partial'
+                            else:
+                                new_status = 'pending'
+                            
+                            if new_status != invoice.payment_status:
+                                invoice.payment_status = new_status
+                                summary['statuses_updated'] += 1
+                    
+                    session.commit()
+                    session.expunge_all()
+            
+            self.logger.info(
+                f"Recalculated {summary['invoices']} invoices: {summary['totals_updated']} totals and "
+                f"{summary['statuses_updated']} payment statuses changed"
+            )
+            return True, summary
+        
+        except SQLAlchemyError as e:
+            self.logger.error(f"Error recalculating invoices: {str(e)}")
+            return False, str(e)
+    
     def get_invoice(self, invoice_id):
         """Get a specific invoice by ID"""
+        return self.get_invoices([invoice_id]).get(invoice_id, (None, None))
+    
+    def get_invoices(self, invoice_ids):
+        """Get invoices with their items for many IDs using the bulk loader
+        
+        Returns:
+            Dict mapping invoice ID to (invoice_data, items_data) for the IDs found
+        """
         try:
-            session = self.db.get_session()
-            invoice = session.query(Invoice).filter(Invoice.id == invoice_id).first()
-            
-            if not invoice:
-                session.close()
-                return None, None
+            with self.db.unit_of_work(read_only=True) as session:
+                details = load_invoices_with_items(session, invoice_ids)
             
-            invoice_data = invoice.to_dict()
-            items_data = [item.to_dict() for item in invoice.items]
-            
-            session.close()
-            return invoice_data, items_data
+            return details
         
         except SQLAlchemyError as e:
             self.logger.error(f"Error fetching invoice: {str(e)}")
-            return None, None
+            return {}
     
     def get_items(self):
-        """Get all items for the dropdown"""
-        try:
-            session = self.db.get_session()
-            
-            # This assumes you have an 'items' table - replace with your actual item query
-            from src.models.item_model import Item
-            items = session.query(Item).all()
-            items_data = [item.to_dict() for item in items]
-            
-            session.close()
-            return items_data
-        except SQLAlchemyError as e:
-            self.logger.error(f"Error fetching items: {str(e)}")
-            return []
+        """Get all items for the dropdown, from the shared reference cache
+        
+        Returns:
+            ItemReferenceSet of (id, item_code, name, price) records with by_id/by_code maps
+        """
+        return reference_cache(self.db).items()
@@ -3,9 +3,15 @@ import threading
 from datetime import datetime
 from sqlalchemy.exc import SQLAlchemyError
 from src.models.item_model import Item
-from src.views.item_view import ItemView
+from src.models.projections import ItemRow, item_rows, fetch_records, count_rows
+from src.utils.bulk_importer import BulkImporter
+from src.utils.change_feed import updated_row_ids
+from src.utils.mutations import run_mutation
 
 class ItemController:
+    # Tables shown by this controller's page; it is refreshed when one of them changes
+    tables = ('items',)
+    
     def __init__(self, db, main_view):
         self.db = db
         self.main_view = main_view
@@ -14,41 +20,78 @@ class ItemController:
     
     def load_view(self, parent_frame):
         """Load the item view into the parent frame"""
+        from src.views.item_view import ItemView
         self.view = ItemView(parent_frame, self)
         self.load_items()
     
+    def refresh_view(self):
+        """Reload the current page of a cached view after the data changed"""
+        self.load_items(page=self.view.current_page, per_page=self.view.per_page, search_text=self.view.search_var.get())
+    
+    def save_in_background(self, mutation, *args, **callbacks):
+        """Run one of this controller's add/update/delete methods off the Tk thread (see run_mutation)"""
+        return run_mutation(self.db, self.view, mutation, *args, **callbacks)
+    
+    def apply_changes(self, rows):
+        """Patch updated items on the visible page in place
+        
+        Returns:
+            False when the page has to be reloaded instead (inserts, deletes,
+            rows off the page, an active search or a changed sort order)
+        """
+        ids = updated_row_ids(rows, 'items')
+        if ids is None or self.view.search_var.get():
+            return False
+        shown = {record['id']: record for record in self.view.items_data}
+        if not ids <= shown.keys():
+            return False
+        if not ids:
+            return True
+        
+        def fetch_rows():
+            try:
+                with self.db.unit_of_work(read_only=True) as session:
+                    records = fetch_records(session, item_rows().where(Item.id.in_(ids)), ItemRow)
+                
+                if len(records) != len(ids) or any(record['date_added'] != shown[record['id']]['date_added'] for record in records):
+                    self.view.after(0, self.refresh_view)
+                else:
+                    self.view.after(0, lambda: self.view.update_items(records))
+            except SQLAlchemyError as e:
+                self.logger.error(f"Error fetching changed items: {str(e)}")
+                self.view.after(0, self.refresh_view)
+        
+        self.db.submit(fetch_rows)
+        return True
+    
     def load_items(self, page=1, per_page=20, search_text=""):
         """Load items from the database with pagination support"""
         self.logger.info(f"Loading items page {page}, per_page {per_page}, search '{search_text}'")
         
-        # Use a separate thread for database operations
+        # Run the query on the shared database worker pool
         def fetch_items():
             try:
-                session = self.db.get_session()
-                
-                # Base query
-                query = session.query(Item)
-                
-                # Apply search filter if provided
-                if search_text:
-                    search_text_like = f"%{search_text}%"
-                    query = query.filter(
-                        (Item.item_code.ilike(search_text_like)) |
-                        (Item.name.ilike(search_text_like))
-                    )
-                
-                # Get total count for pagination
-                total_count = query.count()
-                
-                # Apply pagination
-                query = query.order_by(Item.date_added.desc())
-                query = query.limit(per_page).offset((page - 1) * per_page)
-                
-                # Execute query
-                items = query.all()
-                items_data = [item.to_dict() for item in items]
-                
-                session.close()
+                with self.db.unit_of_work(read_only=True) as session:
+                    # Only the columns the grid shows
+                    query = item_rows()
+                    
+                    # Apply search filter if provided
+                    if search_text:
+                        search_text_like = f"%{search_text}%"
+                        query = query.filter(
+                            (Item.item_code.ilike(search_text_like)) |
+                            (Item.name.ilike(search_text_like))
+                        )
+                    
+                    # Get total count for pagination
+                    total_count = count_rows(session, query)
+                    
+                    # Apply pagination
+                    query = query.order_by(Item.date_added.desc())
+                    query = query.limit(per_page).offset((page - 1) * per_page)
+                    
+                    # Execute query
+                    items_data = fetch_records(session, query, ItemRow)
                 
                 # Update UI in the main thread
                 pagination_info = {
@@ -64,17 +107,20 @@ class ItemController:
                 self.logger.error(f"Error fetching items: {str(e)}")
                 self.view.after(0, lambda: self.view.show_error("Failed to load items"))
         
-        thread = threading.Thread(target=fetch_items)
-        thread.daemon = True
-        thread.start()
+        self.db.submit(fetch_items)
     
-    def generate_item_code(self):
-        """Generate a unique item code with TKW prefix"""
+    def generate_item_code(self, session=None):
+        """Generate a unique item code with TKW prefix
+        
+        Pass an open session to also see items added but not yet committed in it.
+        """
         try:
-            session = self.db.get_session()
+            if session is None:
+                with self.db.unit_of_work(read_only=True) as own_session:
+                    return self.generate_item_code(own_session)
+            
             # Get the highest item code
             last_item = session.query(Item).order_by(Item.id.desc()).first()
-            session.close()
             
             if last_item and last_item.item_code.startswith('TKW-'):
                 # Extract the number part
@@ -110,17 +156,14 @@ class ItemController:
             item_data['item_code'] = self.generate_item_code()
         
         try:
-            session = self.db.get_session()
-            new_item = Item(**item_data)
-            session.add(new_item)
-            session.commit()
-            session.refresh(new_item)
-            item_id = new_item.id
-            item_code = new_item.item_code
-            session.close()
+            with self.db.unit_of_work() as session:
+                new_item = Item(**item_data)
+                session.add(new_item)
+                session.flush()
+                item_id = new_item.id
+                item_code = new_item.item_code
             
             self.logger.info(f"Item added successfully with ID: {item_id}, Code: {item_code}")
-            self.load_items(page=self.view.current_page, per_page=self.view.per_page, search_text=self.view.search_var.get())
             return True, item_code
         
         except SQLAlchemyError as e:
@@ -137,23 +180,18 @@ class ItemController:
             return validation_result
         
         try:
-            session = self.db.get_session()
-            item = session.query(Item).filter(Item.id == item_id).first()
-            
-            if not item:
-                session.close()
-                self.logger.warning(f"Item with ID {item_id} not found")
-                return False, "Item not found"
-            
-            # Update item attributes
-            for key, value in item_data.items():
-                setattr(item, key, value)
-            
-            session.commit()
-            session.close()
+            with self.db.unit_of_work() as session:
+                item = session.query(Item).filter(Item.id == item_id).first()
+                
+                if not item:
+                    self.logger.warning(f"Item with ID {item_id} not found")
+                    return False, "Item not found"
+                
+                # Update item attributes
+                for key, value in item_data.items():
+                    setattr(item, key, value)
             
             self.logger.info(f"Item updated successfully: {item_id}")
-            self.load_items(page=self.view.current_page, per_page=self.view.per_page, search_text=self.view.search_var.get())
             return True, item_id
         
         except SQLAlchemyError as e:
@@ -165,39 +203,51 @@ class ItemController:
         self.logger.info(f"Deleting item with ID: {item_id}")
         
         try:
-            session = self.db.get_session()
-            item = session.query(Item).filter(Item.id == item_id).first()
-            
-            if not item:
-                session.close()
-                self.logger.warning(f"Item with ID {item_id} not found")
-                return False, "Item not found"
-            
-            session.delete(item)
-            session.commit()
-            session.close()
+            with self.db.unit_of_work() as session:
+                item = session.query(Item).filter(Item.id == item_id).first()
+                
+                if not item:
+                    self.logger.warning(f"Item with ID {item_id} not found")
+                    return False, "Item not found"
+                
+                session.delete(item)
             
             self.logger.info(f"Item deleted successfully: {item_id}")
-            self.load_items(page=self.view.current_page, per_page=self.view.per_page, search_text=self.view.search_var.get())
             return True, None
         
         except SQLAlchemyError as e:
             self.logger.error(f"Error deleting item: {str(e)}")
             return False, str(e)
     
+    def import_items(self, file_path):
+        """Import items from a CSV or Excel file in the background"""
+        self.logger.info(f"Starting item import from {file_path}")
+
+        def run_import():
+            result = self.import_items_file(file_path)
+            if self.view:
+                self.view.after(0, lambda: self.view.show_import_result(result))
+
+        thread = threading.Thread(target=run_import)
+        thread.daemon = True
+        thread.start()
+
+    def import_items_file(self, file_path):
+        """Import items synchronously and return the import summary"""
+        importer = BulkImporter(self.db)
+        try:
+            return importer.import_items(file_path, self._validate_item_data)
+        except (OSError, ValueError, ImportError, SQLAlchemyError) as e:
+            self.logger.error(f"Error importing items: {str(e)}")
+            return {'total': 0, 'imported': 0, 'failed': 0, 'errors': [], 'error_report': None,
+                    'seconds': 0.0, 'error': str(e)}
+
     def get_item(self, item_id):
         """Get a specific item by ID"""
         try:
-            session = self.db.get_session()
-            item = session.query(Item).filter(Item.id == item_id).first()
-            
-            if not item:
-                session.close()
-                return None
-            
-            item_data = item.to_dict()
-            session.close()
-            return item_data
+            with self.db.unit_of_work(read_only=True) as session:
+                item = session.query(Item).filter(Item.id == item_id).first()
+                return item.to_dict() if item else None
         
         except SQLAlchemyError as e:
             self.logger.error(f"Error fetching item: {str(e)}")
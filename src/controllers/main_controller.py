@@ -7,11 +7,14 @@ from src.controllers.payment_controller import PaymentController
 from src.controllers.item_controller import ItemController
 from src.controllers.print_controller import PrintController
 from src.controllers.dashboard_controller import DashboardController
+from src.models.reference_data import reference_cache
+from src.utils.ui_timing import LoopWatchdog
 
 class MainController:
-    def __init__(self, db):
+    def __init__(self, db, config=None):
         self.logger = logging.getLogger('invoice_manager')
         self.db = db
+        self.config = config
         
         # Set default appearance mode and theme
         ctk.set_appearance_mode("System")  # Modes: "System" (standard), "Dark", "Light"
@@ -22,6 +25,16 @@ class MainController:
         self.root.title("Invoice Manager")
         self.root.geometry("1200x700")
         
+        # Measure main loop lag so stalls show up in the log and on the Diagnostics page
+        self.watchdog = None
+        diagnostics = (self.config.get('diagnostics') if self.config else None) or {}
+        if diagnostics.get('watch_main_loop', True):
+            self.watchdog = LoopWatchdog(
+                self.root,
+                stall_ms=diagnostics.get('stall_ms', 200),
+                report_minutes=diagnostics.get('ui_report_minutes', 5)
+            )
+        
         # Initialize main view
         self.view = MainView(self.root, self)
         
@@ -31,13 +44,45 @@ class MainController:
         self.invoice_controller = InvoiceController(self.db, self.view)
         self.payment_controller = PaymentController(self.db, self.view)
         self.item_controller = ItemController(self.db, self.view)
-        self.print_controller = PrintController(self.db, self.view)
+        self.print_controller = PrintController(self.db, self.view, self.config)
+        
+        # Load the clients and items offered in invoice dialogs before the first one opens
+        self.reference_data = reference_cache(self.db)
+        self.reference_data.warm()
+        
+        # Optional local API so other counters can share this database
+        self.api_server = None
+        if self.config and (self.config.get('api') or {}).get('enabled'):
+            from src.utils.api_server import create_api_server
+            self.api_server = create_api_server(self.db, self.config.get('api'))
+            self.api_server.start()
+        
+        # Follow writes made by other stations sharing the database
+        self.change_feed = None
+        sync_config = (self.config.get('sync') if self.config else None) or {}
+        if sync_config.get('enabled', False):
+            from src.utils.change_feed import ChangeFeed
+            self.change_feed = ChangeFeed(self.db, poll_interval=sync_config.get('poll_interval_ms', 1000) / 1000.0)
+            self.change_feed.start()
         
     def run(self):
         """Start the main application loop"""
         self.logger.info("Starting main application loop")
         self.view.setup()
+        if self.watchdog:
+            self.watchdog.start()
         self.root.mainloop()
+        if self.watchdog:
+            self.watchdog.stop()
+            self.logger.info(f"UI timings ({self.watchdog.stalls} stalls):\n{self.watchdog.stats.format_report()}")
+        
+        # Let the print spooler record the state of any job it is submitting
+        self.print_controller.shutdown()
+        if self.api_server:
+            self.api_server.stop()
+        if self.change_feed:
+            self.change_feed.stop()
+        self.reference_data.close()
     
     def exit_application(self):
         """Safely exit the application"""
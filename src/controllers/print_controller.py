@@ -1,65 +1,119 @@
 import logging
 import threading
 import os
+import platform
 import tempfile
 import time  # Add the missing time import
-from datetime import datetime, timedelta
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy import and_, or_
 from src.models.invoice_model import Invoice, InvoiceItem
-from src.views.print_view import PrintView
-from src.utils.print_manager import PrintManager
+from src.models.invoice_loader import load_invoices_with_items
+from src.models.projections import InvoiceRow, invoice_rows, fetch_table, filter_by_date
+from src.utils.artifact_store import create_pdf_store
+from src.utils.config_manager import ConfigManager
+from src.utils.imposition import IMPOSITION_LAYOUTS, fits_on_sheet
+from src.utils.print_spooler import PrintSpooler
 
 class PrintController:
-    def __init__(self, db, main_view):
+    # Tables shown by this controller's page; it is refreshed when one of them changes
+    tables = ('invoices', 'invoice_items')
+    
+    def __init__(self, db, main_view, config=None):
         self.db = db
         self.main_view = main_view
         self.view = None
+        self.date_filter = None  # Filter of the last load, reused when a cached view is refreshed
         self.logger = logging.getLogger('invoice_manager')
-        self.print_manager = PrintManager()
+        self.config = config or ConfigManager()
+        
+        # Generated PDFs are kept in a managed temp directory that is cleaned in the background
+        self.artifact_store = create_pdf_store(self.config.get('storage'))
+        
+        # Print jobs go through a background spooler so the UI never waits on the printer.
+        # The PrintManager (and with it reportlab) is only loaded when something is printed.
+        self._print_manager = None
+        self._print_manager_lock = threading.Lock()
+        printing_config = self.config.get('printing') or {}
+        self.print_spooler = PrintSpooler(
+            self.db,
+            command=printing_config.get('command') or None,
+            media=printing_config.get('media') or None,
+            max_attempts=printing_config.get('max_attempts', 3),
+            max_in_flight=printing_config.get('max_in_flight', 1),
+            retry_delay=printing_config.get('retry_delay', 2.0),
+            # Windows has no lp/lpr, so the worker falls back to the shell print verbs
+            fallback_printer=(lambda pdf_path: self.print_manager.print_pdf(pdf_path))
+                if platform.system() == 'Windows' else None,
+            artifact_store=self.artifact_store
+        )
+        self.print_spooler.add_listener(self._on_print_job_update)
+        self.print_spooler.start()
+        self.artifact_store.start()
+    
+    @property
+    def print_manager(self):
+        """PrintManager, created on first use so startup does not import reportlab"""
+        with self._print_manager_lock:
+            if self._print_manager is None:
+                from src.utils.print_manager import PrintManager
+                self._print_manager = PrintManager(spooler=self.print_spooler, artifact_store=self.artifact_store)
+        return self._print_manager
     
     def load_view(self, parent_frame):
         """Load the print invoices view into the parent frame"""
+        from src.views.print_view import PrintView
         self.view = PrintView(parent_frame, self)
         self.load_invoices()
+        self.refresh_print_queue_status()
+    
+    def refresh_view(self):
+        """Reload a cached view with its current filter after the data changed"""
+        self.load_invoices(self.date_filter)
+        self.refresh_print_queue_status()
+    
+    def refresh_print_queue_status(self):
+        """Fetch print queue metrics in the background and show them in the view"""
+        def fetch_status():
+            self._show_print_queue_status(self.print_spooler.get_metrics())
+        
+        self.db.submit(fetch_status)
+    
+    def _on_print_job_update(self, job):
+        """Spooler listener, called on the spooler thread whenever a job changes status"""
+        if job['status'] == 'failed':
+            self.logger.error(f"Print job {job['id']} ({job['description']}) failed: {job['last_error']}")
+        self._show_print_queue_status(self.print_spooler.get_metrics())
+    
+    def _show_print_queue_status(self, metrics):
+        """Pass queue metrics to the view on the main thread, if the view is still open"""
+        view = self.view
+        if not view:
+            return
+        try:
+            view.after(0, lambda: view.update_print_queue_status(metrics))
+        except RuntimeError:
+            pass  # Tk is shutting down
+        except Exception as e:
+            # The view was destroyed after navigating away
+            self.logger.debug(f"Print queue status not shown: {str(e)}")
     
     def load_invoices(self, date_filter=None):
         """Load invoices from the database based on date filter"""
         self.logger.info(f"Loading invoices for printing with filter: {date_filter}")
+        self.date_filter = date_filter
         
-        # Use a separate thread for database operations
+        # Run the query on the shared database worker pool
         def fetch_invoices():
             try:
-                session = self.db.get_session()
-                
-                # Base query
-                query = session.query(Invoice)
-                
-                # Apply date filter if provided
-                if date_filter:
-                    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+                with self.db.unit_of_work(read_only=True) as session:
+                    # Grid columns only, with the date filter applied if provided
+                    query = filter_by_date(invoice_rows(), date_filter)
                     
-                    if date_filter == "today":
-                        # Invoices from today
-                        query = query.filter(Invoice.date == today.strftime('%Y-%m-%d'))
-                    elif date_filter == "past_7_days":
-                        # Invoices from the past 7 days
-                        seven_days_ago = today - timedelta(days=7)
-                        query = query.filter(Invoice.date >= seven_days_ago.strftime('%Y-%m-%d'))
-                    elif date_filter == "past_30_days":
-                        # Invoices from the past 30 days
-                        thirty_days_ago = today - timedelta(days=30)
-                        query = query.filter(Invoice.date >= thirty_days_ago.strftime('%Y-%m-%d'))
-                    # Custom date filtering can be added here if needed
-                
-                # Order by most recent first
-                query = query.order_by(Invoice.date.desc())
-                
-                # Execute query
-                invoices = query.all()
-                invoices_data = [invoice.to_dict() for invoice in invoices]
-                
-                session.close()
+                    # Order by most recent first
+                    query = query.order_by(Invoice.date.desc())
+                    
+                    # Execute query
+                    invoices_data = fetch_table(session, query, InvoiceRow)
                 
                 # Update UI in the main thread
                 self.view.after(0, lambda: self.view.display_invoices(invoices_data))
@@ -68,29 +122,27 @@ class PrintController:
                 self.logger.error(f"Error fetching invoices for printing: {str(e)}")
                 self.view.after(0, lambda: self.view.show_error("Failed to load invoices"))
         
-        thread = threading.Thread(target=fetch_invoices)
-        thread.daemon = True
-        thread.start()
+        self.db.submit(fetch_invoices)
     
     def get_invoice_details(self, invoice_id):
         """Get detailed invoice information including items"""
+        return self.get_invoices_details([invoice_id]).get(invoice_id, (None, None))
+    
+    def get_invoices_details(self, invoice_ids):
+        """Get invoices and their items for many IDs at once
+        
+        Returns:
+            Dict mapping invoice ID to (invoice_data, items_data) for the IDs found
+        """
         try:
-            session = self.db.get_session()
-            invoice = session.query(Invoice).filter(Invoice.id == invoice_id).first()
+            with self.db.unit_of_work(read_only=True) as session:
+                details = load_invoices_with_items(session, invoice_ids)
             
-            if not invoice:
-                session.close()
-                return None, None
-            
-            invoice_data = invoice.to_dict()
-            items_data = [item.to_dict() for item in invoice.items]
-            
-            session.close()
-            return invoice_data, items_data
+            return details
             
         except SQLAlchemyError as e:
             self.logger.error(f"Error fetching invoice details for printing: {str(e)}")
-            return None, None
+            return {}
     
     def print_invoice(self, invoice_id, silent=False, direct_print=True):
         """Print the selected invoice
@@ -125,7 +177,7 @@ class PrintController:
                 
                 if success:
                     if not silent:
-                        self.view.show_info(f"Invoice {invoice_data['invoice_number']} sent to printer")
+                        self.view.show_info(f"Invoice {invoice_data['invoice_number']} queued for printing")
                     return True, None
                 else:
                     if not silent:
@@ -156,11 +208,13 @@ class PrintController:
                 self.view.show_error(f"Error printing invoice: {str(e)}")
             return False, None
     
-    def print_multiple_invoices(self, invoice_ids):
+    def print_multiple_invoices(self, invoice_ids, per_sheet=None):
         """Print multiple invoices in batch by combining them into a single PDF
         
         Args:
             invoice_ids: List of invoice IDs to print
+            per_sheet: Invoices per physical sheet (1, 2 or 4); defaults to the
+                printing.invoices_per_sheet setting
             
         Returns:
             Tuple containing (success count, fail count)
@@ -169,7 +223,15 @@ class PrintController:
             self.view.show_error("No invoices selected for printing")
             return 0, 0
             
-        self.logger.info(f"Batch printing {len(invoice_ids)} invoices as one document")
+        printing_config = self.config.get('printing') or {}
+        if per_sheet is None:
+            per_sheet = printing_config.get('invoices_per_sheet', 1)
+        sheet_size = printing_config.get('sheet_size', 'A4')
+        if per_sheet > 1 and not fits_on_sheet(per_sheet, sheet_size):
+            self.logger.warning(f"{per_sheet} invoices do not fit on a {sheet_size} sheet, printing one per page")
+            per_sheet = 1
+        
+        self.logger.info(f"Batch printing {len(invoice_ids)} invoices as one document, {per_sheet} per sheet")
         
         # Show processing indicator in the UI
         self.view.show_processing_indicator(True, f"Preparing {len(invoice_ids)} invoices for printing...")
@@ -180,9 +242,10 @@ class PrintController:
             invoice_data_list = []
             failed_ids = []
             
-            # Get data for all selected invoices
+            # Get data for all selected invoices in a single bulk load
+            details = self.get_invoices_details(invoice_ids)
             for invoice_id in invoice_ids:
-                invoice_data, items_data = self.get_invoice_details(invoice_id)
+                invoice_data, items_data = details.get(invoice_id, (None, None))
                 if invoice_data and items_data:
                     invoice_data_list.append((invoice_data, items_data))
                 else:
@@ -195,7 +258,9 @@ class PrintController:
             
             # Process the batch if we have any valid invoices
             if invoice_data_list:
-                success = self.print_manager.print_multiple_invoices_as_one(invoice_data_list, logo_path)
+                success = self.print_manager.print_multiple_invoices_as_one(
+                    invoice_data_list, logo_path, per_sheet=per_sheet, sheet_size=sheet_size
+                )
                 if success:
                     success_count = len(invoice_data_list)
                     fail_count = len(failed_ids)
@@ -209,10 +274,10 @@ class PrintController:
             # Update UI when complete
             self.view.after(0, lambda: self.view.show_processing_indicator(False))
             if fail_count == 0:
-                self.view.after(0, lambda: self.view.show_info(f"Successfully sent {success_count} invoice(s) to printer"))
+                self.view.after(0, lambda: self.view.show_info(f"Successfully queued {success_count} invoice(s) for printing"))
             else:
                 self.view.after(0, lambda: self.view.show_info(
-                    f"Sent {success_count} invoice(s) to printer. Failed to print {fail_count} invoice(s)."
+                    f"Queued {success_count} invoice(s) for printing. Failed to print {fail_count} invoice(s)."
                 ))
         
         # Run the batch processing in a thread
@@ -225,3 +290,47 @@ class PrintController:
     def preview_invoice(self, invoice_id):
         """Generate and display a preview of the invoice"""
         return self.print_invoice(invoice_id, direct_print=False)[0]
+    
+    def get_sheet_layouts(self):
+        """Get the batch sheet layouts offered in the print view as (label, invoices per sheet)
+        
+        Layouts whose 100x150mm slots do not fit on the configured sheet size
+        (4 per Letter sheet) are left out.
+        """
+        sheet_size = (self.config.get('printing') or {}).get('sheet_size', 'A4')
+        layouts = [("1 per page (100x150mm)", 1)]
+        for per_sheet in sorted(IMPOSITION_LAYOUTS):
+            if fits_on_sheet(per_sheet, sheet_size):
+                layouts.append((f"{per_sheet} per {sheet_size} sheet", per_sheet))
+        return layouts
+    
+    def get_print_queue_status(self):
+        """Get print queue depth and throughput metrics for display"""
+        return self.print_spooler.get_metrics()
+    
+    def get_print_jobs(self, statuses=None, limit=100):
+        """Get recent print jobs, optionally filtered by status"""
+        return self.print_spooler.get_jobs(statuses, limit)
+    
+    def retry_failed_jobs(self):
+        """Requeue every failed print job"""
+        failed_jobs = self.print_spooler.get_jobs(statuses=['failed'], limit=1000)
+        for job in failed_jobs:
+            self.print_spooler.retry_job(job['id'])
+        self.logger.info(f"Requeued {len(failed_jobs)} failed print job(s)")
+        return len(failed_jobs)
+    
+    def get_temp_storage_stats(self):
+        """Get usage and cleanup counters of the generated PDF directory"""
+        return self.artifact_store.get_stats()
+    
+    def shutdown(self):
+        """Stop the print spooler and temp file cleanup; unfinished jobs resume on the next start"""
+        self.print_spooler.stop()
+        self.artifact_store.stop()
+        
+        stats = self.artifact_store.get_stats()
+        self.logger.info(
+            f"Temp PDF storage: {stats['files']} file(s), {stats['bytes'] / 1024:.0f} KB, "
+            f"{stats['removed_files']} removed this session"
+        )
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy.sql import func
+from src.models.database import Base
+
+# Tables whose inserts, updates and deletes are recorded by database triggers
+CHANGE_LOG_TABLES = ('clients', 'items', 'invoices', 'invoice_items', 'payments')
+
+class ChangeLog(Base):
+    """One row per changed record, written by triggers so every station sees every writer"""
+    __tablename__ = 'change_log'
+
+    id = Column(Integer, primary_key=True)  # High-water mark polled by ChangeFeed
+    table_name = Column(String(50), nullable=False)
+    row_id = Column(Integer)
+    operation = Column(String(10), nullable=False)  # insert, update, delete
+    station = Column(String(32))  # Database.station_id of the writing process, NULL if unknown
+    changed_at = Column(DateTime, server_default=func.now(), index=True)
+
+    def __repr__(self):
+        return f"<ChangeLog(id={self.id}, {self.operation} {self.table_name}#{self.row_id})>"
@@ -2,13 +2,60 @@ import logging
 import sqlite3
 import threading
 import os
-from sqlalchemy import create_engine, inspect, text
+import time
+import uuid
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import create_engine, inspect, text, event
 from sqlalchemy.orm import sessionmaker, scoped_session
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.exc import SQLAlchemyError, InvalidRequestError, TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+from src.utils.event_bus import EventBus
 
 Base = declarative_base()
 
+# Engine pool and background worker defaults, overridden by the database section of the config
+DEFAULT_POOL_OPTIONS = {
+    'pool_size': 5,
+    'max_overflow': 10,
+    'pool_timeout': 30,
+    'pool_recycle': 1800,  # Seconds; MySQL drops idle connections after wait_timeout
+    'pool_pre_ping': True,
+    'worker_threads': 4  # Threads running background loads; keep within pool_size
+}
+
+# Seconds between change_log prunes in a process that writes
+CHANGE_LOG_PRUNE_INTERVAL = 3600
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long checkouts wait for a connection"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._metrics_lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.peak_checked_out = 0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            record = super()._do_get()
+        except PoolTimeoutError:
+            with self._metrics_lock:
+                self.timeouts += 1
+            raise
+        waited = time.perf_counter() - started
+        with self._metrics_lock:
+            self.checkouts += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+            self.peak_checked_out = max(self.peak_checked_out, self.checkedout())
+        return record
+
 class Database:
     _instance = None
     _lock = threading.Lock()
@@ -20,13 +67,32 @@ class Database:
                 cls._instance.initialized = False
             return cls._instance
     
-    def __init__(self, db_uri=None):
+    def __init__(self, db_uri=None, pool_options=None):
         if not hasattr(self, 'initialized') or not self.initialized:
             self.logger = logging.getLogger('invoice_manager')
             self.db_uri = db_uri or 'sqlite:///invoice_manager.db'
+            self.pool_options = dict(DEFAULT_POOL_OPTIONS, **(pool_options or {}))
+            self._executor = None
+            self._writer = None
+            self._executor_lock = threading.Lock()
             self.engine = None
             self.session_factory = None
             self.Session = None
+            # Incremented after every commit that changed data; views compare it to skip needless reloads
+            self.data_version = 0
+            # Per-table counterparts, so a view only reloads when one of its own tables changed
+            self.table_versions = {}
+            self._version_lock = threading.Lock()
+            # Publishes {table_name: version} (and the changed rows) after every commit that changed those tables
+            self.events = EventBus()
+            # QueryProfiler once enable_profiling() is called
+            self.profiler = None
+            # Written to change_log.station by this process's connections, so ChangeFeed can skip its own writes
+            self.station_id = uuid.uuid4().hex
+            # Set by setup_change_log() when the change_log triggers exist
+            self.change_log_active = False
+            self.change_log_retention_hours = 24
+            self._next_change_log_prune = 0.0
             self.initialized = True
 
     
@@ -34,27 +100,51 @@ class Database:
         """Initialize the database connection and create tables if they don't exist"""
         try:
             self.logger.info(f"Initializing database with URI: {self.db_uri}")
-            self.engine = create_engine(self.db_uri, echo=False)
+            self.engine = create_engine(self.db_uri, echo=False, **self._engine_options())
             self.session_factory = sessionmaker(bind=self.engine)
             self.Session = scoped_session(self.session_factory)
+            self._track_changes(self.session_factory)
+            self._change_log_ready = False
+            event.listen(self.engine, 'checkout', self._tag_change_log_writes)
             
             # Import models here to avoid circular imports
             from src.models.client_model import Client
             from src.models.invoice_model import Invoice
             from src.models.payment_model import Payment
             from src.models.item_model import Item
-            
+            from src.models.print_job_model import PrintJob
+            from src.models.change_log_model import ChangeLog
+
             # Check if the database exists and has the required schema
             self._check_and_update_schema()
             
             # Create all tables if they don't exist
             Base.metadata.create_all(self.engine)
+            self._change_log_ready = True
             self.logger.info("Database initialized successfully")
             return True
         except SQLAlchemyError as e:
             self.logger.error(f"Database initialization error: {str(e)}")
             return False
     
+    def _engine_options(self):
+        """Pool arguments for create_engine from pool_options"""
+        options = self.pool_options
+        if self.db_uri.startswith('sqlite') and (':memory:' in self.db_uri or self.db_uri.rstrip('/') == 'sqlite:'):
+            # In-memory SQLite keeps one connection per thread; a queue pool would lose the data
+            return {}
+        engine_options = {
+            'poolclass': TimedQueuePool,
+            'pool_size': options['pool_size'],
+            'max_overflow': options['max_overflow'],
+            'pool_timeout': options['pool_timeout']
+        }
+        if not self.db_uri.startswith('sqlite'):
+            # Server connections go stale behind firewalls and wait_timeout; files do not
+            engine_options['pool_recycle'] = options['pool_recycle']
+            engine_options['pool_pre_ping'] = options['pool_pre_ping']
+        return engine_options
+    
     def _check_and_update_schema(self):
         """Check if database schema needs updates and apply them"""
         self.logger.info("Checking database schema for updates")
@@ -95,6 +185,235 @@ class Database:
             if 'date_added' not in columns:
                 self.logger.info("Adding date_added column to items table")
                 self._execute_sql("ALTER TABLE items ADD COLUMN date_added TIMESTAMP DEFAULT CURRENT_TIMESTAMP")
+        
+        # Line items and payments are always looked up by invoice; tables created
+        # before these columns were indexed get the index here
+        for table in ('invoice_items', 'payments'):
+            if inspector.has_table(table):
+                indexed = [index['column_names'] for index in inspector.get_indexes(table)]
+                if ['invoice_id'] not in indexed:
+                    self.logger.info(f"Adding invoice_id index to {table} table")
+                    self._execute_sql(f"CREATE INDEX ix_{table}_invoice_id ON {table} (invoice_id)")
+        
+        if inspector.has_table('change_log'):
+            columns = [col['name'] for col in inspector.get_columns('change_log')]
+            
+            # Check for missing station column (change logs created before writers were tagged)
+            if 'station' not in columns:
+                self.logger.info("Adding station column to change_log table")
+                self._execute_sql("ALTER TABLE change_log ADD COLUMN station VARCHAR(32)")
+    
+    def setup_change_log(self, enabled=False, retention_hours=24):
+        """Install the change_log triggers when sync is enabled and keep change_log pruned
+        
+        The triggers live in the shared database, so they may also have been
+        installed by another station. Wherever they exist, entries older than
+        ``retention_hours`` are pruned now and then at most hourly after this
+        process commits.
+        
+        Args:
+            enabled: The sync.enabled setting; only then are triggers installed
+            retention_hours: Age after which change_log entries are deleted
+        
+        Returns:
+            True if the change_log triggers exist
+        """
+        self.change_log_retention_hours = retention_hours
+        if enabled:
+            self._install_change_triggers()
+        self.change_log_active = self._change_triggers_exist()
+        if self.change_log_active:
+            self._next_change_log_prune = time.monotonic() + CHANGE_LOG_PRUNE_INTERVAL
+            self.prune_change_log()
+        return self.change_log_active
+    
+    def prune_change_log(self):
+        """Delete change_log entries older than change_log_retention_hours
+        
+        Returns:
+            Number of entries deleted
+        """
+        # changed_at is filled in by the database clock, so compute the cutoff there too
+        hours = int(self.change_log_retention_hours)
+        if self.engine.dialect.name == 'sqlite':
+            cutoff = f"datetime('now', '-{hours} hours')"
+        else:
+            cutoff = f"NOW() - INTERVAL {hours} HOUR"
+        try:
+            with self.engine.connect() as connection:
+                deleted = connection.execute(text(f"DELETE FROM change_log WHERE changed_at < {cutoff}")).rowcount
+                connection.commit()
+        except SQLAlchemyError as e:
+            self.logger.error(f"Error pruning change log: {str(e)}")
+            return 0
+        if deleted:
+            self.logger.info(f"Pruned {deleted} change log entries")
+        return deleted
+    
+    def _change_triggers_exist(self):
+        dialect = self.engine.dialect.name
+        if dialect == 'sqlite':
+            sql = "SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'change_log_%'"
+        elif dialect == 'mysql':
+            sql = ("SELECT COUNT(*) FROM information_schema.TRIGGERS "
+                   "WHERE TRIGGER_SCHEMA = DATABASE() AND TRIGGER_NAME LIKE 'change_log_%'")
+        else:
+            return False
+        with self.engine.connect() as connection:
+            return connection.execute(text(sql)).scalar() > 0
+    
+    def _tag_change_log_writes(self, dbapi_connection, connection_record, connection_proxy):
+        """Make change_log rows written through this connection carry station_id
+        
+        SQLite triggers cannot read per-connection state, so a TEMP trigger on
+        the connection stamps each new change_log row. On MySQL the triggers
+        read the @change_log_station session variable. Done once per pooled
+        connection, after the tables exist.
+        """
+        if not self._change_log_ready or connection_record.info.get('change_log_station'):
+            return
+        dialect = self.engine.dialect.name
+        cursor = dbapi_connection.cursor()
+        try:
+            if dialect == 'sqlite':
+                cursor.execute(
+                    "CREATE TEMP TRIGGER IF NOT EXISTS change_log_station AFTER INSERT ON change_log FOR EACH ROW "
+                    f"BEGIN UPDATE change_log SET station = '{self.station_id}' WHERE id = NEW.id; END"
+                )
+            elif dialect == 'mysql':
+                cursor.execute("SET @change_log_station = %s", (self.station_id,))
+            connection_record.info['change_log_station'] = True
+        except Exception as e:
+            self.logger.warning(f"Could not tag change log writes on this connection: {str(e)}")
+            connection_record.info['change_log_station'] = True  # Do not retry on every checkout
+        finally:
+            cursor.close()
+    
+    def _maybe_prune_change_log(self):
+        """Prune change_log on the worker pool once CHANGE_LOG_PRUNE_INTERVAL has passed"""
+        if not self.change_log_active:
+            return
+        now = time.monotonic()
+        with self._version_lock:
+            if now < self._next_change_log_prune:
+                return
+            self._next_change_log_prune = now + CHANGE_LOG_PRUNE_INTERVAL
+        self.submit(self.prune_change_log)
+    
+    def _install_change_triggers(self):
+        """Create the triggers that record every write in change_log for other stations"""
+        from src.models.change_log_model import CHANGE_LOG_TABLES
+        dialect = self.engine.dialect.name
+        if dialect not in ('sqlite', 'mysql'):
+            self.logger.warning(f"Change log triggers are not supported for {dialect} databases")
+            return
+        
+        with self.engine.connect() as connection:
+            existing = {}
+            if dialect == 'mysql':
+                existing = dict(connection.execute(text(
+                    "SELECT TRIGGER_NAME, ACTION_STATEMENT FROM information_schema.TRIGGERS "
+                    "WHERE TRIGGER_SCHEMA = DATABASE()"
+                )).all())
+            
+            for table in CHANGE_LOG_TABLES:
+                for operation, row in (('insert', 'NEW'), ('update', 'NEW'), ('delete', 'OLD')):
+                    name = f"change_log_{table}_{operation}"
+                    if '@change_log_station' in existing.get(name, ''):
+                        continue
+                    if dialect == 'sqlite':
+                        # The station is stamped by each connection's TEMP trigger (see _tag_change_log_writes)
+                        log_row = (f"INSERT INTO change_log (table_name, row_id, operation) "
+                                   f"VALUES ('{table}', {row}.id, '{operation}')")
+                        statements = [f"CREATE TRIGGER IF NOT EXISTS {name} AFTER {operation.upper()} ON {table} "
+                                      f"FOR EACH ROW BEGIN {log_row}; END"]
+                    else:
+                        log_row = (f"INSERT INTO change_log (table_name, row_id, operation, station) "
+                                   f"VALUES ('{table}', {row}.id, '{operation}', @change_log_station)")
+                        statements = [f"CREATE TRIGGER {name} AFTER {operation.upper()} ON {table} FOR EACH ROW {log_row}"]
+                        if name in existing:
+                            # Created before writers were tagged
+                            statements.insert(0, f"DROP TRIGGER {name}")
+                    try:
+                        for sql in statements:
+                            connection.execute(text(sql))
+                    except SQLAlchemyError as e:
+                        # Typically a missing TRIGGER privilege on MySQL; this station still works on its own
+                        self.logger.warning(f"Could not create change log trigger {name}: {str(e)}")
+                        return
+            connection.commit()
+    
+    def _track_changes(self, session_factory):
+        """Bump data_version and the changed tables' versions whenever a session commits
+
+        Rows touched by flushed objects and tables hit by ORM insert/update/delete
+        statements are collected on the session and published on ``events``
+        once the transaction commits. A rollback discards them.
+        """
+        def changed_rows(session):
+            return session.info.setdefault('changed_rows', set())
+
+        def mark_changed(session, flush_context):
+            rows = changed_rows(session)
+            for operation, objects in (('insert', session.new), ('update', session.dirty), ('delete', session.deleted)):
+                for obj in objects:
+                    table = getattr(obj, '__table__', None)
+                    if table is not None:
+                        rows.add((table.name, getattr(obj, 'id', None), operation))
+        
+        def on_execute(orm_execute_state):
+            # Covers session.execute(insert/update/delete) and Query.update()/delete();
+            # the affected rows are unknown, so they are reported with row_id None
+            if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+                table = getattr(orm_execute_state.statement, 'table', None)
+                if table is not None:
+                    operation = 'insert' if orm_execute_state.is_insert else 'update' if orm_execute_state.is_update else 'delete'
+                    changed_rows(orm_execute_state.session).add((table.name, None, operation))
+        
+        def on_commit(session):
+            rows = session.info.pop('changed_rows', None)
+            if rows:
+                self.publish_changes(rows)
+                self._maybe_prune_change_log()
+        
+        def on_rollback(session):
+            session.info.pop('changed_rows', None)
+        
+        def refuse_read_only_flush(session, flush_context, instances):
+            if session.info.get('read_only') and (session.new or session.dirty or session.deleted):
+                raise InvalidRequestError("Cannot write in a read-only unit of work")
+        
+        event.listen(session_factory, 'before_flush', refuse_read_only_flush)
+        event.listen(session_factory, 'after_flush', mark_changed)
+        event.listen(session_factory, 'do_orm_execute', on_execute)
+        event.listen(session_factory, 'after_commit', on_commit)
+        event.listen(session_factory, 'after_rollback', on_rollback)
+    
+    def publish_changes(self, rows):
+        """Bump the versions of the tables in ``rows`` and publish them on ``events``
+        
+        Args:
+            rows: Iterable of (table_name, row_id or None, operation) tuples
+        """
+        rows = list(rows)
+        with self._version_lock:
+            self.data_version += 1
+            changes = {}
+            for name in {table for table, _, _ in rows}:
+                self.table_versions[name] = self.table_versions.get(name, 0) + 1
+                changes[name] = self.table_versions[name]
+        self.events.publish(changes, rows)
+    
+    def get_version(self, tables=None):
+        """Return data_version, or a tuple of the given tables' versions
+        
+        Args:
+            tables: Iterable of table names (None for the global data_version)
+        """
+        with self._version_lock:
+            if tables is None:
+                return self.data_version
+            return tuple(self.table_versions.get(name, 0) for name in tables)
     
     def _execute_sql(self, sql_statement):
         """Execute a raw SQL statement"""
@@ -107,14 +426,159 @@ class Database:
             self.logger.error(f"Error executing SQL: {str(e)}")
             return False
             
+    def vacuum(self):
+        """Reclaim free space and refresh the query planner statistics
+        
+        Returns:
+            Tuple (success, message)
+        """
+        if not self.engine:
+            self.initialize()
+        
+        dialect = self.engine.dialect.name
+        self.logger.info(f"Running database maintenance ({dialect})")
+        try:
+            # VACUUM cannot run inside a transaction
+            with self.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+                if dialect == 'sqlite':
+                    connection.execute(text("VACUUM"))
+                    connection.execute(text("ANALYZE"))
+                elif dialect == 'mysql':
+                    tables = ", ".join(f"`{name}`" for name in Base.metadata.tables)
+                    connection.execute(text(f"OPTIMIZE TABLE {tables}"))
+                else:
+                    return False, f"Maintenance is not supported for {dialect} databases"
+            self.logger.info("Database maintenance completed")
+            return True, f"Vacuumed and analyzed {len(Base.metadata.tables)} tables"
+        except SQLAlchemyError as e:
+            self.logger.error(f"Error during database maintenance: {str(e)}")
+            return False, str(e)
+    
     def get_session(self):
         """Get a database session"""
         if not self.Session:
             self.initialize()
         return self.Session()
     
+    @contextmanager
+    def unit_of_work(self, read_only=False):
+        """Session for one unit of work: committed on success, rolled back on error, always closed
+        
+        The session is a fresh one from the session factory, not the thread's
+        scoped session, so it never lingers in the scoped registry and nested
+        units of work do not close each other's session. Objects loaded in it
+        are detached once the block exits; convert them (to_dict) inside.
+        
+        Args:
+            read_only: Disable autoflush, refuse to flush changes and end without
+                a commit; close() releases the transaction and leaves the loaded
+                objects readable (detached, not expired)
+        """
+        if not self.session_factory:
+            self.initialize()
+        session = self.session_factory()
+        if read_only:
+            session.autoflush = False
+            session.info['read_only'] = True
+        try:
+            yield session
+            if not read_only:
+                session.commit()
+        except BaseException:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+    
+    def submit(self, task, *args):
+        """Run ``task(*args)`` on the shared database worker pool
+        
+        Background loads reuse a fixed set of worker threads instead of starting
+        a thread (and with it a new scoped session) per load. Each worker keeps
+        its scoped session, which is closed after every task so its connection
+        goes back to the pool even when the task failed.
+        
+        Returns:
+            concurrent.futures.Future of the task's result
+        """
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.pool_options['worker_threads'], thread_name_prefix='db-worker'
+                )
+            return self._executor.submit(self._run_task, task, *args)
+    
+    def submit_write(self, task, *args):
+        """Run ``task(*args)`` on the single database writer thread
+        
+        Saves from the GUI go here instead of running on the Tk thread. One
+        thread runs them in submission order, so a delete never overtakes the
+        add it follows, and writers never wait on each other's locks.
+        
+        Returns:
+            concurrent.futures.Future of the task's result
+        """
+        with self._executor_lock:
+            if self._writer is None:
+                self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='db-writer')
+            return self._writer.submit(self._run_task, task, *args)
+    
+    def _run_task(self, task, *args):
+        try:
+            return task(*args)
+        except Exception as e:
+            self.logger.error(f"Background database task failed: {str(e)}")
+            raise
+        finally:
+            if self.Session:
+                self.Session.close()
+    
+    def get_pool_metrics(self):
+        """Connection pool usage: size, checked out, overflow and checkout wait times"""
+        pool = self.engine.pool if self.engine else None
+        if pool is None:
+            return None
+        metrics = {'pool': type(pool).__name__, 'status': pool.status()}
+        if isinstance(pool, QueuePool):
+            metrics.update({'size': pool.size(), 'checked_out': pool.checkedout(), 'overflow': pool.overflow()})
+        if isinstance(pool, TimedQueuePool):
+            with pool._metrics_lock:
+                metrics.update({
+                    'checkouts': pool.checkouts,
+                    'timeouts': pool.timeouts,
+                    'peak_checked_out': pool.peak_checked_out,
+                    'wait_ms_avg': pool.wait_total / pool.checkouts * 1000 if pool.checkouts else 0.0,
+                    'wait_ms_max': pool.wait_max * 1000
+                })
+        return metrics
+    
+    def enable_profiling(self, slow_query_ms=100, explain=True):
+        """Start recording per-statement timings on the engine (see QueryProfiler)"""
+        if self.engine is None:
+            return None
+        if self.profiler is None:
+            from src.utils.query_profiler import QueryProfiler
+            self.profiler = QueryProfiler(self.engine, slow_query_ms=slow_query_ms, explain=explain)
+            self.profiler.install()
+            self.logger.info(f"Query profiling enabled (slow query threshold {slow_query_ms} ms)")
+        return self.profiler
+    
+    def get_query_profile(self, limit=None):
+        """Statement timings recorded since profiling was enabled, or None when it is off"""
+        if self.profiler is None:
+            return None
+        return self.profiler.report(limit=limit)
+    
     def close(self):
         """Close the database connection"""
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+            if self._writer is not None:
+                # Let queued saves finish before the connections go away
+                self._writer.shutdown(wait=True)
+                self._writer = None
         if self.Session:
             self.Session.remove()
             self.logger.info("Database connection closed")
@@ -0,0 +1,35 @@
+from sqlalchemy.orm import selectinload
+from src.models.invoice_model import Invoice
+
+# Keep IN (...) lists well under the bound-parameter limits of SQLite and MySQL
+BULK_LOAD_CHUNK_SIZE = 500
+
+def load_invoices_with_items(session, invoice_ids):
+    """Load invoices and their line items for a list of IDs
+
+    Uses selectinload so each chunk of IDs costs two queries (invoices, then all
+    of their items) instead of one query per invoice plus a lazy load of its items.
+
+    Args:
+        session: Open database session
+        invoice_ids: Iterable of invoice IDs
+
+    Returns:
+        Dict mapping invoice ID to (invoice_data, items_data); IDs that do not
+        exist are left out
+    """
+    unique_ids = list(dict.fromkeys(invoice_ids))
+    details = {}
+
+    for start in range(0, len(unique_ids), BULK_LOAD_CHUNK_SIZE):
+        chunk = unique_ids[start:start + BULK_LOAD_CHUNK_SIZE]
+        invoices = (
+            session.query(Invoice)
+            .options(selectinload(Invoice.items))
+            .filter(Invoice.id.in_(chunk))
+            .all()
+        )
+        for invoice in invoices:
+            details[invoice.id] = (invoice.to_dict(), [item.to_dict() for item in invoice.items])
+
+    return details
@@ -43,7 +43,7 @@ class InvoiceItem(Base):
     __tablename__ = 'invoice_items'
     
     id = Column(Integer, primary_key=True)
-    invoice_id = Column(Integer, ForeignKey('invoices.id'), nullable=False)
+    invoice_id = Column(Integer, ForeignKey('invoices.id'), nullable=False, index=True)
     item_id = Column(Integer, nullable=False)
     description = Column(Text)
     quantity = Column(Integer, default=1)
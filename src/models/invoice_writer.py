@@ -0,0 +1,80 @@
+from sqlalchemy import select, insert, update, delete
+from src.models.invoice_model import InvoiceItem
+from src.models.invoice_loader import BULK_LOAD_CHUNK_SIZE
+
+# Columns of a line item that an edit can change
+LINE_FIELDS = ('item_id', 'description', 'quantity', 'price')
+
+def diff_line_items(existing, items_data):
+    """Work out which stored line items to update, insert and delete
+
+    Lines carrying the ``id`` of one of ``existing`` are matched to it. Lines
+    without an id then take over the remaining stored rows in order, so a
+    caller that resends the whole list without ids still updates in place.
+    Matched rows whose values did not change are left alone.
+
+    Args:
+        existing: Dict mapping line item ID to a mapping of LINE_FIELDS, in ID order
+        items_data: New lines as dicts of LINE_FIELDS, optionally with ``id``
+
+    Returns:
+        Tuple (updates, inserts, delete_ids): update dicts include ``id``, insert
+        dicts do not
+    """
+    matched = {}
+    unmatched = []
+    for line in items_data:
+        line_id = line.get('id')
+        if line_id in existing and line_id not in matched:
+            matched[line_id] = line
+        else:
+            unmatched.append(line)
+
+    leftover_ids = [line_id for line_id in existing if line_id not in matched]
+    for line_id, line in zip(leftover_ids, unmatched):
+        matched[line_id] = line
+    inserts = [{field: line.get(field) for field in LINE_FIELDS} for line in unmatched[len(leftover_ids):]]
+    delete_ids = leftover_ids[len(unmatched):]
+
+    updates = []
+    for line_id, line in matched.items():
+        values = {field: line.get(field) for field in LINE_FIELDS}
+        stored = existing[line_id]
+        if any(values[field] != stored[field] for field in LINE_FIELDS):
+            updates.append(dict(values, id=line_id))
+
+    return updates, inserts, delete_ids
+
+
+def save_line_items(session, invoice_id, items_data):
+    """Bring an invoice's stored line items in line with ``items_data``
+
+    Only changed lines are written, each kind as one executemany statement
+    (deletes in chunks of BULK_LOAD_CHUNK_SIZE IDs). Row IDs of kept lines do
+    not change.
+
+    Returns:
+        Tuple (total, counts): the invoice total of the new lines, and a dict
+        with the number of lines updated, inserted and deleted
+    """
+    existing = {
+        row.id: row._mapping
+        for row in session.execute(
+            select(InvoiceItem.id, *(getattr(InvoiceItem, field) for field in LINE_FIELDS))
+            .where(InvoiceItem.invoice_id == invoice_id)
+            .order_by(InvoiceItem.id)
+        )
+    }
+    updates, inserts, delete_ids = diff_line_items(existing, items_data)
+
+    if updates:
+        session.execute(update(InvoiceItem), updates)
+    if inserts:
+        session.execute(insert(InvoiceItem), [dict(line, invoice_id=invoice_id) for line in inserts])
+    for start in range(0, len(delete_ids), BULK_LOAD_CHUNK_SIZE):
+        chunk = delete_ids[start:start + BULK_LOAD_CHUNK_SIZE]
+        session.execute(delete(InvoiceItem).where(InvoiceItem.id.in_(chunk)))
+
+    total = sum((line.get('price') or 0.0) * (line.get('quantity') or 0) for line in items_data)
+    counts = {'updated': len(updates), 'inserted': len(inserts), 'deleted': len(delete_ids)}
+    return total, counts
@@ -7,7 +7,7 @@ class Payment(Base):
     __tablename__ = 'payments'
     
     id = Column(Integer, primary_key=True)
-    invoice_id = Column(Integer, ForeignKey('invoices.id'), nullable=False)
+    invoice_id = Column(Integer, ForeignKey('invoices.id'), nullable=False, index=True)
     amount = Column(Float, nullable=False)
     payment_date = Column(DateTime, default=func.now())
     payment_method = Column(String(50), default='cash')
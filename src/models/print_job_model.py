@@ -0,0 +1,38 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text
+from sqlalchemy.sql import func
+from src.models.database import Base
+
+class PrintJob(Base):
+    __tablename__ = 'print_jobs'
+
+    id = Column(Integer, primary_key=True)
+    pdf_path = Column(Text, nullable=False)
+    description = Column(String(200))  # e.g. "INV-001" or "Batch of 25 invoices"
+    media = Column(String(50))  # Paper size passed to lp/lpr, None for the printer default
+    status = Column(String(20), default='queued', index=True)  # queued, printing, completed, failed, cancelled
+    attempts = Column(Integer, default=0)
+    max_attempts = Column(Integer, default=3)
+    last_error = Column(Text)
+    next_attempt_at = Column(DateTime)  # Earliest time a retried job may be submitted again
+    created_at = Column(DateTime, default=func.now())
+    submitted_at = Column(DateTime)
+    completed_at = Column(DateTime)
+
+    def __repr__(self):
+        return f"<PrintJob(id={self.id}, status='{self.status}', path='{self.pdf_path}')>"
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'pdf_path': self.pdf_path,
+            'description': self.description,
+            'media': self.media,
+            'status': self.status,
+            'attempts': self.attempts,
+            'max_attempts': self.max_attempts,
+            'last_error': self.last_error,
+            'next_attempt_at': self.next_attempt_at,
+            'created_at': self.created_at,
+            'submitted_at': self.submitted_at,
+            'completed_at': self.completed_at
+        }
@@ -0,0 +1,184 @@
+"""Column projections for the list screens
+
+Grids show a handful of columns, so loading full ORM objects and calling
+to_dict() on each one wastes time and memory. A projection selects only
+those columns and returns each row as a slotted tuple record. Records
+still answer ``record['name']`` and ``record.get('name')``, so views can
+keep their dict-style access.
+
+Screens that keep a whole table in memory (invoices, payments) hold it as a
+RecordTable instead of a list: values are stored column by column, numbers
+in typed arrays and repeated values (statuses, dates, customer names)
+shared, and records are only built while iterating.
+"""
+from array import array
+from collections import namedtuple
+from datetime import datetime, timedelta
+from sqlalchemy import select, func
+from src.models.client_model import Client
+from src.models.item_model import Item
+from src.models.invoice_model import Invoice
+from src.models.payment_model import Payment
+
+
+def record_type(name, fields):
+    """Tuple record class with attribute, index and key access and no per-row __dict__"""
+    base = namedtuple(name, fields)
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        return tuple.__getitem__(self, key)
+
+    def get(self, key, default=None):
+        return getattr(self, key, default) if key in self._fields else default
+
+    def keys(self):
+        return self._fields
+
+    return type(name, (base,), {
+        '__slots__': (),
+        '__getitem__': __getitem__,
+        '__contains__': lambda self, key: key in self._fields,
+        'get': get,
+        'keys': keys,
+        'to_dict': base._asdict
+    })
+
+
+ClientRow = record_type('ClientRow', ['id', 'name', 'mobile', 'address', 'is_active'])
+ItemRow = record_type('ItemRow', ['id', 'item_code', 'name', 'price', 'date_added'])
+InvoiceRow = record_type(
+    'InvoiceRow',
+    ['id', 'invoice_number', 'date', 'customer_name', 'customer_address', 'total_amount', 'payment_status']
+)
+PaymentRow = record_type(
+    'PaymentRow',
+    ['id', 'invoice_id', 'invoice_number', 'amount', 'payment_date', 'payment_method', 'reference_number']
+)
+
+
+def client_rows():
+    return select(Client.id, Client.name, Client.mobile, Client.address, Client.is_active)
+
+
+def item_rows():
+    return select(Item.id, Item.item_code, Item.name, Item.price, Item.date_added)
+
+
+def invoice_rows():
+    return select(
+        Invoice.id, Invoice.invoice_number, Invoice.date, Invoice.customer_name,
+        Invoice.customer_address, Invoice.total_amount, Invoice.payment_status
+    )
+
+
+def payment_rows():
+    """Payments with their invoice number joined in SQL instead of a lazy load per row"""
+    return select(
+        Payment.id, Payment.invoice_id, func.coalesce(Invoice.invoice_number, 'N/A'),
+        Payment.amount, Payment.payment_date, Payment.payment_method, Payment.reference_number
+    ).outerjoin(Invoice, Payment.invoice_id == Invoice.id)
+
+
+def fetch_records(session, statement, record):
+    """Execute a projection and wrap each row in ``record``"""
+    make = record._make
+    return [make(row) for row in session.execute(statement)]
+
+
+class RecordTable:
+    """Read-only, column-oriented list of records
+
+    Iterating or indexing yields ``record`` instances built on the fly, so
+    views use it like a list of records. Integer and float columns without
+    NULLs are kept in ``array`` objects; other columns share equal values
+    between rows, so a status or date stored on 100k rows is one object.
+    """
+
+    __slots__ = ('record', 'columns', '_length')
+
+    def __init__(self, record, rows=()):
+        self.record = record
+        builders = [[] for _ in record._fields]
+        length = 0
+        for row in rows:
+            for builder, value in zip(builders, row):
+                builder.append(value)
+            length += 1
+        self.columns = tuple(self._compact(values) for values in builders)
+        self._length = length
+
+    @staticmethod
+    def _compact(values):
+        kinds = {type(value) for value in values}
+        if kinds == {int}:
+            try:
+                return array('q', values)
+            except OverflowError:
+                return values
+        if kinds == {float}:
+            return array('d', values)
+        shared = {}
+        try:
+            return [shared.setdefault(value, value) for value in values]
+        except TypeError:
+            # Unhashable values cannot be shared
+            return values
+
+    def __len__(self):
+        return self._length
+
+    def __iter__(self):
+        make = self.record._make
+        for row in zip(*self.columns):
+            yield make(row)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[position] for position in range(*index.indices(self._length))]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError(index)
+        return self.record._make(column[index] for column in self.columns)
+
+    def __repr__(self):
+        return f"<RecordTable of {self._length} {self.record.__name__}>"
+
+    def column(self, name):
+        """All values of one field, in row order"""
+        return self.columns[self.record._fields.index(name)]
+
+
+def fetch_table(session, statement, record):
+    """Execute a projection into a RecordTable, for lists a view keeps in memory"""
+    return RecordTable(record, session.execute(statement))
+
+
+def count_rows(session, statement):
+    """Row count of a projection before ordering and paging"""
+    return session.scalar(select(func.count()).select_from(statement.order_by(None).subquery()))
+
+
+def filter_by_date(statement, date_filter):
+    """Restrict an invoice query or select to the "today", "past_7_days" or "past_30_days" filter"""
+    if not date_filter:
+        return statement
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+
+    if date_filter == "today":
+        # Invoices from today
+        return statement.filter(Invoice.date == today.strftime('%Y-%m-%d'))
+    elif date_filter == "past_7_days":
+        # Invoices from the past 7 days
+        seven_days_ago = today - timedelta(days=7)
+        return statement.filter(Invoice.date >= seven_days_ago.strftime('%Y-%m-%d'))
+    elif date_filter == "past_30_days":
+        # Invoices from the past 30 days
+        thirty_days_ago = today - timedelta(days=30)
+        return statement.filter(Invoice.date >= thirty_days_ago.strftime('%Y-%m-%d'))
+    return statement
@@ -0,0 +1,211 @@
+"""Process-wide cache of the clients and items offered in invoice dialogs
+
+The invoice dialog needs every client (customer dropdown, address lookup)
+and every item (line item dropdowns). Instead of querying both tables each
+time a dialog opens, ReferenceCache keeps one immutable snapshot per table
+with prebuilt lookup maps. A snapshot is tagged with the table version it
+was loaded at (Database.get_version) and is reloaded on the worker pool
+whenever the data change bus reports a newer version.
+"""
+import logging
+import threading
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+from src.models.client_model import Client
+from src.models.item_model import Item
+from src.models.projections import record_type, fetch_records
+from src.utils.name_index import NameIndex
+
+ClientRef = record_type('ClientRef', ['id', 'name', 'address'])
+ItemRef = record_type('ItemRef', ['id', 'item_code', 'name', 'price'])
+
+# Reload attempts in get() when writes keep landing while a snapshot loads
+MAX_RELOADS = 3
+
+
+class ReferenceSet:
+    """Immutable snapshot of one reference table
+
+    Attributes:
+        version: Table version the snapshot was loaded at
+        records: Records in display order
+        by_id: id -> record
+        by_name: name -> first record with that name in display order
+        names: Distinct names in display order
+        name_index: NameIndex over names for autocomplete, built on first use
+    """
+
+    def __init__(self, version, records):
+        self.version = version
+        self.records = records
+        self.by_id = {record.id: record for record in records}
+        self.by_name = {}
+        for record in records:
+            self.by_name.setdefault(record.name, record)
+        self.names = list(self.by_name)
+        self._name_index = None
+
+    @property
+    def name_index(self):
+        if self._name_index is None:
+            self._name_index = NameIndex(name for name in self.names if name)
+        return self._name_index
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        return iter(self.records)
+
+
+class ItemReferenceSet(ReferenceSet):
+    """Items snapshot, also keyed by item code and picker label
+
+    Attributes:
+        by_code: item_code -> record
+        codes: Item codes in display order
+        by_label: "CODE - name" picker label -> record
+        name_index: NameIndex over the picker labels, so a search matches code or name
+    """
+
+    def __init__(self, version, records):
+        super().__init__(version, records)
+        self.by_code = {record.item_code: record for record in records if record.item_code}
+        self.codes = list(self.by_code)
+        self.by_label = {item_label(record): record for record in self.by_code.values()}
+
+    @property
+    def name_index(self):
+        if self._name_index is None:
+            self._name_index = NameIndex(self.by_label)
+        return self._name_index
+
+
+def item_label(item):
+    """Text shown for an item in line item pickers"""
+    return f"{item.item_code} - {item.name}" if item.name else item.item_code
+
+
+def _load_clients(session):
+    statement = select(Client.id, Client.name, Client.address).order_by(Client.name, Client.id)
+    return fetch_records(session, statement, ClientRef)
+
+
+def _load_items(session):
+    statement = select(Item.id, Item.item_code, Item.name, Item.price).order_by(Item.item_code, Item.id)
+    return fetch_records(session, statement, ItemRef)
+
+
+class ReferenceCache:
+    """Version-invalidated client and item snapshots shared by the whole process
+
+    Use ``reference_cache(db)`` to get the instance for a database. ``warm()``
+    loads both tables in the background at startup; afterwards ``clients()``
+    and ``items()`` return the current snapshot without touching the database
+    unless it changed and the background reload has not finished yet.
+    """
+
+    # dataset name -> (table it is loaded from, loader, snapshot class)
+    datasets = {
+        'clients': ('clients', _load_clients, ReferenceSet),
+        'items': ('items', _load_items, ItemReferenceSet)
+    }
+
+    def __init__(self, db):
+        self.db = db
+        self.logger = logging.getLogger('invoice_manager')
+        self._lock = threading.Lock()
+        self._snapshots = {}
+        self._pending = {}  # dataset name -> (version it was started for, future)
+        self._unsubscribe = db.events.subscribe(
+            [table for table, _, _ in self.datasets.values()], self._on_data_changed
+        )
+
+    def clients(self):
+        """Snapshot of all clients in name order"""
+        return self.get('clients')
+
+    def items(self):
+        """Snapshot of all items in item code order"""
+        return self.get('items')
+
+    def warm(self):
+        """Start loading every dataset on the worker pool"""
+        for name, (table, _, _) in self.datasets.items():
+            self._reload(name, self._table_version(table))
+
+    def get(self, name):
+        """Current snapshot of ``name``, waiting for a reload only if it is out of date"""
+        table = self.datasets[name][0]
+        snapshot = self._snapshots.get(name)
+        for _ in range(MAX_RELOADS):
+            version = self._table_version(table)
+            if snapshot is not None and snapshot.version >= version:
+                return snapshot
+            try:
+                if threading.current_thread().name.startswith('db-worker'):
+                    # Waiting on the pool from one of its own workers could deadlock it
+                    snapshot = self._load(name)
+                else:
+                    snapshot = self._reload(name, version).result()
+            except SQLAlchemyError as e:
+                self.logger.error(f"Error loading {name} reference data: {str(e)}")
+                break
+        if snapshot is None:
+            return self.datasets[name][2](0, [])
+        return snapshot
+
+    def close(self):
+        """Stop following data changes"""
+        if self._unsubscribe:
+            self._unsubscribe()
+            self._unsubscribe = None
+
+    def _table_version(self, table):
+        return self.db.get_version((table,))[0]
+
+    def _on_data_changed(self, changes):
+        for name, (table, _, _) in self.datasets.items():
+            if table in changes:
+                self._reload(name, changes[table])
+
+    def _reload(self, name, version):
+        """Future of a load that covers ``version``, starting one unless it is already running"""
+        with self._lock:
+            pending = self._pending.get(name)
+            if pending is not None and pending[0] >= version and not pending[1].done():
+                return pending[1]
+            future = self.db.submit(self._load, name)
+            self._pending[name] = (version, future)
+            return future
+
+    def _load(self, name):
+        table, load, snapshot_class = self.datasets[name]
+        # Read the version first: the rows loaded below are at least this new
+        version = self._table_version(table)
+        with self.db.unit_of_work(read_only=True) as session:
+            records = load(session)
+        snapshot = snapshot_class(version, records)
+        # Build the autocomplete index here rather than when a dialog first opens
+        snapshot.name_index
+        with self._lock:
+            current = self._snapshots.get(name)
+            if current is None or current.version <= version:
+                self._snapshots[name] = snapshot
+            else:
+                snapshot = current
+        self.logger.debug(f"Loaded {len(records)} {name} into the reference cache")
+        return snapshot
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def reference_cache(db):
+    """The process-wide ReferenceCache for ``db``"""
+    with _caches_lock:
+        cache = _caches.get(id(db))
+        if cache is None or cache.db is not db:
+            cache = _caches[id(db)] = ReferenceCache(db)
+        return cache
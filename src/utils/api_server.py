@@ -0,0 +1,596 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from urllib.parse import urlsplit, parse_qs
+from sqlalchemy import Boolean, DateTime, Float, Integer, String, func, select
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from src.models.client_model import Client
+from src.models.item_model import Item
+from src.models.invoice_model import Invoice, InvoiceItem
+from src.models.payment_model import Payment
+from src.models.invoice_loader import load_invoices_with_items
+from src.models.invoice_writer import LINE_FIELDS, save_line_items
+from src.views.null_view import NullView
+
+MAX_BODY_BYTES = 1024 * 1024
+MAX_PAGE_SIZE = 1000
+
+HTTP_REASONS = {
+    200: 'OK', 201: 'Created', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+    409: 'Conflict', 413: 'Payload Too Large', 500: 'Internal Server Error'
+}
+
+
+class ApiError(Exception):
+    """Error returned to the client as ``{"error": message}`` with an HTTP status"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class RequestBatcher:
+    """Coalesces requests that arrive within a short window into one call
+
+    ``batch_function`` receives the list of keys collected during the window
+    and runs on ``executor``; it returns one result per key, where an
+    exception instance is raised to that key's caller only.
+    """
+
+    def __init__(self, loop, executor, batch_function, window, max_size):
+        self.loop = loop
+        self.executor = executor
+        self.batch_function = batch_function
+        self.window = window
+        self.max_size = max_size
+        self.batches = 0
+        self.batched_requests = 0
+        self._pending = []
+        self._timer = None
+
+    async def submit(self, key):
+        future = self.loop.create_future()
+        self._pending.append((key, future))
+        if len(self._pending) >= self.max_size or self.window <= 0:
+            self._flush()
+        elif self._timer is None:
+            self._timer = self.loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            self.loop.create_task(self._run(batch))
+
+    async def _run(self, batch):
+        self.batches += 1
+        self.batched_requests += len(batch)
+        try:
+            results = await self.loop.run_in_executor(
+                self.executor, self.batch_function, [key for key, _ in batch]
+            )
+        except Exception as e:
+            results = [e] * len(batch)
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+class ApiServer:
+    """Local HTTP/JSON API over the invoice database
+
+    Built on a plain asyncio stream server so it needs no extra dependencies.
+    Reads run on a small thread pool (keep it within the engine pool size);
+    lookups by ID that arrive within ``batch_window`` seconds are answered by
+    one bulk query, and identical list queries in flight share one result.
+    All writes go through a single writer thread and are committed together
+    in batches, so the API never has two writers competing for the database.
+
+    Endpoints:
+        GET  /health
+        GET  /invoices?status=&limit=&offset=     GET /invoices/<id>
+        POST /invoices {"invoice": {...}, "items": [...]}
+        PATCH /invoices/<id> {"payment_status": "completed"}
+        GET  /payments?invoice_id=                POST /payments
+        GET  /clients?search=&limit=&offset=      GET /clients/<id>    POST /clients
+        GET  /items?search=&limit=&offset=        GET /items/<id>      POST /items
+    """
+
+    def __init__(self, db, host='127.0.0.1', port=8765, batch_window=0.002, max_batch_size=64, worker_threads=4):
+        self.db = db
+        self.host = host
+        self.port = port
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+        self.worker_threads = worker_threads
+        self.logger = logging.getLogger('invoice_manager')
+
+        # Controllers are only used for their validation and numbering rules
+        from src.controllers.client_controller import ClientController
+        from src.controllers.item_controller import ItemController
+        from src.controllers.invoice_controller import InvoiceController
+        self.client_controller = ClientController(db, NullView())
+        self.item_controller = ItemController(db, NullView())
+        self.invoice_controller = InvoiceController(db, NullView())
+
+        self._thread = None
+        self._loop = None
+        self._server = None
+        self._stopped = None
+        self._ready = threading.Event()
+        self._in_flight_queries = {}
+        self._metrics = {'requests': 0, 'errors': 0, 'write_commits': 0, 'write_fallbacks': 0}
+        self._started_at = None
+
+    def start(self):
+        """Serve in a background thread; returns once the port is bound"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._ready.clear()
+        self._thread = threading.Thread(target=self.serve_forever, name="api-server")
+        self._thread.daemon = True
+        self._thread.start()
+        self._ready.wait(10)
+
+    def stop(self, timeout=5.0):
+        """Stop the server started with start() or serve_forever()"""
+        if self._loop and self._stopped:
+            self._loop.call_soon_threadsafe(self._stopped.set)
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def serve_forever(self):
+        """Run the server in the calling thread until stop() is called"""
+        asyncio.run(self._serve())
+
+    def get_metrics(self):
+        metrics = dict(self._metrics)
+        elapsed = time.monotonic() - self._started_at if self._started_at else 0.0
+        metrics['uptime_seconds'] = elapsed
+        metrics['requests_per_second'] = metrics['requests'] / elapsed if elapsed > 0 else 0.0
+        for name in ('invoice', 'client', 'item', 'writer'):
+            batcher = getattr(self, f"_{name}_batcher", None)
+            if batcher:
+                metrics[f"{name}_batches"] = batcher.batches
+                metrics[f"{name}_avg_batch_size"] = batcher.batched_requests / batcher.batches if batcher.batches else 0.0
+        metrics['pool'] = self.db.get_pool_metrics()
+        if self.db.profiler:
+            metrics['queries'] = self.db.get_query_profile(limit=20)
+        return metrics
+
+    async def _serve(self):
+        if not self.db.engine:
+            self.db.initialize()
+        self._loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+
+        read_executor = ThreadPoolExecutor(max_workers=self.worker_threads, thread_name_prefix="api-read")
+        write_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="api-write")
+        self._invoice_batcher = RequestBatcher(self._loop, read_executor, self._load_invoices,
+                                               self.batch_window, self.max_batch_size)
+        self._client_batcher = RequestBatcher(self._loop, read_executor, self._load_by_id(Client),
+                                              self.batch_window, self.max_batch_size)
+        self._item_batcher = RequestBatcher(self._loop, read_executor, self._load_by_id(Item),
+                                            self.batch_window, self.max_batch_size)
+        self._writer_batcher = RequestBatcher(self._loop, write_executor, self._apply_writes,
+                                              self.batch_window, self.max_batch_size)
+        self._read_executor = read_executor
+
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]  # Resolves port 0 to the bound port
+        self._started_at = time.monotonic()
+        self.logger.info(f"API server listening on http://{self.host}:{self.port}")
+        self._ready.set()
+
+        try:
+            await self._stopped.wait()
+        finally:
+            self._server.close()
+            await self._server.wait_closed()
+            read_executor.shutdown(wait=True)
+            write_executor.shutdown(wait=True)
+            self.logger.info("API server stopped")
+
+    async def _handle_connection(self, reader, writer):
+        """Serve HTTP/1.1 requests on one connection, honouring keep-alive"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, version = request_line.decode('latin-1').split()
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get('content-length') or 0)
+                if length > MAX_BODY_BYTES:
+                    writer.write(self._response(413, {'error': "Request body too large"}, False))
+                    await writer.drain()
+                    break
+                body = await reader.readexactly(length) if length else b''
+
+                status, payload = await self._dispatch(method.upper(), target, body)
+                keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+                writer.write(self._response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _dispatch(self, method, target, body):
+        """Route one request and turn errors into JSON responses"""
+        self._metrics['requests'] += 1
+        url = urlsplit(target)
+        parts = [part for part in url.path.split('/') if part]
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+
+        try:
+            data = json.loads(body) if body else {}
+            if not parts:
+                raise ApiError(404, "Not found")
+            resource = parts[0]
+            record_id = self._parse_id(parts[1]) if len(parts) > 1 else None
+
+            if resource == 'health' and method == 'GET':
+                return 200, {'status': 'ok', 'metrics': self.get_metrics()}
+            if resource not in ('invoices', 'payments', 'clients', 'items') or len(parts) > 2:
+                raise ApiError(404, "Not found")
+
+            if method == 'GET':
+                if record_id is None:
+                    return 200, {'data': await self._list(resource, query)}
+                if resource == 'payments':
+                    raise ApiError(404, "Not found")
+                batcher = getattr(self, f"_{resource[:-1]}_batcher")
+                return 200, await batcher.submit(record_id)
+
+            if method == 'POST' and record_id is None:
+                return 201, await self._writer_batcher.submit((f"create_{resource}", None, data))
+            if method == 'PATCH' and resource == 'invoices' and record_id is not None:
+                return 200, await self._writer_batcher.submit(('update_invoice_status', record_id, data))
+            raise ApiError(405, "Method not allowed")
+
+        except ApiError as e:
+            self._metrics['errors'] += 1
+            return e.status, {'error': e.message}
+        except json.JSONDecodeError:
+            self._metrics['errors'] += 1
+            return 400, {'error': "Request body must be JSON"}
+        except SQLAlchemyError as e:
+            self._metrics['errors'] += 1
+            self.logger.error(f"API database error: {str(e)}")
+            return 500, {'error': "Database error"}
+        except Exception as e:
+            self._metrics['errors'] += 1
+            self.logger.exception(f"API error handling {method} {url.path}: {str(e)}")
+            return 500, {'error': "Internal server error"}
+
+    async def _list(self, resource, query):
+        """Run a list query, sharing the result with identical queries already in flight"""
+        key = (resource, tuple(sorted(query.items())))
+        future = self._in_flight_queries.get(key)
+        if future is None:
+            future = self._loop.run_in_executor(self._read_executor, self._query_list, resource, query)
+            self._in_flight_queries[key] = future
+            future.add_done_callback(lambda _: self._in_flight_queries.pop(key, None))
+        return await asyncio.shield(future)
+
+    def _query_list(self, resource, query):
+        try:
+            limit = min(int(query.get('limit', 100)), MAX_PAGE_SIZE)
+            offset = int(query.get('offset', 0))
+        except ValueError:
+            raise ApiError(400, "limit and offset must be integers")
+
+        session = self.db.get_session()
+        try:
+            if resource == 'invoices':
+                rows = session.query(Invoice)
+                if query.get('status'):
+                    rows = rows.filter(Invoice.payment_status == query['status'].lower())
+                rows = rows.order_by(Invoice.date.desc(), Invoice.id.desc())
+            elif resource == 'payments':
+                rows = session.query(Payment)
+                if query.get('invoice_id'):
+                    rows = rows.filter(Payment.invoice_id == self._parse_id(query['invoice_id']))
+                rows = rows.order_by(Payment.payment_date.desc())
+            elif resource == 'clients':
+                rows = session.query(Client)
+                if query.get('search'):
+                    pattern = f"%{query['search']}%"
+                    rows = rows.filter(Client.name.ilike(pattern) | Client.mobile.ilike(pattern))
+                rows = rows.order_by(Client.name)
+            else:
+                rows = session.query(Item)
+                if query.get('search'):
+                    pattern = f"%{query['search']}%"
+                    rows = rows.filter(Item.item_code.ilike(pattern) | Item.name.ilike(pattern))
+                rows = rows.order_by(Item.name)
+            return [row.to_dict() for row in rows.limit(limit).offset(offset)]
+        finally:
+            session.close()
+
+    def _load_invoices(self, invoice_ids):
+        session = self.db.get_session()
+        try:
+            details = load_invoices_with_items(session, list(dict.fromkeys(invoice_ids)))
+        finally:
+            session.close()
+        results = []
+        for invoice_id in invoice_ids:
+            if invoice_id in details:
+                invoice_data, items_data = details[invoice_id]
+                results.append(dict(invoice_data, items=items_data))
+            else:
+                results.append(ApiError(404, f"Invoice {invoice_id} not found"))
+        return results
+
+    def _load_by_id(self, model):
+        def load(record_ids):
+            session = self.db.get_session()
+            try:
+                rows = session.query(model).filter(model.id.in_(set(record_ids))).all()
+                found = {row.id: row.to_dict() for row in rows}
+            finally:
+                session.close()
+            return [
+                found.get(record_id) or ApiError(404, f"{model.__name__} {record_id} not found")
+                for record_id in record_ids
+            ]
+        return load
+
+    def _apply_writes(self, operations):
+        """Apply a batch of writes in one transaction
+
+        If the batch fails to commit, each write is retried in its own
+        transaction so one bad request cannot fail its neighbours.
+        """
+        session = self.db.get_session()
+        try:
+            results = []
+            for operation in operations:
+                try:
+                    results.append(self._apply_write(session, *operation))
+                except Exception:
+                    break
+            if len(results) == len(operations):
+                session.commit()
+                self._metrics['write_commits'] += 1
+                return [self._serialize_written(result) for result in results]
+            session.rollback()
+
+            self._metrics['write_fallbacks'] += 1
+            results = []
+            for operation in operations:
+                try:
+                    result = self._apply_write(session, *operation)
+                    session.commit()
+                    self._metrics['write_commits'] += 1
+                    results.append(self._serialize_written(result))
+                except ApiError as e:
+                    session.rollback()
+                    results.append(e)
+                except IntegrityError as e:
+                    session.rollback()
+                    self.logger.error(f"API write failed: {str(e)}")
+                    results.append(ApiError(409, "Conflicts with existing data"))
+                except SQLAlchemyError as e:
+                    session.rollback()
+                    self.logger.error(f"API write failed: {str(e)}")
+                    results.append(ApiError(500, "Database error"))
+                except Exception as e:
+                    session.rollback()
+                    self.logger.exception(f"API write failed: {str(e)}")
+                    results.append(ApiError(500, "Internal server error"))
+            return results
+        finally:
+            session.close()
+
+    def _apply_write(self, session, operation, record_id, data):
+        """Stage one write in the session and return the affected record"""
+        if not isinstance(data, dict):
+            raise ApiError(400, "Request body must be a JSON object")
+
+        if operation == 'create_clients':
+            client_data = self._columns(Client, data)
+            valid, message = self.client_controller._validate_client_data(client_data)
+            if not valid:
+                raise ApiError(400, message)
+            client = Client(**client_data)
+            session.add(client)
+            session.flush()
+            return client
+
+        if operation == 'create_items':
+            item_data = self._columns(Item, data)
+            valid, message = self.item_controller._validate_item_data(item_data)
+            if not valid:
+                raise ApiError(400, message)
+            if not item_data.get('item_code'):
+                item_data['item_code'] = self.item_controller.generate_item_code(session)
+            item = Item(**item_data)
+            session.add(item)
+            session.flush()
+            return item
+
+        if operation == 'create_invoices':
+            invoice_data = self._columns(Invoice, data.get('invoice', {}))
+            items_data = self._line_items(data.get('items', []))
+            if not invoice_data.get('customer_name') or not invoice_data.get('date'):
+                raise ApiError(400, "Invoice customer_name and date are required")
+            invoice_data.setdefault('payment_status', 'pending')
+            if not invoice_data.get('invoice_number'):
+                invoice_data['invoice_number'] = self.invoice_controller.generate_invoice_number(session)
+            invoice = Invoice(**invoice_data)
+            session.add(invoice)
+            session.flush()
+            # Same write path as InvoiceController.add_invoice
+            invoice.total_amount, _ = save_line_items(session, invoice.id, items_data)
+            session.flush()
+            return invoice
+
+        if operation == 'create_payments':
+            payment_data = self._columns(Payment, data)
+            try:
+                amount = float(payment_data.get('amount'))
+            except (TypeError, ValueError):
+                raise ApiError(400, "Payment amount must be a number")
+            if amount <= 0:
+                raise ApiError(400, "Payment amount must be positive")
+            invoice = session.get(Invoice, payment_data.get('invoice_id'))
+            if not invoice:
+                raise ApiError(404, "Invoice not found")
+            payment_data['amount'] = amount
+            payment = Payment(**payment_data)
+            session.add(payment)
+            session.flush()
+
+            # Same rule as PaymentController.add_payment. Summed in the database because
+            # invoice.payments may already be loaded by an earlier write in this batch
+            total_payments = session.scalar(
+                select(func.sum(Payment.amount)).where(Payment.invoice_id == invoice.id)
+            ) or 0.0
+            invoice.payment_status = 'completed' if total_payments >= invoice.total_amount else 'partial'
+            return payment
+
+        if operation == 'update_invoice_status':
+            status = str(data.get('payment_status', '')).lower()
+            if status not in ('pending', 'partial', 'completed', 'cancelled'):
+                raise ApiError(400, "payment_status must be pending, partial, completed or cancelled")
+            invoice = session.get(Invoice, record_id)
+            if not invoice:
+                raise ApiError(404, "Invoice not found")
+            invoice.payment_status = status
+            return invoice
+
+        raise ApiError(405, "Method not allowed")
+
+    @staticmethod
+    def _serialize_written(record):
+        return record.to_dict()
+
+    @classmethod
+    def _line_items(cls, items_data):
+        """Checked line items of a new invoice, with the same rules as the invoice dialog"""
+        if not isinstance(items_data, list) or not items_data:
+            raise ApiError(400, "Invoice needs at least one item")
+        lines = []
+        for number, item in enumerate(items_data, start=1):
+            try:
+                line = cls._columns(InvoiceItem, item)
+            except ApiError as e:
+                raise ApiError(400, f"Item {number}: {e.message}")
+            if not line.get('item_id'):
+                raise ApiError(400, f"Item {number}: item_id is required")
+            if line.get('quantity') is None or line['quantity'] <= 0:
+                raise ApiError(400, f"Item {number}: quantity must be greater than zero")
+            if line.get('price') is None or line['price'] < 0:
+                raise ApiError(400, f"Item {number}: price is required and cannot be negative")
+            lines.append({field: line.get(field) for field in LINE_FIELDS})
+        return lines
+
+    @classmethod
+    def _columns(cls, model, data):
+        """Keep only writable columns of ``model`` from a request body, converted to the column types
+
+        Null values are dropped so the column default applies.
+        """
+        if not isinstance(data, dict):
+            raise ApiError(400, "Expected a JSON object")
+        values = {}
+        for column in model.__table__.columns:
+            if column.name in ('id', 'created_at', 'updated_at') or data.get(column.name) is None:
+                continue
+            values[column.name] = cls._convert(column, data[column.name])
+        return values
+
+    @staticmethod
+    def _convert(column, value):
+        """Check a JSON value against a column type; raises ApiError(400) if it does not fit"""
+        if isinstance(column.type, String):
+            if not isinstance(value, str):
+                raise ApiError(400, f"{column.name} must be a string")
+            return value
+        if isinstance(column.type, Boolean):
+            if not isinstance(value, bool):
+                raise ApiError(400, f"{column.name} must be true or false")
+            return value
+        if isinstance(column.type, (Integer, Float)):
+            try:
+                if isinstance(value, bool):
+                    raise ValueError(value)
+                number = float(value)
+            except (TypeError, ValueError):
+                raise ApiError(400, f"{column.name} must be a number")
+            if number != number or number in (float('inf'), float('-inf')):
+                raise ApiError(400, f"{column.name} must be a number")
+            if isinstance(column.type, Integer):
+                if not number.is_integer():
+                    raise ApiError(400, f"{column.name} must be a whole number")
+                return int(number)
+            return number
+        if isinstance(column.type, DateTime):
+            try:
+                return datetime.fromisoformat(value)
+            except (TypeError, ValueError):
+                raise ApiError(400, f"{column.name} must be an ISO date")
+        return value
+
+    @staticmethod
+    def _parse_id(value):
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            raise ApiError(400, f"Invalid ID: {value}")
+
+    @staticmethod
+    def _response(status, payload, keep_alive):
+        body = json.dumps(payload, default=_json_default).encode('utf-8')
+        head = (
+            f"HTTP/1.1 {status} {HTTP_REASONS.get(status, '')}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        return head.encode('latin-1') + body
+
+
+def create_api_server(db, api_config=None, host=None, port=None):
+    """Build an ApiServer from the ``api`` config section"""
+    api_config = api_config or {}
+    return ApiServer(
+        db,
+        host=host or api_config.get('host', '127.0.0.1'),
+        port=port if port is not None else api_config.get('port', 8765),
+        batch_window=api_config.get('batch_window_ms', 2) / 1000.0,
+        max_batch_size=api_config.get('max_batch_size', 64),
+        worker_threads=api_config.get('worker_threads', 4)
+    )
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
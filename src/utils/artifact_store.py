@@ -0,0 +1,211 @@
+import os
+import logging
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+class ArtifactStore:
+    """Managed directory for generated files such as invoice PDFs.
+
+    Files are deleted once they are older than ``max_age_seconds`` or, oldest
+    first, when the directory grows past ``max_bytes``. Files handed to the
+    print spooler are reference counted and never deleted while in use, and
+    freshly created files get a short grace period so they survive until the
+    caller has had a chance to print or open them.
+    """
+
+    def __init__(self, root, max_bytes=500 * 1024 * 1024, max_age_seconds=72 * 3600,
+                 cleanup_interval=600, min_age_seconds=300):
+        """
+        Args:
+            root: Directory holding the managed files (created if missing)
+            max_bytes: Size quota for the directory
+            max_age_seconds: Files older than this are removed
+            cleanup_interval: Seconds between background cleanups
+            min_age_seconds: Grace period before a new, unreferenced file may be removed
+        """
+        self.logger = logging.getLogger('invoice_manager')
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.cleanup_interval = cleanup_interval
+        self.min_age_seconds = min_age_seconds
+        os.makedirs(self.root, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._refs = {}  # normalized path -> reference count
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._stats = {
+            'cleanups': 0,
+            'removed_files': 0,
+            'removed_bytes': 0,
+            'last_cleanup': None,
+            'last_cleanup_seconds': 0.0
+        }
+
+    def start(self):
+        """Start periodic background cleanup (runs one cleanup immediately)"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="artifact-cleanup")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self, timeout=5.0):
+        """Stop the background cleanup thread"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def new_path(self, prefix, suffix='.pdf'):
+        """Return an unused file path in the store, e.g. invoice_INV_001_20250405_101500.pdf"""
+        base = f"{prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        path = os.path.join(self.root, f"{base}{suffix}")
+        counter = 1
+        while os.path.exists(path):
+            path = os.path.join(self.root, f"{base}_{counter}{suffix}")
+            counter += 1
+        return path
+
+    def acquire(self, path):
+        """Mark a file as in use so cleanup leaves it alone"""
+        key = self._key(path)
+        with self._lock:
+            self._refs[key] = self._refs.get(key, 0) + 1
+
+    def release(self, path):
+        """Drop one reference taken with acquire()"""
+        key = self._key(path)
+        with self._lock:
+            count = self._refs.get(key, 0) - 1
+            if count > 0:
+                self._refs[key] = count
+            else:
+                self._refs.pop(key, None)
+
+    def in_use(self, path):
+        """Check whether a file currently has references"""
+        with self._lock:
+            return self._key(path) in self._refs
+
+    def discard(self, path):
+        """Delete a file right away unless it is in use"""
+        if self.in_use(path) or not self._is_managed(path):
+            return False
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except OSError:
+            return False
+        with self._lock:
+            self._stats['removed_files'] += 1
+            self._stats['removed_bytes'] += size
+        return True
+
+    def cleanup(self):
+        """Apply the age and size quotas
+
+        Returns:
+            Dict with the number of files and bytes removed
+        """
+        started = time.perf_counter()
+        now = time.time()
+        entries = self._scan()
+
+        removed_files = 0
+        removed_bytes = 0
+        total_bytes = sum(size for _, size, _ in entries)
+
+        # Oldest first so the size quota removes the least recently created files
+        for mtime, size, path in sorted(entries):
+            age = now - mtime
+            over_age = age > self.max_age_seconds
+            over_size = total_bytes > self.max_bytes
+            if not over_age and not over_size:
+                break
+            if age < self.min_age_seconds or self.in_use(path):
+                continue
+            try:
+                os.remove(path)
+            except OSError as e:
+                self.logger.warning(f"Could not remove temporary file {path}: {str(e)}")
+                continue
+            removed_files += 1
+            removed_bytes += size
+            total_bytes -= size
+
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._stats['cleanups'] += 1
+            self._stats['removed_files'] += removed_files
+            self._stats['removed_bytes'] += removed_bytes
+            self._stats['last_cleanup'] = datetime.now()
+            self._stats['last_cleanup_seconds'] = elapsed
+
+        if removed_files:
+            self.logger.info(
+                f"Removed {removed_files} temporary file(s) ({removed_bytes / 1024:.0f} KB) from {self.root}"
+            )
+        return {'removed_files': removed_files, 'removed_bytes': removed_bytes}
+
+    def get_stats(self):
+        """Get current usage and cleanup counters for diagnostics"""
+        entries = self._scan()
+        with self._lock:
+            stats = dict(self._stats)
+            stats['in_use'] = len(self._refs)
+        stats['root'] = self.root
+        stats['files'] = len(entries)
+        stats['bytes'] = sum(size for _, size, _ in entries)
+        stats['max_bytes'] = self.max_bytes
+        stats['max_age_seconds'] = self.max_age_seconds
+        stats['oldest_file_age_seconds'] = time.time() - min(mtime for mtime, _, _ in entries) if entries else 0.0
+        return stats
+
+    def _run(self):
+        """Background loop running cleanup every cleanup_interval seconds"""
+        while not self._stop_event.is_set():
+            try:
+                self.cleanup()
+            except Exception as e:
+                self.logger.error(f"Temporary file cleanup failed: {str(e)}")
+            self._stop_event.wait(self.cleanup_interval)
+
+    def _scan(self):
+        """List (mtime, size, path) for every regular file in the store"""
+        entries = []
+        try:
+            with os.scandir(self.root) as iterator:
+                for entry in iterator:
+                    try:
+                        if entry.is_file(follow_symlinks=False):
+                            stat = entry.stat(follow_symlinks=False)
+                            entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    except OSError:
+                        continue  # Removed while scanning
+        except OSError as e:
+            self.logger.error(f"Could not scan {self.root}: {str(e)}")
+        return entries
+
+    def _is_managed(self, path):
+        """Only ever delete files inside the store's directory"""
+        return os.path.dirname(self._key(path)) == self._key(self.root)
+
+    @staticmethod
+    def _key(path):
+        return os.path.normcase(os.path.abspath(path))
+
+
+def create_pdf_store(storage_config=None):
+    """Build the store for generated invoice PDFs from the ``storage`` config section"""
+    storage_config = storage_config or {}
+    return ArtifactStore(
+        os.path.join(tempfile.gettempdir(), 'invoice_manager'),
+        max_bytes=int(storage_config.get('temp_max_mb', 500) * 1024 * 1024),
+        max_age_seconds=storage_config.get('temp_max_age_hours', 72) * 3600,
+        cleanup_interval=storage_config.get('cleanup_interval_minutes', 10) * 60
+    )
@@ -0,0 +1,313 @@
+import csv
+import os
+import logging
+import time
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
+
+# Rows read from the source file per chunk
+IMPORT_CHUNK_SIZE = 1000
+# Rows sent to the database per executemany batch
+IMPORT_BATCH_SIZE = 500
+
+# Alternative column headers accepted in import files
+HEADER_ALIASES = {
+    'phone': 'mobile',
+    'mobile_number': 'mobile',
+    'customer': 'name',
+    'customer_name': 'name',
+    'client_name': 'name',
+    'code': 'item_code',
+    'item_name': 'name',
+    'description': 'name',
+    'unit_price': 'price',
+}
+
+CLIENT_FIELDS = {
+    'name': str, 'mobile': str, 'address': str, 'company': str, 'email': str,
+    'city': str, 'state': str, 'postal_code': str, 'country': str,
+    'payment_terms': int, 'credit_limit': float, 'notes': str, 'is_active': bool
+}
+
+ITEM_FIELDS = {'item_code': str, 'name': str, 'price': float}
+
+
+class BulkImporter:
+    """Stream clients or items from CSV/Excel files into the database
+
+    CSV and .xlsx files are read in chunks so large catalogs never sit in
+    memory at once; legacy .xls workbooks are loaded whole.
+    Every row is checked with the same validation function the add dialogs
+    use, valid rows are written with executemany batches and rejected rows
+    are collected into a per-row error report.
+    """
+
+    def __init__(self, db, chunk_size=IMPORT_CHUNK_SIZE, batch_size=IMPORT_BATCH_SIZE):
+        self.db = db
+        self.chunk_size = chunk_size
+        self.batch_size = batch_size
+        self.logger = logging.getLogger('invoice_manager')
+
+    def import_clients(self, file_path, validator, progress_callback=None):
+        """Import clients from a CSV or Excel file
+
+        Args:
+            file_path: Path to a .csv, .xlsx or .xls file with a header row
+            validator: Callable returning (ok, message), e.g. ClientController._validate_client_data
+            progress_callback: Optional callable receiving the number of rows processed so far
+
+        Returns:
+            Dict with total, imported and failed row counts, the (row, error)
+            list, the error report path (None when every row was imported)
+            and the elapsed seconds
+        """
+        from src.models.client_model import Client
+        return self._import(file_path, Client, CLIENT_FIELDS, validator, None, progress_callback)
+
+    def import_items(self, file_path, validator, code_prefix='TKW-', progress_callback=None):
+        """Import items from a CSV or Excel file
+
+        Rows without an item code get the next free code in the TKW-001
+        sequence; codes already in the database or repeated in the file are
+        reported as errors.
+        """
+        from src.models.item_model import Item
+
+        session = self.db.get_session()
+        try:
+            existing_codes = {code for (code,) in session.query(Item.item_code)}
+        finally:
+            session.close()
+
+        next_number = 1
+        for code in existing_codes:
+            if code and code.startswith(code_prefix):
+                try:
+                    next_number = max(next_number, int(code[len(code_prefix):]) + 1)
+                except ValueError:
+                    continue
+
+        state = {'next_number': next_number}
+
+        def assign_code(row):
+            code = row.get('item_code')
+            if code:
+                if code in existing_codes:
+                    return f"Item code {code} already exists"
+            else:
+                code = f"{code_prefix}{state['next_number']:03d}"
+                while code in existing_codes:
+                    state['next_number'] += 1
+                    code = f"{code_prefix}{state['next_number']:03d}"
+                state['next_number'] += 1
+                row['item_code'] = code
+            existing_codes.add(code)
+            return None
+
+        return self._import(file_path, Item, ITEM_FIELDS, validator, assign_code, progress_callback)
+
+    def _import(self, file_path, model, fields, validator, prepare_row, progress_callback):
+        """Read, validate and insert all rows of a file"""
+        started = time.perf_counter()
+        total = 0
+        imported = 0
+        errors = []  # (row_number, message, raw row)
+
+        self.logger.info(f"Importing {model.__tablename__} from {file_path}")
+
+        for chunk in self.read_chunks(file_path):
+            valid_rows = []
+            for row_number, raw in chunk:
+                total += 1
+                row = {key: raw[key] for key in fields if raw.get(key, '') != ''}
+
+                ok, message = validator(row)
+                if ok:
+                    message = prepare_row(row) if prepare_row else None
+                if message:
+                    errors.append((row_number, message.replace("\n", "; "), raw))
+                    continue
+
+                try:
+                    valid_rows.append((row_number, raw, self._convert(row, fields)))
+                except ValueError as e:
+                    errors.append((row_number, str(e), raw))
+
+            imported += self._insert(model, valid_rows, errors)
+
+            if progress_callback:
+                progress_callback(total)
+
+        error_report = self._write_error_report(file_path, errors) if errors else None
+        elapsed = time.perf_counter() - started
+
+        self.logger.info(
+            f"Imported {imported} of {total} {model.__tablename__} row(s) in {elapsed:.2f}s, {len(errors)} rejected"
+        )
+        return {
+            'total': total,
+            'imported': imported,
+            'failed': len(errors),
+            'errors': [(row_number, message) for row_number, message, _ in errors],
+            'error_report': error_report,
+            'seconds': elapsed
+        }
+
+    def _insert(self, model, valid_rows, errors):
+        """Insert validated rows in executemany batches, one transaction per batch"""
+        imported = 0
+        session = self.db.get_session()
+        try:
+            for start in range(0, len(valid_rows), self.batch_size):
+                batch = valid_rows[start:start + self.batch_size]
+                try:
+                    # ORM bulk insert: executemany speed, and unlike bulk_insert_mappings it
+                    # goes through do_orm_execute so the change is published on commit
+                    session.execute(insert(model), [mapping for _, _, mapping in batch])
+                    session.commit()
+                    imported += len(batch)
+                except SQLAlchemyError as e:
+                    session.rollback()
+                    self.logger.error(f"Error importing {model.__tablename__} batch: {str(e)}")
+                    message = f"Database error: {str(e).splitlines()[0]}"
+                    errors.extend((row_number, message, raw) for row_number, raw, _ in batch)
+        finally:
+            session.close()
+        return imported
+
+    def read_chunks(self, file_path):
+        """Yield lists of (row_number, row) with normalized headers and string values
+
+        Row numbers match the spreadsheet, so the header is row 1.
+        """
+        extension = os.path.splitext(file_path)[1].lower()
+        if extension in ('.xlsx', '.xls'):
+            yield from self._read_excel_chunks(file_path)
+        else:
+            yield from self._read_csv_chunks(file_path)
+
+    def _read_csv_chunks(self, file_path):
+        with open(file_path, newline='', encoding='utf-8-sig') as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if not header:
+                return
+            keys = [self._normalize_header(column) for column in header]
+
+            chunk = []
+            for row_number, values in enumerate(reader, start=2):
+                if not any(value.strip() for value in values):
+                    continue
+                chunk.append((row_number, {key: value.strip() for key, value in zip(keys, values)}))
+                if len(chunk) >= self.chunk_size:
+                    yield chunk
+                    chunk = []
+            if chunk:
+                yield chunk
+
+    def _read_excel_chunks(self, file_path):
+        if os.path.splitext(file_path)[1].lower() == '.xls':
+            yield from self._read_xls_chunks(file_path)
+            return
+
+        # openpyxl is only needed for spreadsheets, so it is imported on demand
+        from openpyxl import load_workbook
+
+        # Read-only mode parses the sheet row by row instead of loading the whole workbook
+        workbook = load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = next(rows, None)
+            if not header:
+                return
+            keys = [self._normalize_header(column) if column is not None else None for column in header]
+
+            chunk = []
+            for row_number, values in enumerate(rows, start=2):
+                row = {key: self._cell_to_text(value) for key, value in zip(keys, values) if key is not None}
+                if not any(row.values()):
+                    continue
+                chunk.append((row_number, row))
+                if len(chunk) >= self.chunk_size:
+                    yield chunk
+                    chunk = []
+            if chunk:
+                yield chunk
+        finally:
+            workbook.close()
+
+    def _read_xls_chunks(self, file_path):
+        """Legacy .xls workbooks cannot be streamed, so pandas reads them whole"""
+        import pandas as pd
+
+        frame = pd.read_excel(file_path, dtype=object)
+        keys = [self._normalize_header(column) for column in frame.columns]
+
+        chunk = []
+        for offset, values in enumerate(frame.itertuples(index=False, name=None)):
+            row = {key: self._cell_to_text(value) for key, value in zip(keys, values)}
+            if not any(row.values()):
+                continue
+            chunk.append((offset + 2, row))
+            if len(chunk) >= self.chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def _write_error_report(self, file_path, errors):
+        """Write rejected rows with their error next to the source file"""
+        base = os.path.splitext(file_path)[0]
+        report_path = f"{base}_errors.csv"
+
+        columns = []
+        for _, _, raw in errors:
+            for key in raw:
+                if key not in columns:
+                    columns.append(key)
+
+        try:
+            with open(report_path, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                writer.writerow(['row', 'error'] + columns)
+                for row_number, message, raw in sorted(errors, key=lambda error: error[0]):
+                    writer.writerow([row_number, message] + [raw.get(key, '') for key in columns])
+        except OSError as e:
+            self.logger.error(f"Could not write import error report {report_path}: {str(e)}")
+            return None
+
+        self.logger.info(f"Import error report written to {report_path}")
+        return report_path
+
+    @staticmethod
+    def _convert(row, fields):
+        """Turn validated string values into column values, empty cells fall back to the column defaults"""
+        mapping = {}
+        for key, value in row.items():
+            field_type = fields[key]
+            try:
+                if field_type is bool:
+                    mapping[key] = value.lower() in ('1', 'true', 'yes', 'y', 'active')
+                elif field_type is int:
+                    mapping[key] = int(float(value))
+                elif field_type is float:
+                    mapping[key] = float(value)
+                else:
+                    mapping[key] = value
+            except ValueError:
+                raise ValueError(f"{key.replace('_', ' ').capitalize()} must be a valid number")
+        return mapping
+
+    @staticmethod
+    def _normalize_header(column):
+        key = str(column).strip().lower().replace(' ', '_').replace('-', '_')
+        return HEADER_ALIASES.get(key, key)
+
+    @staticmethod
+    def _cell_to_text(value):
+        if value is None or value != value:  # None or NaN
+            return ''
+        if isinstance(value, float) and value.is_integer():
+            # Mobile numbers and codes read from spreadsheets often come back as floats
+            return str(int(value))
+        return str(value).strip()
@@ -0,0 +1,189 @@
+import logging
+import threading
+import time
+from sqlalchemy import bindparam, text
+from sqlalchemy.exc import SQLAlchemyError
+
+CHANGE_FEED_BATCH_SIZE = 1000  # change_log rows read per poll
+CHANGE_FEED_GAP_TIMEOUT = 60.0  # Seconds a skipped change_log id is re-read before it counts as rolled back
+CHANGE_FEED_MAX_GAPS = 10000  # Oldest skipped ids are dropped past this many
+
+class ChangeFeed:
+    """Delivers other stations' writes from the change_log table to this process
+
+    Triggers installed by Database.setup_change_log record every insert,
+    update and delete in change_log. A background thread polls it by
+    high-water mark (id > last seen id) and publishes the new rows through
+    ``Database.publish_changes``, so open views get the same row-level
+    deltas as for local commits. On SQLite a poll first checks ``PRAGMA
+    data_version`` on its own connection and skips the query when no other
+    connection has committed since. Entries stamped with this process's
+    ``Database.station_id`` were already published when they were committed,
+    bulk statements included, and are skipped.
+
+    On MySQL, concurrent transactions can commit change_log ids out of
+    order, so an id below the high-water mark may still appear later. Ids
+    the mark skipped over are re-read on every poll until they show up or
+    CHANGE_FEED_GAP_TIMEOUT passes (the transaction rolled back).
+    """
+
+    def __init__(self, db, poll_interval=1.0, batch_size=CHANGE_FEED_BATCH_SIZE):
+        self.db = db
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.logger = logging.getLogger('invoice_manager')
+
+        self.high_water_mark = 0
+        self._gaps = {}  # Skipped change_log id -> monotonic time it was first missed
+        self._connection = None
+        self._data_version = None
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._metrics = {
+            'polls': 0, 'skipped_polls': 0, 'rows_delivered': 0, 'rows_skipped_local': 0,
+            'late_rows': 0, 'expired_gaps': 0, 'errors': 0
+        }
+
+    def start(self):
+        """Start polling from the current end of change_log"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._connection = self.db.engine.connect()
+        self.high_water_mark = self._connection.execute(
+            text("SELECT COALESCE(MAX(id), 0) FROM change_log")
+        ).scalar()
+        self._connection.rollback()
+        self._gaps.clear()
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='change-feed')
+        self._thread.daemon = True
+        self._thread.start()
+        self.logger.info(f"Change feed started at change_log id {self.high_water_mark}")
+
+    def stop(self):
+        """Stop polling and release the feed's connection"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=self.poll_interval + 5)
+            self._thread = None
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def get_metrics(self):
+        metrics = dict(self._metrics)
+        metrics['high_water_mark'] = self.high_water_mark
+        metrics['open_gaps'] = len(self._gaps)
+        return metrics
+
+    def poll(self):
+        """Read change_log past the high-water mark and publish it
+
+        Returns:
+            Number of rows delivered to subscribers
+        """
+        self._metrics['polls'] += 1
+        if not self._other_writers_committed():
+            self._metrics['skipped_polls'] += 1
+            return 0
+
+        delivered = self._publish(self._read_gaps())
+        while True:
+            entries = self._connection.execute(
+                text("SELECT id, table_name, row_id, operation, station FROM change_log "
+                     "WHERE id > :last_id ORDER BY id LIMIT :limit"),
+                {'last_id': self.high_water_mark, 'limit': self.batch_size}
+            ).all()
+            # End the read transaction so the connection holds no snapshot or lock between polls
+            self._connection.rollback()
+            if not entries:
+                break
+
+            self._track_gaps(entries)
+            self.high_water_mark = entries[-1].id
+            delivered += self._publish(entries)
+            if len(entries) < self.batch_size:
+                break
+
+        self._metrics['rows_delivered'] += delivered
+        return delivered
+
+    def _publish(self, entries):
+        """Publish change_log entries written by other stations; returns the number of rows published"""
+        remote = [entry for entry in entries if entry.station != self.db.station_id]
+        self._metrics['rows_skipped_local'] += len(entries) - len(remote)
+        rows = list(dict.fromkeys((entry.table_name, entry.row_id, entry.operation) for entry in remote))
+        if rows:
+            self.db.publish_changes(rows)
+        return len(rows)
+
+    def _track_gaps(self, entries):
+        """Remember ids between the high-water mark and ``entries`` (in id order) that were not there"""
+        now = time.monotonic()
+        previous = self.high_water_mark
+        for entry in entries:
+            for missing in range(previous + 1, min(entry.id, previous + 1 + CHANGE_FEED_MAX_GAPS)):
+                self._gaps[missing] = now
+            previous = entry.id
+        while len(self._gaps) > CHANGE_FEED_MAX_GAPS:
+            del self._gaps[min(self._gaps)]
+            self._metrics['expired_gaps'] += 1
+
+    def _read_gaps(self):
+        """Entries that have since been committed under skipped ids; expired gaps are given up"""
+        if not self._gaps:
+            return []
+        cutoff = time.monotonic() - CHANGE_FEED_GAP_TIMEOUT
+        for missing in [missing for missing, missed_at in self._gaps.items() if missed_at < cutoff]:
+            del self._gaps[missing]
+            self._metrics['expired_gaps'] += 1
+
+        entries = []
+        gaps = sorted(self._gaps)
+        for start in range(0, len(gaps), self.batch_size):
+            entries.extend(self._connection.execute(
+                text("SELECT id, table_name, row_id, operation, station FROM change_log "
+                     "WHERE id IN :ids ORDER BY id").bindparams(bindparam('ids', expanding=True)),
+                {'ids': gaps[start:start + self.batch_size]}
+            ).all())
+        self._connection.rollback()
+        for entry in entries:
+            del self._gaps[entry.id]
+        self._metrics['late_rows'] += len(entries)
+        return entries
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                self.poll()
+            except SQLAlchemyError as e:
+                self._metrics['errors'] += 1
+                self.logger.error(f"Change feed poll failed: {str(e)}")
+                self._connection.rollback()
+            self._stop_event.wait(self.poll_interval)
+
+    def _other_writers_committed(self):
+        """Cheap pre-check: False when SQLite reports no commit by another connection"""
+        if self.db.engine.dialect.name != 'sqlite':
+            return True
+        version = self._connection.execute(text("PRAGMA data_version")).scalar()
+        self._connection.rollback()
+        changed = version != self._data_version
+        self._data_version = version
+        return changed
+
+
+def updated_row_ids(rows, table):
+    """IDs of ``table`` rows that were updated, or None when rows were inserted, deleted or are unknown
+
+    Views use this to decide between patching rows in place and reloading the page.
+    """
+    ids = set()
+    for table_name, row_id, operation in rows:
+        if table_name != table:
+            continue
+        if operation != 'update' or row_id is None:
+            return None
+        ids.add(row_id)
+    return ids
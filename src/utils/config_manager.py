@@ -24,11 +24,18 @@ class ConfigManager:
                 'port': 3306,
                 'name': 'invoice_manager',
                 'user': 'root',
-                'password': ''
+                'password': '',
+                'pool_size': 5,  # Connections kept open by the engine
+                'max_overflow': 10,  # Extra connections allowed under load
+                'pool_timeout': 30,  # Seconds to wait for a free connection
+                'pool_recycle': 1800,  # Seconds before a server connection is reopened
+                'pool_pre_ping': True,
+                'worker_threads': 4  # Background load threads sharing the pool
             },
             'appearance': {
                 'theme': 'blue',
-                'mode': 'system'
+                'mode': 'system',
+                'view_cache_size': 0  # Pages kept alive between sidebar clicks, 0 for no limit
             },
             'business': {
                 'name': 'Your Business',
@@ -45,6 +52,43 @@ class ConfigManager:
                 'due_days': 30,
                 'tax_rate': 0.0,
                 'default_commission_rate': 0.0
+            },
+            'printing': {
+                'command': '',  # Empty uses lp on Linux, lpr on macOS
+                'media': 'Custom.100x150mm',
+                'max_attempts': 3,
+                'max_in_flight': 1,
+                'retry_delay': 2.0,
+                'invoices_per_sheet': 1,  # 1 = one 100x150mm page per invoice, 2 or 4 = tiled on sheet_size
+                'sheet_size': 'A4'
+            },
+            'storage': {
+                'temp_max_mb': 500,  # Size quota for generated PDFs
+                'temp_max_age_hours': 72,
+                'cleanup_interval_minutes': 10
+            },
+            'api': {
+                'enabled': False,  # Start the local HTTP/JSON API together with the GUI
+                'host': '127.0.0.1',
+                'port': 8765,
+                'batch_window_ms': 2,  # How long requests wait to be batched with others
+                'max_batch_size': 64,
+                'worker_threads': 4
+            },
+            'sync': {
+                # Follow other stations' writes through the change_log table. Off by default: the triggers
+                # add a change_log write to every insert, update and delete, bulk imports included
+                'enabled': False,
+                'poll_interval_ms': 1000,
+                'retention_hours': 24  # change_log entries older than this are pruned
+            },
+            'diagnostics': {
+                'profile_queries': False,  # Time every SQL statement (small overhead per query)
+                'slow_query_ms': 100,  # Log statements at least this slow, with their query plan
+                'explain_slow_queries': True,
+                'watch_main_loop': True,  # Heartbeat that logs Tk main loop stalls
+                'stall_ms': 200,  # Main loop lag logged as a stall
+                'ui_report_minutes': 5  # How often UI timings are summarized in the log, 0 for never
             }
         }
         
@@ -119,6 +163,28 @@ class ConfigManager:
             # Default to SQLite
             return "sqlite:///invoice_manager.db"
     
+    def get_pool_options(self):
+        """Get connection pool and worker settings for Database"""
+        db_config = self.config['database']
+        keys = ('pool_size', 'max_overflow', 'pool_timeout', 'pool_recycle', 'pool_pre_ping', 'worker_threads')
+        return {key: db_config[key] for key in keys if key in db_config}
+    
+    def get_sync_options(self):
+        """Get Database.setup_change_log arguments from the sync section"""
+        sync = self.config['sync']
+        return {
+            'enabled': sync.get('enabled', False),
+            'retention_hours': sync.get('retention_hours', 24)
+        }
+    
+    def get_profiler_options(self):
+        """Get Database.enable_profiling arguments from the diagnostics section"""
+        diagnostics = self.config['diagnostics']
+        return {
+            'slow_query_ms': diagnostics.get('slow_query_ms', 100),
+            'explain': diagnostics.get('explain_slow_queries', True)
+        }
+    
     def _update_dict_recursive(self, d, u):
         """Update dictionary recursively"""
         for k, v in u.items():
@@ -0,0 +1,301 @@
+"""Deterministic synthetic data for load testing
+
+DatasetGenerator writes a new SQLite database with the application schema
+and fills clients, items, invoices, invoice_items and payments with
+plausible data at any scale. The same seed and end date always produce the
+same database.
+
+Distributions:
+- a few regular customers place most invoices, and a few best-selling items
+  make up most line items;
+- most invoices have 1-5 lines, with a long tail of up to 200 lines;
+- invoice volume grows over the covered years;
+- invoices from the last 30 days are mostly pending or partially paid, older
+  ones are mostly completed, and some are cancelled;
+- completed invoices are paid in one to three installments, partial ones to
+  20-80% of their total;
+- clients and items were added during the year before the first invoice,
+  and payments are stamped with their payment date.
+
+Rows go in through executemany on the raw connection with journaling off,
+because the file is new and can simply be deleted if the run fails. The
+change_log triggers are not created here; Database.setup_change_log() adds them
+the first time the application opens the file.
+"""
+import os
+import time
+import random
+import logging
+from datetime import date, datetime, timedelta
+from itertools import accumulate
+from sqlalchemy import create_engine
+from src.models.database import Base
+
+# Invoices generated and written per batch
+GENERATE_CHUNK_SIZE = 20000
+
+# Days of history covered, ending at end_date
+HISTORY_DAYS = 3 * 365
+
+# Clients and items are added during this many days before the first invoice
+SETUP_DAYS = 365
+
+# (line count, weight): mostly short invoices, a long tail of large orders
+LINE_COUNT_WEIGHTS = (
+    [(1, 30), (2, 22), (3, 15), (4, 10), (5, 7)]
+    + [(count, 2.6) for count in range(6, 11)]
+    + [(count, 0.0625) for count in range(11, 51)]
+    + [(count, 0.0033) for count in range(51, 201)]
+)
+QUANTITY_WEIGHTS = [(1, 55), (2, 20), (3, 10), (4, 5), (5, 4), (10, 3), (12, 2), (24, 1)]
+
+# (status, weight) for invoices older than 30 days and for recent ones
+STATUS_WEIGHTS = [('completed', 85), ('partial', 5), ('pending', 5), ('cancelled', 5)]
+RECENT_STATUS_WEIGHTS = [('pending', 45), ('partial', 20), ('completed', 30), ('cancelled', 5)]
+INSTALLMENT_WEIGHTS = [(1, 80), (2, 15), (3, 5)]
+
+MODES_OF_PAYMENT = ["Gcash", "Bank Transfer", "Cash on Delivery"]
+PAYMENT_METHODS = ['cash', 'bank_transfer', 'gcash', 'credit_card', 'check']
+
+FIRST_NAMES = [
+    "Juan", "Maria", "Jose", "Ana", "Pedro", "Rosa", "Carlos", "Elena", "Miguel", "Liza",
+    "Ramon", "Teresa", "Antonio", "Carmen", "Roberto", "Luz", "Fernando", "Grace", "Manuel", "Joy",
+    "Ricardo", "Cristina", "Eduardo", "Angelica", "Francisco", "Marites", "Rogelio", "Jocelyn", "Danilo", "Maricel"
+]
+LAST_NAMES = [
+    "Santos", "Reyes", "Cruz", "Bautista", "Ocampo", "Garcia", "Mendoza", "Torres", "Tomas", "Andrada",
+    "Castillo", "Flores", "Villanueva", "Ramos", "Castro", "Rivera", "Aquino", "Navarro", "Salazar", "Mercado",
+    "Dizon", "Lansangan", "Manalo", "Pineda", "Gomez", "David", "Yabut", "Sicat", "Mallari", "Tiglao"
+]
+BUSINESS_KINDS = ["Trading", "Sari-Sari Store", "Hardware", "Enterprises", "Bakery", "Pharmacy", "Grocery", "Supply"]
+STREETS = ["Rizal Street", "Mabini Street", "Bonifacio Avenue", "Luna Street", "MacArthur Highway", "Del Pilar Street"]
+TOWNS = ["San Fernando", "Angeles City", "Mexico", "Guagua", "Lubao", "Bacolor", "Porac", "Santa Rita", "Apalit"]
+PRODUCTS = [
+    "Rice", "Sugar", "Cooking Oil", "Soy Sauce", "Vinegar", "Canned Sardines", "Corned Beef", "Instant Noodles",
+    "Coffee", "Powdered Milk", "Laundry Soap", "Dishwashing Liquid", "Shampoo", "Toothpaste", "Bath Soap",
+    "Bottled Water", "Softdrinks", "Biscuits", "Bread Flour", "Eggs", "Paper Towels", "Tissue", "Batteries",
+    "Light Bulb", "Electrical Tape", "Nails", "Paint", "PVC Pipe", "Cement", "Plywood"
+]
+VARIANTS = ["Small", "Medium", "Large", "1kg", "5kg", "25kg", "Pack of 6", "Pack of 12", "Box", "Case",
+            "Premium", "Economy", "Family Size", "Refill", "Bundle"]
+
+
+def _weighted(pairs):
+    """(values, cumulative weights) for random.choices"""
+    values, weights = zip(*pairs)
+    return list(values), list(accumulate(weights))
+
+
+class DatasetGenerator:
+    """Synthetic invoice data at a given scale
+
+    Args:
+        invoices: Number of invoices to generate
+        clients: Number of clients (default: one per 20 invoices, at least 100)
+        items: Number of catalog items (default: one per 50 invoices, between 50 and 20000)
+        seed: Random seed; the same seed and end date give the same database
+        end_date: Date of the newest invoice (default: today)
+    """
+
+    def __init__(self, invoices, clients=None, items=None, seed=42, end_date=None):
+        self.invoices = invoices
+        self.clients = clients or max(100, invoices // 20)
+        self.items = items or min(20000, max(50, invoices // 50))
+        self.seed = seed
+        self.end_date = end_date or date.today()
+        self.logger = logging.getLogger('invoice_manager')
+
+    def write(self, path, overwrite=False, progress_callback=None):
+        """Create the database file at ``path`` and fill it
+
+        Args:
+            path: SQLite file to create
+            overwrite: Replace ``path`` if it already exists
+            progress_callback: Optional callable receiving the number of invoices written so far
+
+        Returns:
+            Dict with the row count of every table and the seconds taken
+        """
+        if os.path.exists(path):
+            if not overwrite:
+                raise FileExistsError(f"{path} already exists")
+            os.remove(path)
+
+        started = time.perf_counter()
+        engine = create_engine(f"sqlite:///{os.path.abspath(path)}")
+        # Register every model on Base before creating the schema
+        from src.models.client_model import Client
+        from src.models.invoice_model import Invoice
+        from src.models.payment_model import Payment
+        from src.models.item_model import Item
+        from src.models.print_job_model import PrintJob
+        from src.models.change_log_model import ChangeLog
+        Base.metadata.create_all(engine)
+
+        connection = engine.raw_connection()
+        try:
+            cursor = connection.cursor()
+            for pragma in ("journal_mode = OFF", "synchronous = OFF", "temp_store = MEMORY", "cache_size = -200000"):
+                cursor.execute(f"PRAGMA {pragma}")
+
+            rng = random.Random(self.seed)
+            clients = self._write_clients(cursor, rng)
+            items = self._write_items(cursor, rng)
+            counts = {'clients': len(clients), 'items': len(items), 'invoices': 0, 'invoice_items': 0, 'payments': 0}
+            for first in range(0, self.invoices, GENERATE_CHUNK_SIZE):
+                last = min(first + GENERATE_CHUNK_SIZE, self.invoices)
+                lines, payments = self._write_invoices(cursor, rng, first + 1, last, clients, items,
+                                                       counts['invoice_items'], counts['payments'])
+                counts['invoices'] = last
+                counts['invoice_items'] += lines
+                counts['payments'] += payments
+                if progress_callback:
+                    progress_callback(last)
+            connection.commit()
+        finally:
+            connection.close()
+            engine.dispose()
+
+        counts['seconds'] = time.perf_counter() - started
+        self.logger.info(f"Generated {counts['invoices']} invoices in {path} in {counts['seconds']:.1f}s")
+        return counts
+
+    def _write_clients(self, cursor, rng):
+        """Insert the clients; returns (name, address) per client"""
+        clients = []
+        for number in range(self.clients):
+            last_name = LAST_NAMES[number % len(LAST_NAMES)]
+            if rng.random() < 0.3:
+                name = f"{last_name} {rng.choice(BUSINESS_KINDS)}"
+            else:
+                name = f"{FIRST_NAMES[(number // len(LAST_NAMES)) % len(FIRST_NAMES)]} {last_name}"
+            repeat = number // (len(FIRST_NAMES) * len(LAST_NAMES))
+            if repeat:
+                # Keep names distinct once every first and last name pair is used
+                name = f"{name} {chr(ord('A') + repeat % 26)}{repeat // 26 or ''}"
+            address = f"{rng.randint(1, 999)} {rng.choice(STREETS)}, {rng.choice(TOWNS)}, Pampanga"
+            clients.append((name, address))
+
+        added = self._setup_timestamps('clients', len(clients))
+        cursor.executemany(
+            "INSERT INTO clients (id, name, mobile, address, payment_terms, credit_limit, is_active, "
+            "created_at, updated_at) VALUES (?, ?, ?, ?, 30, 0.0, 1, ?, ?)",
+            ((number, name, f"09{rng.randint(100000000, 999999999)}", address, added[number - 1], added[number - 1])
+             for number, (name, address) in enumerate(clients, start=1))
+        )
+        return clients
+
+    def _write_items(self, cursor, rng):
+        """Insert the catalog; returns (id, name, price) per item"""
+        items = []
+        for number in range(1, self.items + 1):
+            product = PRODUCTS[(number - 1) % len(PRODUCTS)]
+            variant = VARIANTS[((number - 1) // len(PRODUCTS)) % len(VARIANTS)]
+            model = (number - 1) // (len(PRODUCTS) * len(VARIANTS))
+            name = f"{product} {variant}" + (f" #{model + 1}" if model else "")
+            price = round(rng.lognormvariate(5.3, 0.9), 2)
+            items.append((number, name, price))
+
+        added = self._setup_timestamps('items', len(items))
+        cursor.executemany(
+            "INSERT INTO items (id, item_code, name, price, date_added, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            ((number, f"TKW-{number:03d}", name, price, added[number - 1], added[number - 1], added[number - 1])
+             for number, name, price in items)
+        )
+        return items
+
+    def _setup_timestamps(self, table, count):
+        """Ascending creation times within SETUP_DAYS before the first invoice, one per row
+
+        Drawn from their own seeded generator so adding them does not change
+        any other generated value.
+        """
+        rng = random.Random(f"{self.seed}-{table}")
+        first_invoice = datetime.combine(self.end_date - timedelta(days=HISTORY_DAYS), datetime.min.time())
+        offsets = sorted(rng.randrange(SETUP_DAYS * 24 * 60) for _ in range(count))
+        return [str(first_invoice - timedelta(minutes=SETUP_DAYS * 24 * 60 - offset)) for offset in offsets]
+
+    def _write_invoices(self, cursor, rng, first, last, clients, items, line_offset, payment_offset):
+        """Insert invoices ``first``..``last`` with their lines and payments"""
+        total_invoices = self.invoices
+        client_count = len(clients)
+        item_count = len(items)
+        random_value = rng.random
+        line_counts, line_weights = _weighted(LINE_COUNT_WEIGHTS)
+        quantities, quantity_weights = _weighted(QUANTITY_WEIGHTS)
+        statuses, status_weights = _weighted(STATUS_WEIGHTS)
+        recent_statuses, recent_weights = _weighted(RECENT_STATUS_WEIGHTS)
+        installment_counts, installment_weights = _weighted(INSTALLMENT_WEIGHTS)
+
+        count = last - first + 1
+        invoice_lines = rng.choices(line_counts, cum_weights=line_weights, k=count)
+        line_quantities = iter(rng.choices(quantities, cum_weights=quantity_weights, k=sum(invoice_lines)))
+        start = self.end_date - timedelta(days=HISTORY_DAYS)
+
+        invoice_rows = []
+        line_rows = []
+        payment_rows = []
+        line_id = line_offset
+        payment_id = payment_offset
+        for number, lines in zip(range(first, last + 1), invoice_lines):
+            # Volume grows over time: later invoices are spread over fewer days
+            day = int(HISTORY_DAYS * (number / total_invoices) ** 0.7)
+            invoice_date = start + timedelta(days=day)
+            age = HISTORY_DAYS - day
+
+            # Regular customers and best sellers come up far more often than the rest
+            name, address = clients[int(client_count * random_value() ** 3)]
+
+            total = 0.0
+            for _ in range(lines):
+                item_id, description, price = items[int(item_count * random_value() ** 2)]
+                quantity = next(line_quantities)
+                line_id += 1
+                line_rows.append((line_id, number, item_id, description, quantity, price))
+                total += price * quantity
+            total = round(total, 2)
+
+            if age <= 30:
+                status = rng.choices(recent_statuses, cum_weights=recent_weights)[0]
+            else:
+                status = rng.choices(statuses, cum_weights=status_weights)[0]
+            invoice_rows.append((number, f"INV-{number:03d}", invoice_date.isoformat(), name, address, total,
+                                 MODES_OF_PAYMENT[number % len(MODES_OF_PAYMENT)], status))
+
+            if status == 'completed':
+                installments = rng.choices(installment_counts, cum_weights=installment_weights)[0]
+                paid = total
+            elif status == 'partial':
+                installments = 1 + (random_value() < 0.3)
+                paid = round(total * (0.2 + 0.6 * random_value()), 2)
+            else:
+                continue
+            remaining = paid
+            for installment in range(installments):
+                amount = remaining if installment == installments - 1 else round(paid / installments, 2)
+                remaining = round(remaining - amount, 2)
+                paid_on = min(invoice_date + timedelta(days=rng.randint(0, 30) * (installment + 1)), self.end_date)
+                paid_at = datetime(paid_on.year, paid_on.month, paid_on.day, rng.randint(8, 17), rng.randint(0, 59))
+                method = PAYMENT_METHODS[int(len(PAYMENT_METHODS) * random_value() ** 1.5)]
+                payment_id += 1
+                paid_at = str(paid_at)
+                payment_rows.append((payment_id, number, amount, paid_at, method,
+                                     None if method == 'cash' else f"REF-{payment_id:08d}", paid_at, paid_at))
+
+        cursor.executemany(
+            "INSERT INTO invoices (id, invoice_number, date, customer_name, customer_address, total_amount, "
+            "mode_of_payment, payment_status) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            invoice_rows
+        )
+        cursor.executemany(
+            "INSERT INTO invoice_items (id, invoice_id, item_id, description, quantity, price) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            line_rows
+        )
+        cursor.executemany(
+            "INSERT INTO payments (id, invoice_id, amount, payment_date, payment_method, reference_number, "
+            "created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            payment_rows
+        )
+        return len(line_rows), len(payment_rows)
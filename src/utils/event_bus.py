@@ -0,0 +1,52 @@
+import logging
+import threading
+
+class EventBus:
+    """In-process publish/subscribe for data changes
+
+    Database publishes ``{table_name: new_version}`` after every commit that
+    changed data, together with the changed rows as (table_name, row_id,
+    operation) tuples (row_id is None when a bulk statement hit unknown rows).
+    Subscribers register for the tables they display and are called on the
+    committing thread, so GUI subscribers must hand the work to Tk with
+    ``after()`` themselves.
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger('invoice_manager')
+        self._lock = threading.Lock()
+        self._subscribers = []  # (tables or None for all, callback, wants rows)
+
+    def subscribe(self, tables, callback, rows=False):
+        """Call ``callback(changes)`` when any of ``tables`` changes (None for every table)
+
+        With ``rows`` set the callback is called as ``callback(changes, rows)``
+        with the changed rows of the subscribed tables.
+
+        Returns:
+            Function that removes the subscription
+        """
+        entry = (frozenset(tables) if tables is not None else None, callback, rows)
+        with self._lock:
+            self._subscribers.append(entry)
+
+        def unsubscribe():
+            with self._lock:
+                if entry in self._subscribers:
+                    self._subscribers.remove(entry)
+        return unsubscribe
+
+    def publish(self, changes, rows=()):
+        """Notify subscribers of ``{table_name: version}`` changes and the changed rows"""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for tables, callback, wants_rows in subscribers:
+            if tables is not None and tables.isdisjoint(changes):
+                continue
+            try:
+                if wants_rows:
+                    callback(changes, [row for row in rows if tables is None or row[0] in tables])
+                else:
+                    callback(changes)
+            except Exception as e:
+                self.logger.error(f"Data change subscriber failed: {str(e)}")
@@ -0,0 +1,24 @@
+"""Sheet geometry for imposition mode (several invoices per A4/Letter sheet)
+
+Kept free of reportlab so the print view can list the layouts that fit
+without loading it; PrintManager converts these sizes to points.
+"""
+
+# Thermal invoice page and its margins, in millimetres
+INVOICE_PAGE_MM = (100, 150)
+INVOICE_MARGIN_MM = 2
+
+# Sheets for imposition mode in millimetres, and the (columns, rows) grid used for each invoices-per-sheet count
+SHEET_SIZES_MM = {'A4': (210, 297), 'Letter': (215.9, 279.4)}
+IMPOSITION_LAYOUTS = {2: (2, 1), 4: (2, 2)}
+
+
+def fits_on_sheet(per_sheet, sheet_size):
+    """True when ``per_sheet`` invoices, margins excluded, each fit in their slot of a ``sheet_size`` sheet"""
+    if sheet_size not in SHEET_SIZES_MM or per_sheet not in IMPOSITION_LAYOUTS:
+        return False
+    sheet_width, sheet_height = SHEET_SIZES_MM[sheet_size]
+    columns, rows = IMPOSITION_LAYOUTS[per_sheet]
+    frame_width = INVOICE_PAGE_MM[0] - 2 * INVOICE_MARGIN_MM
+    frame_height = INVOICE_PAGE_MM[1] - 2 * INVOICE_MARGIN_MM
+    return frame_width <= sheet_width / columns and frame_height <= sheet_height / rows
@@ -3,8 +3,12 @@ import os
 from datetime import datetime
 from pathlib import Path
 
-def setup_logger():
-    """Set up the application logger"""
+def setup_logger(console_level=logging.INFO):
+    """Set up the application logger
+    
+    Args:
+        console_level: Minimum level echoed to the console (the log file always gets DEBUG)
+    """
     # Create logs directory if it doesn't exist
     logs_dir = Path.cwd() / 'logs'
     logs_dir.mkdir(exist_ok=True)
@@ -23,7 +27,7 @@ def setup_logger():
     
     # Create a console handler
     console_handler = logging.StreamHandler()
-    console_handler.setLevel(logging.INFO)
+    console_handler.setLevel(console_level)
     
     # Create a formatter
     formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
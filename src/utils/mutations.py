@@ -0,0 +1,99 @@
+import logging
+
+logger = logging.getLogger('invoice_manager')
+
+def run_mutation(db, view, mutation, *args, optimistic=None, on_success=None, on_failure=None):
+    """Run a controller mutation on the database writer thread and report back on the Tk thread
+
+    ``optimistic`` is called right away on the calling (Tk) thread to show the
+    expected result in the view and returns a function that undoes it, or
+    None. ``mutation(*args)`` then runs on ``db.submit_write`` and returns the
+    controllers' usual ``(success, result)`` tuple. When it finishes,
+    ``on_success(result)`` or the undo function followed by
+    ``on_failure(message)`` runs on the Tk thread. The data change bus
+    refreshes the page with the committed rows, which replaces the optimistic
+    ones.
+
+    Returns:
+        concurrent.futures.Future of the mutation's (success, result)
+    """
+    undo = optimistic() if optimistic else None
+
+    def finished(future):
+        try:
+            success, result = future.result()
+        except Exception as e:
+            success, result = False, str(e)
+
+        def report():
+            if success:
+                if on_success:
+                    on_success(result)
+                return
+            if undo:
+                undo()
+            if on_failure:
+                on_failure(result)
+
+        try:
+            view.after(0, report)
+        except RuntimeError:
+            pass  # Tk is shutting down
+        except Exception as e:
+            # The view was destroyed after navigating away
+            logger.debug(f"Save result not shown: {str(e)}")
+
+    future = db.submit_write(mutation, *args)
+    future.add_done_callback(finished)
+    return future
+
+
+def optimistic_insert(tree, values, index=0):
+    """Show a not yet saved row in a Treeview; returns the function that removes it"""
+    tree.tag_configure('unsaved', foreground='gray')
+    iid = tree.insert("", index, values=values, tags=('unsaved',))
+
+    def undo():
+        if tree.exists(iid):
+            tree.delete(iid)
+    return undo
+
+
+def optimistic_update(tree, iid, values, tags=None):
+    """Show new values (and tags) for a row until the save is confirmed; returns the function that restores them"""
+    previous = tree.item(iid)
+    tree.item(iid, values=values, tags=previous['tags'] if tags is None else tags)
+
+    def undo():
+        if tree.exists(iid):
+            tree.item(iid, values=previous['values'], tags=previous['tags'])
+    return undo
+
+
+def optimistic_delete(tree, iid):
+    """Remove a row being deleted; returns the function that puts it back where it was"""
+    index = tree.index(iid)
+    item = tree.item(iid)
+    tree.delete(iid)
+
+    def undo():
+        tree.insert("", index, values=item['values'], tags=item['tags'])
+    return undo
+
+
+def find_row(tree, record_id, hint=None):
+    """Row of a Treeview whose first column shows ``record_id``, or None if it is not listed
+
+    ``hint`` is the row that showed the record before a modal dialog; a data
+    change refresh while the dialog was open may have replaced or removed it.
+    """
+    def shows_record(iid):
+        values = tree.item(iid, "values")
+        return bool(values) and str(values[0]) == str(record_id)
+
+    if hint is not None and tree.exists(hint) and shows_record(hint):
+        return hint
+    for iid in tree.get_children():
+        if shows_record(iid):
+            return iid
+    return None
@@ -0,0 +1,71 @@
+from array import array
+from bisect import bisect_left
+
+# Suggestions shown in a dropdown at a time
+AUTOCOMPLETE_LIMIT = 50
+
+class NameIndex:
+    """Case-insensitive prefix and substring lookup over a fixed list of names
+
+    Names are kept sorted by their lowercase form, so prefix matches are a
+    bisect plus a short forward walk. Substring matches use a trigram index:
+    every lowercase name is listed under each three-character slice it
+    contains, and a query only checks the names listed under its rarest
+    trigram. Results come back in name order with prefix matches first and
+    stop at ``limit``, so the cost of a keystroke does not grow with the
+    number of names that match.
+    """
+
+    def __init__(self, names):
+        ordered = sorted(set(names), key=lambda name: (name.lower(), name))
+        self.names = ordered
+        self.keys = [name.lower() for name in ordered]
+
+        postings = {}
+        for position, key in enumerate(self.keys):
+            for gram in {key[start:start + 3] for start in range(len(key) - 2)}:
+                postings.setdefault(gram, []).append(position)
+        self.trigrams = {gram: array('I', positions) for gram, positions in postings.items()}
+
+    def __len__(self):
+        return len(self.names)
+
+    def prefix(self, text, limit=AUTOCOMPLETE_LIMIT):
+        """Names starting with ``text``, in name order"""
+        return [self.names[position] for position in self._prefix_positions(text.lower(), limit)]
+
+    def search(self, text, limit=AUTOCOMPLETE_LIMIT):
+        """Names containing ``text``: prefix matches first, then the rest, both in name order"""
+        key = text.lower()
+        if not key:
+            return self.names[:limit]
+
+        found = self._prefix_positions(key, limit)
+        if len(found) < limit:
+            seen = set(found)
+            for position in self._substring_positions(key):
+                if position not in seen:
+                    found.append(position)
+                    if len(found) >= limit:
+                        break
+        return [self.names[position] for position in found]
+
+    def _prefix_positions(self, key, limit):
+        positions = []
+        position = bisect_left(self.keys, key)
+        while position < len(self.keys) and len(positions) < limit and self.keys[position].startswith(key):
+            positions.append(position)
+            position += 1
+        return positions
+
+    def _substring_positions(self, key):
+        """Positions of names containing ``key``, in name order"""
+        if len(key) < 3:
+            # Too short for a trigram; scan, the caller stops at its limit
+            candidates = range(len(self.keys))
+        else:
+            grams = {key[start:start + 3] for start in range(len(key) - 2)}
+            rarest = min((self.trigrams.get(gram, ()) for gram in grams), key=len)
+            candidates = rarest
+        keys = self.keys
+        return (position for position in candidates if key in keys[position])
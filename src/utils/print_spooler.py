@@ -0,0 +1,436 @@
+import os
+import shlex
+import logging
+import platform
+import threading
+import subprocess
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import func
+from sqlalchemy.exc import SQLAlchemyError
+from src.models.print_job_model import PrintJob
+
+class PrintSpooler:
+    """Background print queue backed by the print_jobs table.
+
+    Jobs are persisted so a crash or restart does not lose them. A single worker
+    thread submits jobs to lp/lpr with non-blocking subprocesses, keeping at most
+    ``max_in_flight`` commands running so the queue drains at the printer's rate.
+    Failed submissions are retried with exponential backoff.
+    """
+
+    ACTIVE_STATUSES = ('queued', 'printing')
+
+    def __init__(self, db, command=None, media=None, max_attempts=3, max_in_flight=1,
+                 retry_delay=2.0, poll_interval=0.5, fallback_printer=None, artifact_store=None):
+        """
+        Args:
+            db: Database instance holding the print_jobs table
+            command: Print command as a string or list (defaults to lp on Linux, lpr on macOS)
+            media: Default paper size passed as ``-o media=...``
+            max_attempts: Number of submissions before a job is marked failed
+            max_in_flight: Maximum number of print commands running at once
+            retry_delay: Base delay in seconds before a failed job is retried
+            poll_interval: Seconds the worker sleeps when there is nothing to do
+            fallback_printer: Callable(pdf_path) -> bool used when no print command
+                is available (e.g. Windows), run on the worker thread
+            artifact_store: Optional ArtifactStore; queued PDFs are held so temp
+                file cleanup cannot delete them before they are printed
+        """
+        self.db = db
+        self.logger = logging.getLogger('invoice_manager')
+        self.command = command
+        self.media = media
+        self.max_attempts = max(1, int(max_attempts))
+        self.max_in_flight = max(1, int(max_in_flight))
+        self.retry_delay = retry_delay
+        self.poll_interval = poll_interval
+        self.fallback_printer = fallback_printer
+        self.artifact_store = artifact_store
+
+        self._in_flight = {}  # job_id -> (process, start time, job dict)
+        self._held_jobs = set()  # IDs of jobs whose PDF is held in the artifact store
+        self._held_lock = threading.Lock()
+        self._listeners = []
+        self._wakeup = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+        self._metrics_lock = threading.Lock()
+        self._metrics = {
+            'submitted': 0,
+            'completed': 0,
+            'failed': 0,
+            'retried': 0,
+            'busy_seconds': 0.0
+        }
+        self._started_at = None
+
+    def start(self):
+        """Start the background worker thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._started_at = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name="print-spooler")
+        self._thread.daemon = True
+        self._thread.start()
+        self.logger.info("Print spooler started")
+
+    def stop(self, timeout=5.0):
+        """Stop the worker thread. Queued jobs stay in the database for the next start."""
+        self._stop_event.set()
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+        self.logger.info("Print spooler stopped")
+
+    def add_listener(self, callback):
+        """Register a callback(job_dict) invoked from the worker thread on every status change"""
+        self._listeners.append(callback)
+
+    def enqueue(self, pdf_path, description=None, media=None):
+        """Add a PDF to the print queue
+
+        Args:
+            pdf_path: Path of the PDF to print
+            description: Human readable label for status displays
+            media: Paper size for this job, defaults to the spooler's media
+
+        Returns:
+            The new job ID, or None if the job could not be stored
+        """
+        try:
+            with self.db.unit_of_work() as session:
+                job = PrintJob(
+                    pdf_path=pdf_path,
+                    description=description,
+                    media=media if media is not None else self.media,
+                    status='queued',
+                    attempts=0,
+                    max_attempts=self.max_attempts
+                )
+                session.add(job)
+                session.flush()
+                job_id = job.id
+        except SQLAlchemyError as e:
+            self.logger.error(f"Error queueing print job: {str(e)}")
+            return None
+
+        self._hold_file(job_id, pdf_path)
+        self.logger.info(f"Queued print job {job_id}: {description or pdf_path}")
+        self._wakeup.set()
+        return job_id
+
+    def get_job(self, job_id):
+        """Get the status of a single job"""
+        try:
+            with self.db.unit_of_work(read_only=True) as session:
+                job = session.query(PrintJob).filter(PrintJob.id == job_id).first()
+                return job.to_dict() if job else None
+        except SQLAlchemyError as e:
+            self.logger.error(f"Error fetching print job: {str(e)}")
+            return None
+
+    def get_jobs(self, statuses=None, limit=100):
+        """Get the most recent jobs, optionally restricted to the given statuses"""
+        try:
+            with self.db.unit_of_work(read_only=True) as session:
+                query = session.query(PrintJob)
+                if statuses:
+                    query = query.filter(PrintJob.status.in_(statuses))
+                jobs = query.order_by(PrintJob.id.desc()).limit(limit).all()
+                return [job.to_dict() for job in jobs]
+        except SQLAlchemyError as e:
+            self.logger.error(f"Error fetching print jobs: {str(e)}")
+            return []
+
+    def retry_job(self, job_id):
+        """Put a failed or cancelled job back in the queue"""
+        return self._set_status(job_id, 'queued', from_statuses=('failed', 'cancelled'), reset_attempts=True)
+
+    def cancel_job(self, job_id):
+        """Cancel a job that has not been submitted yet"""
+        return self._set_status(job_id, 'cancelled', from_statuses=('queued',))
+
+    def get_metrics(self):
+        """Get queue depth per status plus throughput counters for this process"""
+        status_counts = {status: 0 for status in ('queued', 'printing', 'completed', 'failed', 'cancelled')}
+        try:
+            with self.db.unit_of_work(read_only=True) as session:
+                rows = session.query(PrintJob.status, func.count(PrintJob.id)).group_by(PrintJob.status).all()
+            for status, count in rows:
+                status_counts[status] = count
+        except SQLAlchemyError as e:
+            self.logger.error(f"Error fetching print queue metrics: {str(e)}")
+
+        with self._metrics_lock:
+            metrics = dict(self._metrics)
+
+        elapsed = time.monotonic() - self._started_at if self._started_at else 0.0
+        metrics['in_flight'] = len(self._in_flight)
+        metrics['queue'] = status_counts
+        metrics['uptime_seconds'] = elapsed
+        metrics['jobs_per_minute'] = metrics['completed'] * 60.0 / elapsed if elapsed > 0 else 0.0
+        attempts_finished = metrics['completed'] + metrics['failed'] + metrics['retried']
+        metrics['avg_job_seconds'] = metrics['busy_seconds'] / attempts_finished if attempts_finished else 0.0
+        return metrics
+
+    def wait_until_idle(self, timeout=None):
+        """Block until no jobs are queued or printing. Intended for batch scripts, not the UI thread.
+
+        Returns:
+            True if the queue drained, False on timeout
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while True:
+            if not self._in_flight and self._count_active_jobs() == 0:
+                return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+
+    def _run(self):
+        """Worker loop: reap finished commands, then submit ready jobs"""
+        self._recover_interrupted_jobs()
+
+        while not self._stop_event.is_set():
+            try:
+                self._reap_finished()
+                free_slots = self.max_in_flight - len(self._in_flight)
+                if free_slots > 0:
+                    self._submit_ready_jobs(free_slots)
+            except Exception as e:
+                self.logger.error(f"Print spooler error: {str(e)}")
+
+            # Poll quickly while commands are running, otherwise sleep until woken
+            self._wakeup.wait(0.02 if self._in_flight else self.poll_interval)
+            self._wakeup.clear()
+
+        # Let commands that are already running finish so their status is recorded
+        while self._in_flight:
+            self._reap_finished()
+            time.sleep(0.02)
+
+    def _recover_interrupted_jobs(self):
+        """Requeue jobs left in 'printing' by a previous run that exited mid-job"""
+        try:
+            with self.db.unit_of_work() as session:
+                count = session.query(PrintJob).filter(PrintJob.status == 'printing').update(
+                    {PrintJob.status: 'queued'}, synchronize_session=False
+                )
+                pending = session.query(PrintJob.id, PrintJob.pdf_path).filter(PrintJob.status == 'queued').all()
+            # Jobs queued by this process since start are already held; _hold_file skips them
+            for job_id, pdf_path in pending:
+                self._hold_file(job_id, pdf_path)
+            if count:
+                self.logger.info(f"Requeued {count} interrupted print job(s)")
+        except SQLAlchemyError as e:
+            self.logger.error(f"Error recovering print jobs: {str(e)}")
+
+    def _submit_ready_jobs(self, limit):
+        """Claim up to ``limit`` queued jobs and start their print commands"""
+        now = datetime.now()
+        try:
+            with self.db.unit_of_work() as session:
+                jobs = session.query(PrintJob).filter(
+                    PrintJob.status == 'queued',
+                    (PrintJob.next_attempt_at == None) | (PrintJob.next_attempt_at <= now)  # noqa: E711
+                ).order_by(PrintJob.id).limit(limit).all()
+
+                claimed = []
+                for job in jobs:
+                    job.status = 'printing'
+                    job.attempts = (job.attempts or 0) + 1
+                    job.submitted_at = now
+                    claimed.append(job.to_dict())
+        except SQLAlchemyError as e:
+            self.logger.error(f"Error claiming print jobs: {str(e)}")
+            return
+
+        for job in claimed:
+            self._notify(job)
+            self._start_job(job)
+
+    def _start_job(self, job):
+        """Start the print command for a claimed job without waiting for it"""
+        with self._metrics_lock:
+            self._metrics['submitted'] += 1
+
+        if not os.path.exists(job['pdf_path']):
+            self._finish_job(job, False, f"PDF file not found: {job['pdf_path']}", 0.0, retry=False)
+            return
+
+        # The paper size option is dropped on retries, since some drivers reject custom media
+        media = job['media'] if job['attempts'] <= 1 else None
+        command = self._build_command(job['pdf_path'], media)
+        started = time.monotonic()
+
+        if command is None:
+            # No print command on this platform: use the blocking fallback on this worker thread
+            try:
+                success = bool(self.fallback_printer and self.fallback_printer(job['pdf_path']))
+                error = None if success else "No print command available"
+            except Exception as e:
+                success, error = False, str(e)
+            self._finish_job(job, success, error, time.monotonic() - started)
+            return
+
+        try:
+            process = subprocess.Popen(
+                command,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+                stdin=subprocess.DEVNULL
+            )
+        except OSError as e:
+            self._finish_job(job, False, f"Could not run {command[0]}: {str(e)}", 0.0)
+            return
+
+        self.logger.info(f"Submitted print job {job['id']} (attempt {job['attempts']}): {' '.join(command)}")
+        self._in_flight[job['id']] = (process, started, job)
+
+    def _reap_finished(self):
+        """Record the result of every print command that has exited"""
+        for job_id, (process, started, job) in list(self._in_flight.items()):
+            if process.poll() is None:
+                continue
+            del self._in_flight[job_id]
+            stderr = process.stderr.read().decode(errors='replace').strip() if process.stderr else ""
+            if process.stderr:
+                process.stderr.close()
+            success = process.returncode == 0
+            error = None if success else (stderr or f"Exit code {process.returncode}")
+            self._finish_job(job, success, error, time.monotonic() - started)
+
+    def _finish_job(self, job, success, error, duration, retry=True):
+        """Persist the outcome of a submission and schedule a retry if allowed"""
+        now = datetime.now()
+        if success:
+            status = 'completed'
+        elif retry and job['attempts'] < job['max_attempts']:
+            status = 'queued'
+        else:
+            status = 'failed'
+
+        try:
+            with self.db.unit_of_work() as session:
+                db_job = session.query(PrintJob).filter(PrintJob.id == job['id']).first()
+                if db_job:
+                    db_job.status = status
+                    db_job.last_error = error
+                    if status == 'queued':
+                        backoff = self.retry_delay * (2 ** (job['attempts'] - 1))
+                        db_job.next_attempt_at = now + timedelta(seconds=backoff)
+                    else:
+                        db_job.completed_at = now
+                    session.flush()
+                    updated = db_job.to_dict()
+                else:
+                    updated = job
+            job = updated
+        except SQLAlchemyError as e:
+            self.logger.error(f"Error updating print job {job['id']}: {str(e)}")
+
+        if status != 'queued':
+            self._release_file(job['id'], job['pdf_path'])
+
+        with self._metrics_lock:
+            self._metrics['busy_seconds'] += duration
+            if status == 'completed':
+                self._metrics['completed'] += 1
+            elif status == 'queued':
+                self._metrics['retried'] += 1
+            else:
+                self._metrics['failed'] += 1
+
+        if status == 'completed':
+            self.logger.info(f"Print job {job['id']} completed in {duration:.2f}s")
+        elif status == 'queued':
+            self.logger.warning(f"Print job {job['id']} failed, will retry: {error}")
+        else:
+            self.logger.error(f"Print job {job['id']} failed: {error}")
+
+        self._notify(job)
+
+    def _build_command(self, pdf_path, media):
+        """Build the print command for the current platform, or None if there is none"""
+        if self.command:
+            base = shlex.split(self.command) if isinstance(self.command, str) else list(self.command)
+        elif platform.system() == 'Windows':
+            return None
+        elif platform.system() == 'Darwin':  # macOS
+            base = ['lpr']
+        else:  # Linux
+            base = ['lp']
+
+        if media:
+            base += ['-o', f'media={media}']
+        return base + [pdf_path]
+
+    def _set_status(self, job_id, status, from_statuses, reset_attempts=False):
+        """Move a job to a new status if it is currently in one of ``from_statuses``"""
+        try:
+            with self.db.unit_of_work() as session:
+                job = session.query(PrintJob).filter(PrintJob.id == job_id).first()
+                if not job or job.status not in from_statuses:
+                    return False, "Job not found or not in a state that allows this"
+                job.status = status
+                if reset_attempts:
+                    job.attempts = 0
+                    job.next_attempt_at = None
+                    job.last_error = None
+                session.flush()
+                job_data = job.to_dict()
+        except SQLAlchemyError as e:
+            self.logger.error(f"Error updating print job {job_id}: {str(e)}")
+            return False, str(e)
+
+        if status == 'queued':
+            self._hold_file(job_id, job_data['pdf_path'])
+        else:
+            self._release_file(job_id, job_data['pdf_path'])
+
+        self._notify(job_data)
+        self._wakeup.set()
+        return True, None
+
+    def _count_active_jobs(self):
+        """Count jobs that are queued or printing"""
+        try:
+            with self.db.unit_of_work(read_only=True) as session:
+                return session.query(func.count(PrintJob.id)).filter(
+                    PrintJob.status.in_(self.ACTIVE_STATUSES)
+                ).scalar() or 0
+        except SQLAlchemyError as e:
+            self.logger.error(f"Error counting print jobs: {str(e)}")
+            return 0
+
+    def _hold_file(self, job_id, pdf_path):
+        """Protect a queued job's PDF from temp file cleanup; holds once per job"""
+        if not self.artifact_store:
+            return
+        with self._held_lock:
+            if job_id in self._held_jobs:
+                return
+            self._held_jobs.add(job_id)
+        self.artifact_store.acquire(pdf_path)
+
+    def _release_file(self, job_id, pdf_path):
+        """Allow temp file cleanup to remove a PDF once its job is finished"""
+        if not self.artifact_store:
+            return
+        with self._held_lock:
+            if job_id not in self._held_jobs:
+                return
+            self._held_jobs.discard(job_id)
+        self.artifact_store.release(pdf_path)
+
+    def _notify(self, job):
+        """Tell listeners about a job status change"""
+        for callback in list(self._listeners):
+            try:
+                callback(job)
+            except Exception as e:
+                self.logger.error(f"Print job listener failed: {str(e)}")
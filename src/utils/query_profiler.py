@@ -0,0 +1,247 @@
+"""Opt-in per-statement timing for the SQLAlchemy engine
+
+QueryProfiler hooks ``before_cursor_execute``/``after_cursor_execute`` on an
+engine and keeps, per normalized SQL statement: call count, total and
+maximum latency, a latency histogram, rows reported by the driver, and
+which controller methods issued it. Statements slower than the threshold
+are logged with their caller, and the first time a SELECT is slow its
+query plan (EXPLAIN QUERY PLAN on SQLite, EXPLAIN on MySQL) is captured.
+
+Enable it with ``diagnostics.profile_queries`` in the config (GUI) or
+``--profile-queries`` (command line). Reports are available from
+Database.get_query_profile(), the Diagnostics page, the API metrics and
+the command line dump.
+"""
+import os
+import re
+import sys
+import time
+import logging
+import threading
+from collections import Counter
+from sqlalchemy import event
+
+# Upper bounds of the latency histogram buckets in milliseconds; the last bucket is open
+HISTOGRAM_BOUNDS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+# Frames in these files are shared data access helpers, not the code that wanted the data
+HELPER_FILES = ('database.py', 'query_profiler.py', 'projections.py', 'invoice_loader.py', 'invoice_writer.py')
+
+# Deepest stack walk when looking for the calling controller method
+MAX_CALLER_DEPTH = 100
+
+_SRC_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) + os.sep
+_CONTROLLERS_DIR = os.path.join(_SRC_ROOT, 'controllers') + os.sep
+_WHITESPACE = re.compile(r"\s+")
+# "IN (?, ?, ?)" and multi-row "VALUES (?, ?), (?, ?)" differ only in list length
+_REPEATED_GROUP = re.compile(r"(\((?:\?|%s|:\w+)(?:, (?:\?|%s|:\w+))*\))(?:, \1)+")
+_REPEATED_PARAM = re.compile(r"\((\?|%s)(?:, \1)+\)")
+
+
+def normalize_statement(statement):
+    """Statement text with whitespace collapsed and parameter lists of any length folded together"""
+    statement = _WHITESPACE.sub(' ', statement).strip()
+    statement = _REPEATED_GROUP.sub(r"\1, ...", statement)
+    return _REPEATED_PARAM.sub(r"(\1, ...)", statement)
+
+
+class QueryStats:
+    """Accumulated timings of one normalized statement"""
+
+    __slots__ = ('statement', 'count', 'total', 'max', 'rows', 'slow', 'histogram', 'callers', 'plan')
+
+    def __init__(self, statement):
+        self.statement = statement
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.rows = 0
+        self.slow = 0
+        self.histogram = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+        self.callers = Counter()
+        self.plan = None
+
+    def percentile_ms(self, fraction):
+        """Upper bound of the histogram bucket holding the given fraction of calls, capped at the maximum"""
+        wanted = fraction * self.count
+        seen = 0
+        for bound, calls in zip(HISTOGRAM_BOUNDS_MS, self.histogram):
+            seen += calls
+            if seen >= wanted:
+                return min(bound, self.max * 1000)
+        return self.max * 1000
+
+    def to_dict(self):
+        buckets = [f"<={bound}ms" for bound in HISTOGRAM_BOUNDS_MS] + [f">{HISTOGRAM_BOUNDS_MS[-1]}ms"]
+        return {
+            'statement': self.statement,
+            'count': self.count,
+            'total_ms': self.total * 1000,
+            'avg_ms': self.total / self.count * 1000 if self.count else 0.0,
+            'p95_ms': self.percentile_ms(0.95),
+            'max_ms': self.max * 1000,
+            'rows': self.rows,
+            'slow': self.slow,
+            'histogram': {bucket: calls for bucket, calls in zip(buckets, self.histogram) if calls},
+            'callers': dict(self.callers.most_common()),
+            'plan': self.plan
+        }
+
+
+class QueryProfiler:
+    """Statement latency recorder attached to one engine
+
+    Args:
+        engine: Engine to instrument
+        slow_query_ms: Statements taking at least this long are logged, 0 to log none
+        explain: Capture the query plan of slow SELECT statements
+    """
+
+    def __init__(self, engine, slow_query_ms=100, explain=True):
+        self.engine = engine
+        self.slow_query_seconds = slow_query_ms / 1000.0
+        self.explain = explain
+        self.logger = logging.getLogger('invoice_manager')
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._started_at = time.monotonic()
+        self._installed = False
+
+    def install(self):
+        if not self._installed:
+            event.listen(self.engine, 'before_cursor_execute', self._before_execute)
+            event.listen(self.engine, 'after_cursor_execute', self._after_execute)
+            self._installed = True
+
+    def remove(self):
+        if self._installed:
+            event.remove(self.engine, 'before_cursor_execute', self._before_execute)
+            event.remove(self.engine, 'after_cursor_execute', self._after_execute)
+            self._installed = False
+
+    def reset(self):
+        """Forget everything recorded so far"""
+        with self._lock:
+            self._stats = {}
+            self._started_at = time.monotonic()
+
+    def report(self, sort='total_ms', limit=None):
+        """Recorded statements as dicts, most expensive first
+
+        Args:
+            sort: to_dict key to order by (total_ms, max_ms, count, slow, ...)
+            limit: Return at most this many statements
+        """
+        with self._lock:
+            entries = [stats.to_dict() for stats in self._stats.values()]
+            elapsed = time.monotonic() - self._started_at
+        entries.sort(key=lambda entry: entry[sort], reverse=True)
+        return {
+            'seconds_recorded': elapsed,
+            'statements': sum(entry['count'] for entry in entries),
+            'total_ms': sum(entry['total_ms'] for entry in entries),
+            'slow_query_ms': self.slow_query_seconds * 1000,
+            'queries': entries[:limit] if limit else entries
+        }
+
+    def format_report(self, limit=20):
+        """Plain text table of the most expensive statements"""
+        report = self.report(limit=limit)
+        lines = [
+            f"{report['statements']} statements, {report['total_ms']:.1f} ms in "
+            f"{report['seconds_recorded']:.1f} s (slow >= {report['slow_query_ms']:.0f} ms)",
+            f"{'count':>7} {'total ms':>10} {'avg ms':>8} {'p95 ms':>8} {'max ms':>8} {'rows':>8} {'slow':>5}  caller / statement"
+        ]
+        for entry in report['queries']:
+            caller = next(iter(entry['callers']), 'unknown')
+            lines.append(
+                f"{entry['count']:>7} {entry['total_ms']:>10.1f} {entry['avg_ms']:>8.2f} {entry['p95_ms']:>8.2f} "
+                f"{entry['max_ms']:>8.2f} {entry['rows']:>8} {entry['slow']:>5}  {caller}"
+            )
+            lines.append(f"{'':>60}{entry['statement'][:200]}")
+            if entry['plan']:
+                lines.extend(f"{'':>62}plan: {step}" for step in entry['plan'])
+        return "\n".join(lines)
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info['query_started'] = time.perf_counter()
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.pop('query_started', None)
+        if started is None:
+            return  # Started before the profiler was installed
+        elapsed = time.perf_counter() - started
+        caller = self._caller()
+        rows = cursor.rowcount if cursor.rowcount and cursor.rowcount > 0 else 0
+        key = normalize_statement(statement)
+        slow = self.slow_query_seconds > 0 and elapsed >= self.slow_query_seconds
+
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = QueryStats(key)
+            stats.count += 1
+            stats.total += elapsed
+            stats.max = max(stats.max, elapsed)
+            stats.rows += rows
+            stats.histogram[self._bucket(elapsed * 1000)] += 1
+            stats.callers[caller] += 1
+            if slow:
+                stats.slow += 1
+            needs_plan = slow and self.explain and stats.plan is None and not executemany
+
+        if slow:
+            self.logger.warning(f"Slow query ({elapsed * 1000:.1f} ms) from {caller}: {key[:500]}")
+        if needs_plan and key.upper().startswith(('SELECT', 'WITH')):
+            plan = self._explain(conn, statement, parameters)
+            if plan:
+                with self._lock:
+                    stats.plan = plan
+                self.logger.warning("Query plan: " + " | ".join(plan))
+
+    @staticmethod
+    def _bucket(milliseconds):
+        for index, bound in enumerate(HISTOGRAM_BOUNDS_MS):
+            if milliseconds <= bound:
+                return index
+        return len(HISTOGRAM_BOUNDS_MS)
+
+    def _explain(self, conn, statement, parameters):
+        """Query plan lines for a statement, run on the raw connection so it is not profiled itself"""
+        dialect = conn.dialect.name
+        if dialect == 'sqlite':
+            prefix, detail = "EXPLAIN QUERY PLAN ", lambda row: row[-1]
+        elif dialect == 'mysql':
+            prefix, detail = "EXPLAIN ", lambda row: " ".join(str(value) for value in row if value is not None)
+        else:
+            return None
+        try:
+            cursor = conn.connection.cursor()
+            try:
+                cursor.execute(prefix + statement, parameters)
+                return [str(detail(row)) for row in cursor.fetchall()]
+            finally:
+                cursor.close()
+        except Exception as e:
+            self.logger.debug(f"Could not explain slow query: {str(e)}")
+            return None
+
+    @staticmethod
+    def _caller():
+        """Controller method that issued the statement, else the nearest application frame"""
+        frame = sys._getframe(1)
+        nearest = None
+        depth = 0
+        while frame is not None and depth < MAX_CALLER_DEPTH:
+            filename = frame.f_code.co_filename
+            if filename.startswith(_SRC_ROOT) and os.path.basename(filename) not in HELPER_FILES:
+                # Comprehensions and closures count as the function they are defined in
+                name = frame.f_code.co_qualname.split('.<locals>')[0]
+                if filename.startswith(_CONTROLLERS_DIR):
+                    return name
+                if nearest is None:
+                    module = os.path.splitext(os.path.basename(filename))[0]
+                    nearest = f"{module}.{name}"
+            frame = frame.f_back
+            depth += 1
+        return nearest or 'unknown'
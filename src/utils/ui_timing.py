@@ -0,0 +1,165 @@
+"""Tk main loop responsiveness: stall detection and per-view render timings
+
+``timed`` wraps view methods that run on the Tk thread (display_*,
+_filter_*, _sort_by_column, ...) and records how long each call took in a
+process-wide UiStats. LoopWatchdog schedules an ``after()`` heartbeat and
+measures how late it fires: that lag is how long the main loop could not
+process events. A stall is logged together with the timed calls that were
+running during it, and a rolling summary is written to the log every few
+minutes and shown on the Diagnostics page.
+"""
+import time
+import logging
+import threading
+import functools
+from collections import deque
+
+# Calls kept per name for the rolling percentiles
+ROLLING_WINDOW = 200
+
+# Timed calls at least this long are logged on their own
+SLOW_CALL_MS = 100
+
+# Recently finished timed calls kept to explain a stall
+RECENT_CALLS = 100
+
+
+class UiStats:
+    """Rolling duration statistics per timed name, safe to update from any thread"""
+
+    def __init__(self, window=ROLLING_WINDOW):
+        self.window = window
+        self._lock = threading.Lock()
+        self._samples = {}  # name -> deque of seconds
+        self._totals = {}  # name -> [count, total seconds, max seconds] since the last reset
+        self._recent = deque(maxlen=RECENT_CALLS)  # (finished at, name, seconds)
+
+    def record(self, name, seconds, finished_at=None):
+        with self._lock:
+            samples = self._samples.get(name)
+            if samples is None:
+                samples = self._samples[name] = deque(maxlen=self.window)
+                self._totals[name] = [0, 0.0, 0.0]
+            samples.append(seconds)
+            totals = self._totals[name]
+            totals[0] += 1
+            totals[1] += seconds
+            totals[2] = max(totals[2], seconds)
+            self._recent.append((finished_at or time.perf_counter(), name, seconds))
+
+    def calls_since(self, started_at):
+        """Timed calls that finished after ``started_at`` (a perf_counter value), longest first"""
+        with self._lock:
+            calls = [(name, seconds) for finished, name, seconds in self._recent if finished >= started_at]
+        return sorted(calls, key=lambda call: call[1], reverse=True)
+
+    def report(self):
+        """Dict of name -> count, avg/max since reset and p50/p95 over the rolling window, in ms"""
+        with self._lock:
+            snapshot = {name: (sorted(samples), list(self._totals[name])) for name, samples in self._samples.items()}
+        report = {}
+        for name, (samples, (count, total, longest)) in snapshot.items():
+            report[name] = {
+                'count': count,
+                'avg_ms': total / count * 1000 if count else 0.0,
+                'p50_ms': samples[len(samples) // 2] * 1000,
+                'p95_ms': samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000,
+                'max_ms': longest * 1000
+            }
+        return dict(sorted(report.items(), key=lambda entry: entry[1]['p95_ms'], reverse=True))
+
+    def format_report(self):
+        lines = [f"{'count':>7} {'avg ms':>8} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}  name"]
+        for name, entry in self.report().items():
+            lines.append(
+                f"{entry['count']:>7} {entry['avg_ms']:>8.1f} {entry['p50_ms']:>8.1f} "
+                f"{entry['p95_ms']:>8.1f} {entry['max_ms']:>8.1f}  {name}"
+            )
+        return "\n".join(lines)
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._totals.clear()
+            self._recent.clear()
+
+
+ui_stats = UiStats()
+
+
+def timed(func):
+    """Record each call's duration in ui_stats under the method's qualified name"""
+    name = func.__qualname__
+    logger = logging.getLogger('invoice_manager')
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            finished = time.perf_counter()
+            elapsed = finished - started
+            ui_stats.record(name, elapsed, finished)
+            if elapsed * 1000 >= SLOW_CALL_MS:
+                logger.debug(f"Slow UI call: {name} took {elapsed * 1000:.0f} ms")
+    return wrapper
+
+
+class LoopWatchdog:
+    """Measures Tk event loop lag with an ``after()`` heartbeat
+
+    Args:
+        root: Tk root whose main loop is watched
+        interval_ms: Heartbeat period
+        stall_ms: Lag at which a stall is logged
+        report_minutes: How often the rolling summary is logged, 0 for never
+    """
+
+    def __init__(self, root, interval_ms=100, stall_ms=200, report_minutes=5, stats=None):
+        self.root = root
+        self.interval = interval_ms / 1000.0
+        self.stall_seconds = stall_ms / 1000.0
+        self.report_seconds = report_minutes * 60
+        self.stats = stats or ui_stats
+        self.logger = logging.getLogger('invoice_manager')
+        self.stalls = 0
+        self._after_id = None
+        self._expected = None
+        self._last_report = None
+
+    def start(self):
+        self._last_report = time.perf_counter()
+        self._schedule()
+
+    def stop(self):
+        if self._after_id is not None:
+            try:
+                self.root.after_cancel(self._after_id)
+            except Exception:
+                pass  # Tk is already destroyed
+            self._after_id = None
+
+    def _schedule(self):
+        self._expected = time.perf_counter() + self.interval
+        self._after_id = self.root.after(int(self.interval * 1000), self._beat)
+
+    def _beat(self):
+        now = time.perf_counter()
+        lag = max(0.0, now - self._expected)
+        self.stats.record('main_loop.lag', lag, now)
+        if lag >= self.stall_seconds:
+            self.stalls += 1
+            # Whatever ran between the heartbeat being due and now is what blocked the loop
+            culprits = [
+                f"{name} {seconds * 1000:.0f} ms"
+                for name, seconds in self.stats.calls_since(self._expected - self.interval)
+                if name != 'main_loop.lag'
+            ][:5]
+            self.logger.warning(
+                f"Main loop stalled for {lag * 1000:.0f} ms" + (f" during {', '.join(culprits)}" if culprits else "")
+            )
+        if self.report_seconds and now - self._last_report >= self.report_seconds:
+            self._last_report = now
+            self.logger.info(f"UI timings ({self.stalls} stalls so far):\n{self.stats.format_report()}")
+        self._schedule()
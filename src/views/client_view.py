@@ -1,7 +1,9 @@
 import customtkinter as ctk
 import tkinter as tk
-from tkinter import messagebox
+from tkinter import messagebox, filedialog
 import logging
+from src.utils.mutations import optimistic_insert, optimistic_update, optimistic_delete, find_row
+from src.utils.ui_timing import timed
 
 class ClientView(ctk.CTkFrame):
     def __init__(self, parent, controller):
@@ -51,6 +53,14 @@ class ClientView(ctk.CTkFrame):
         )
         refresh_button.pack(side="right", padx=10, pady=10)
         
+        import_button = ctk.CTkButton(
+            title_frame, 
+            text="Import Customers", 
+            command=self._import_clients,
+            hover_color=("gray70", "gray30")
+        )
+        import_button.pack(side="right", padx=10, pady=10)
+        
         # Search and filter frame
         search_frame = ctk.CTkFrame(self)
         search_frame.pack(fill="x", padx=10, pady=(0, 10))
@@ -229,6 +239,7 @@ class ClientView(ctk.CTkFrame):
         self.sorted_column = None
         self.sort_ascending = True
         
+    @timed
     def display_clients(self, clients_data, pagination_info=None):
         """Display the list of clients in the treeview"""
         # Clear existing items
@@ -248,19 +259,7 @@ class ClientView(ctk.CTkFrame):
         
         # Add clients to the treeview
         for client in clients_data:
-            status = "Active" if client['is_active'] else "Inactive"
-            
-            self.tree.insert(
-                "", 
-                "end", 
-                values=(
-                    client['id'],
-                    client['name'],
-                    client['mobile'] or "",
-                    client['address'] or "",
-                    status
-                )
-            )
+            self.tree.insert("", "end", values=self._row_values(client))
             
         # Reset selection
         self.selected_client_id = None
@@ -275,7 +274,31 @@ class ClientView(ctk.CTkFrame):
             message += f" (filtered by '{self.search_var.get()}')"
         
         self.logger.info(message)
-        
+    
+    def _row_values(self, client):
+        """Treeview values for a client record (or a not yet saved client without an id)"""
+        status = "Active" if client['is_active'] else "Inactive"
+        return (
+            client.get('id') or "",
+            client['name'],
+            client['mobile'] or "",
+            client['address'] or "",
+            status
+        )
+    
+    def update_clients(self, clients):
+        """Replace the given clients' rows in place, keeping the page and selection"""
+        updated = {client['id']: client for client in clients}
+        self.clients_data = [updated.get(client['id'], client) for client in self.clients_data]
+        
+        for row in self.tree.get_children():
+            if 'unsaved' in self.tree.item(row, 'tags'):
+                continue
+            client = updated.get(int(self.tree.item(row, 'values')[0]))
+            if client:
+                self.tree.item(row, values=self._row_values(client))
+        
+    @timed
     def _filter_clients(self):
         """Filter clients based on search text"""
         search_text = self.search_var.get().lower()
@@ -384,6 +407,7 @@ class ClientView(ctk.CTkFrame):
             search_text=self.search_var.get()
         )
     
+    @timed
     def _sort_by_column(self, column, reset=True):
         """Sort the tree data by column"""
         if reset or self.sorted_column != column:
@@ -420,7 +444,7 @@ class ClientView(ctk.CTkFrame):
     def _on_client_select(self, event):
         """Handle client selection"""
         selected_items = self.tree.selection()
-        if selected_items:
+        if selected_items and 'unsaved' not in self.tree.item(selected_items[0], "tags"):
             item = selected_items[0]
             self.selected_client_id = int(self.tree.item(item, "values")[0])
             self._update_action_buttons()
@@ -451,17 +475,23 @@ class ClientView(ctk.CTkFrame):
         self.wait_window(dialog)  # Wait until the dialog is closed
         
         if dialog.result:
-            # Process the form data
-            success, result = self.controller.add_client(dialog.result)
-            if success:
-                self.show_info(f"Customer added successfully with ID: {result}")
-            else:
-                self.show_error(f"Failed to add customer: {result}")
+            # Save in the background and show the new customer until the page reloads
+            client = dialog.result
+            self.controller.save_in_background(
+                self.controller.add_client, client,
+                optimistic=lambda: optimistic_insert(self.tree, self._row_values(client)),
+                on_success=lambda client_id: self.show_info(f"Customer added successfully with ID: {client_id}"),
+                on_failure=lambda error: self.show_error(f"Failed to add customer: {error}")
+            )
                 
     def _show_edit_client_dialog(self):
         """Show dialog to edit an existing client"""
+        # A refresh while the dialog is open can clear the selection, so remember it now
+        client_id = self.selected_client_id
+        row = next(iter(self.tree.selection()), None)
+        
         # Get the client data
-        client_data = self.controller.get_client(self.selected_client_id)
+        client_data = self.controller.get_client(client_id)
         if not client_data:
             self.show_error("Failed to load customer data")
             return
@@ -471,12 +501,15 @@ class ClientView(ctk.CTkFrame):
         self.wait_window(dialog)  # Wait until the dialog is closed
         
         if dialog.result:
-            # Process the form data
-            success, result = self.controller.update_client(self.selected_client_id, dialog.result)
-            if success:
-                self.show_info(f"Customer updated successfully")
-            else:
-                self.show_error(f"Failed to update customer: {result}")
+            # Save in the background and show the new values right away
+            client = dict(dialog.result, id=client_id)
+            row = find_row(self.tree, client_id, hint=row)
+            self.controller.save_in_background(
+                self.controller.update_client, client_id, dialog.result,
+                optimistic=(lambda: optimistic_update(self.tree, row, self._row_values(client))) if row else None,
+                on_success=lambda client_id: self.show_info(f"Customer updated successfully"),
+                on_failure=lambda error: self.show_error(f"Failed to update customer: {error}")
+            )
                 
     def _show_view_client_dialog(self):
         """Show dialog to view client details"""
@@ -492,17 +525,46 @@ class ClientView(ctk.CTkFrame):
             
     def _confirm_delete_client(self):
         """Show confirmation dialog before deleting a client"""
-        if not self.selected_client_id:
+        client_id = self.selected_client_id
+        if not client_id:
             return
+        row = next(iter(self.tree.selection()), None)
             
         # Show confirmation dialog
         if messagebox.askyesno("Confirm Delete", 
                               "Are you sure you want to delete this customer?\nThis action cannot be undone."):
-            success, result = self.controller.delete_client(self.selected_client_id)
-            if success:
-                self.show_info("Customer deleted successfully")
-            else:
-                self.show_error(f"Failed to delete customer: {result}")
+            row = find_row(self.tree, client_id, hint=row)
+            self.controller.save_in_background(
+                self.controller.delete_client, client_id,
+                optimistic=(lambda: optimistic_delete(self.tree, row)) if row else None,
+                on_success=lambda result: self.show_info("Customer deleted successfully"),
+                on_failure=lambda error: self.show_error(f"Failed to delete customer: {error}")
+            )
+            self.selected_client_id = None
+            self._update_action_buttons()
+    
+    def _import_clients(self):
+        """Pick a CSV or Excel file and import its clients in the background"""
+        file_path = filedialog.askopenfilename(
+            title="Import Customers",
+            filetypes=[("CSV files", "*.csv"), ("Excel files", "*.xlsx *.xls"), ("All files", "*.*")]
+        )
+        if file_path:
+            self.controller.import_clients(file_path)
+    
+    def show_import_result(self, result):
+        """Show the summary of a bulk import"""
+        if result.get('error'):
+            self.show_error(f"Import failed: {result['error']}")
+            return
+        
+        message = f"Imported {result['imported']} of {result['total']} clients in {result['seconds']:.1f} seconds."
+        if result['failed']:
+            first_errors = "\n".join(f"Row {row}: {error}" for row, error in result['errors'][:5])
+            message += f"\n\n{result['failed']} row(s) were rejected:\n{first_errors}"
+            if result['error_report']:
+                message += f"\n\nFull error report: {result['error_report']}"
+        self.show_info(message)
     
     def show_error(self, message):
         """Show error message"""
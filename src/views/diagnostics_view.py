@@ -0,0 +1,171 @@
+import customtkinter as ctk
+import tkinter as tk
+from tkinter import ttk
+import logging
+from src.utils.ui_timing import ui_stats
+
+class DiagnosticsView(ctk.CTkFrame):
+    """Performance reports: SQL statements from the query profiler and Tk render timings"""
+
+    query_columns = ("caller", "count", "total", "avg", "p95", "max", "rows", "slow")
+    ui_columns = ("name", "count", "avg", "p50", "p95", "max")
+
+    def __init__(self, parent, db, watchdog=None):
+        super().__init__(parent)
+        self.db = db
+        self.watchdog = watchdog
+        self.logger = logging.getLogger('invoice_manager')
+        self.pack(fill="both", expand=True)
+
+        self.queries = {}  # Treeview iid -> report entry
+        self._create_widgets()
+        self.refresh()
+
+    def _create_widgets(self):
+        title_frame = ctk.CTkFrame(self)
+        title_frame.pack(fill="x", padx=10, pady=10)
+
+        title_label = ctk.CTkLabel(title_frame, text="Diagnostics", font=ctk.CTkFont(size=24, weight="bold"))
+        title_label.pack(side="left", padx=10, pady=10)
+
+        reset_button = ctk.CTkButton(title_frame, text="Reset", command=self._reset, hover_color=("gray70", "gray30"))
+        reset_button.pack(side="right", padx=10, pady=10)
+
+        refresh_button = ctk.CTkButton(title_frame, text="Refresh", command=self.refresh, hover_color=("gray70", "gray30"))
+        refresh_button.pack(side="right", padx=10, pady=10)
+
+        self.notebook = ctk.CTkTabview(self)
+        self.notebook.pack(fill="both", expand=True, padx=10, pady=(0, 10))
+        self.notebook.add("Queries")
+        self.notebook.add("UI Timings")
+        self.notebook.set("Queries" if self.db.profiler else "UI Timings")
+
+        self._setup_queries_tab()
+        self._setup_ui_tab()
+
+    def _setup_queries_tab(self):
+        queries_tab = self.notebook.tab("Queries")
+
+        self.summary_label = ctk.CTkLabel(queries_tab, text="", anchor="w")
+        self.summary_label.pack(fill="x", padx=10)
+
+        self.tree = self._create_tree(queries_tab, self.query_columns, (
+            ("caller", "Caller", 260, "w"),
+            ("count", "Count", 70, "e"),
+            ("total", "Total ms", 90, "e"),
+            ("avg", "Avg ms", 80, "e"),
+            ("p95", "p95 ms", 80, "e"),
+            ("max", "Max ms", 80, "e"),
+            ("rows", "Rows", 80, "e"),
+            ("slow", "Slow", 60, "e")
+        ))
+        self.tree.bind("<<TreeviewSelect>>", self._on_query_select)
+
+        self.detail_text = ctk.CTkTextbox(queries_tab, height=160, wrap="word")
+        self.detail_text.pack(fill="x", padx=10, pady=(0, 10))
+
+    def _setup_ui_tab(self):
+        ui_tab = self.notebook.tab("UI Timings")
+
+        self.ui_summary_label = ctk.CTkLabel(ui_tab, text="", anchor="w")
+        self.ui_summary_label.pack(fill="x", padx=10)
+
+        self.ui_tree = self._create_tree(ui_tab, self.ui_columns, (
+            ("name", "Name", 320, "w"),
+            ("count", "Count", 70, "e"),
+            ("avg", "Avg ms", 80, "e"),
+            ("p50", "p50 ms", 80, "e"),
+            ("p95", "p95 ms", 80, "e"),
+            ("max", "Max ms", 80, "e")
+        ))
+
+    def _create_tree(self, parent, columns, headings):
+        table_frame = ctk.CTkFrame(parent)
+        table_frame.pack(fill="both", expand=True, padx=10, pady=10)
+
+        tree = ttk.Treeview(table_frame, columns=columns, show="headings", selectmode="browse")
+        for column, heading, width, anchor in headings:
+            tree.heading(column, text=heading)
+            tree.column(column, width=width, anchor=anchor)
+
+        scrollbar = ttk.Scrollbar(table_frame, orient="vertical", command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
+        tree.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+        return tree
+
+    def refresh(self):
+        """Reload both reports"""
+        self._refresh_queries()
+        self._refresh_ui_timings()
+
+    def _refresh_queries(self):
+        report = self.db.get_query_profile(limit=200)
+        self.tree.delete(*self.tree.get_children())
+        self.queries = {}
+        if report is None:
+            self.summary_label.configure(
+                text="Query profiling is off. Set diagnostics.profile_queries in config/config.json and restart."
+            )
+            return
+
+        self.summary_label.configure(
+            text=f"{report['statements']} statements, {report['total_ms']:.0f} ms over "
+                 f"{report['seconds_recorded']:.0f} s; slow query threshold {report['slow_query_ms']:.0f} ms"
+        )
+        for entry in report['queries']:
+            iid = self.tree.insert("", "end", values=(
+                next(iter(entry['callers']), 'unknown'),
+                entry['count'],
+                f"{entry['total_ms']:.1f}",
+                f"{entry['avg_ms']:.2f}",
+                f"{entry['p95_ms']:.2f}",
+                f"{entry['max_ms']:.2f}",
+                entry['rows'],
+                entry['slow']
+            ))
+            self.queries[iid] = entry
+
+    def _refresh_ui_timings(self):
+        self.ui_tree.delete(*self.ui_tree.get_children())
+        if self.watchdog:
+            self.ui_summary_label.configure(
+                text=f"{self.watchdog.stalls} main loop stalls of at least {self.watchdog.stall_seconds * 1000:.0f} ms; "
+                     f"percentiles over the last {ui_stats.window} calls"
+            )
+        else:
+            self.ui_summary_label.configure(text="Main loop watchdog is off (diagnostics.watch_main_loop)")
+        for name, entry in ui_stats.report().items():
+            self.ui_tree.insert("", "end", values=(
+                name,
+                entry['count'],
+                f"{entry['avg_ms']:.1f}",
+                f"{entry['p50_ms']:.1f}",
+                f"{entry['p95_ms']:.1f}",
+                f"{entry['max_ms']:.1f}"
+            ))
+
+    def _reset(self):
+        if self.db.profiler:
+            self.db.profiler.reset()
+        ui_stats.reset()
+        if self.watchdog:
+            self.watchdog.stalls = 0
+        self._show_detail(None)
+        self.refresh()
+
+    def _on_query_select(self, event):
+        selection = self.tree.selection()
+        self._show_detail(self.queries.get(selection[0]) if selection else None)
+
+    def _show_detail(self, entry):
+        self.detail_text.delete("1.0", tk.END)
+        if entry is None:
+            return
+        lines = [entry['statement'], ""]
+        lines.append("Callers: " + ", ".join(f"{caller} ({count})" for caller, count in entry['callers'].items()))
+        lines.append("Latency: " + ", ".join(f"{bucket}: {calls}" for bucket, calls in entry['histogram'].items()))
+        if entry['plan']:
+            lines.append("Query plan:")
+            lines.extend(f"  {step}" for step in entry['plan'])
+        self.detail_text.insert("1.0", "\n".join(lines))
@@ -3,6 +3,9 @@ import tkinter as tk
 from tkinter import messagebox
 import logging
 from datetime import datetime, timedelta
+from src.views.line_item_grid import LineItemGrid
+from src.utils.mutations import optimistic_insert, optimistic_update, optimistic_delete, find_row
+from src.utils.ui_timing import timed
 
 class InvoiceView(ctk.CTkFrame):
     def __init__(self, parent, controller):
@@ -179,6 +182,7 @@ class InvoiceView(ctk.CTkFrame):
         self.sorted_column = None
         self.sort_ascending = True
         
+    @timed
     def display_invoices(self, invoices_data):
         """Display the list of invoices in the treeview"""
         # Clear existing items
@@ -190,23 +194,24 @@ class InvoiceView(ctk.CTkFrame):
         
         # Add invoices to the treeview
         for invoice in invoices_data:
-            self.tree.insert(
-                "", 
-                "end", 
-                values=(
-                    invoice['id'],
-                    invoice['invoice_number'],
-                    invoice['date'],
-                    invoice['customer_name'],
-                    invoice['customer_address'] or "",
-                    f"₱{invoice['total_amount']:.2f}"
-                )
-            )
+            self.tree.insert("", "end", values=self._row_values(invoice))
             
         # Reset selection
         self.selected_invoice_id = None
         self._update_action_buttons()
         
+    def _row_values(self, invoice):
+        """Treeview values for an invoice record (or a not yet saved invoice without an id)"""
+        return (
+            invoice.get('id') or "",
+            invoice['invoice_number'],
+            invoice['date'],
+            invoice['customer_name'],
+            invoice['customer_address'] or "",
+            f"₱{invoice['total_amount']:.2f}"
+        )
+    
+    @timed
     def _filter_invoices(self):
         """Filter invoices based on search text"""
         search_text = self.search_var.get().lower()
@@ -223,18 +228,7 @@ class InvoiceView(ctk.CTkFrame):
                 search_text in invoice['customer_name'].lower() or
                 (invoice['customer_address'] and search_text in invoice['customer_address'].lower())):
                 
-                self.tree.insert(
-                    "", 
-                    "end", 
-                    values=(
-                        invoice['id'],
-                        invoice['invoice_number'],
-                        invoice['date'],
-                        invoice['customer_name'],
-                        invoice['customer_address'] or "",
-                        f"₱{invoice['total_amount']:.2f}"
-                    )
-                )
+                self.tree.insert("", "end", values=self._row_values(invoice))
     
     def _apply_date_filter(self, filter_option):
         """Apply date filter to invoices"""
@@ -252,6 +246,7 @@ class InvoiceView(ctk.CTkFrame):
         # Call controller with filter
         self.controller.load_invoices(date_filter=date_filter)
     
+    @timed
     def _sort_by_column(self, column, reset=True):
         """Sort the tree data by column"""
         if reset or self.sorted_column != column:
@@ -298,7 +293,7 @@ class InvoiceView(ctk.CTkFrame):
     def _on_invoice_select(self, event):
         """Handle invoice selection"""
         selected_items = self.tree.selection()
-        if selected_items:
+        if selected_items and 'unsaved' not in self.tree.item(selected_items[0], "tags"):
             item = selected_items[0]
             self.selected_invoice_id = int(self.tree.item(item, "values")[0])
             self._update_action_buttons()
@@ -335,17 +330,23 @@ class InvoiceView(ctk.CTkFrame):
         self.wait_window(dialog)  # Wait until the dialog is closed
         
         if dialog.result:
-            # Process the form data
-            success, result = self.controller.add_invoice(dialog.result['invoice'], dialog.result['items'])
-            if success:
-                self.show_info(f"Invoice added successfully with ID: {result}")
-            else:
-                self.show_error(f"Failed to add invoice: {result}")
+            # Save in the background and show the new invoice until the list reloads
+            invoice = dialog.result['invoice']
+            self.controller.save_in_background(
+                self.controller.add_invoice, invoice, dialog.result['items'],
+                optimistic=lambda: optimistic_insert(self.tree, self._row_values(invoice)),
+                on_success=lambda invoice_id: self.show_info(f"Invoice added successfully with ID: {invoice_id}"),
+                on_failure=lambda error: self.show_error(f"Failed to add invoice: {error}")
+            )
                 
     def _show_edit_invoice_dialog(self):
         """Show dialog to edit an existing invoice"""
+        # A refresh while the dialog is open can clear the selection, so remember it now
+        invoice_id = self.selected_invoice_id
+        row = next(iter(self.tree.selection()), None)
+        
         # Get the invoice data
-        invoice_data, items_data = self.controller.get_invoice(self.selected_invoice_id)
+        invoice_data, items_data = self.controller.get_invoice(invoice_id)
         if not invoice_data:
             self.show_error("Failed to load invoice data")
             return
@@ -358,12 +359,15 @@ class InvoiceView(ctk.CTkFrame):
         self.wait_window(dialog)  # Wait until the dialog is closed
         
         if dialog.result:
-            # Process the form data
-            success, result = self.controller.update_invoice(self.selected_invoice_id, dialog.result['invoice'], dialog.result['items'])
-            if success:
-                self.show_info(f"Invoice updated successfully")
-            else:
-                self.show_error(f"Failed to update invoice: {result}")
+            # Save in the background and show the new values right away
+            invoice = dict(dialog.result['invoice'], id=invoice_id)
+            row = find_row(self.tree, invoice_id, hint=row)
+            self.controller.save_in_background(
+                self.controller.update_invoice, invoice_id, dialog.result['invoice'], dialog.result['items'],
+                optimistic=(lambda: optimistic_update(self.tree, row, self._row_values(invoice))) if row else None,
+                on_success=lambda result: self.show_info(f"Invoice updated successfully"),
+                on_failure=lambda error: self.show_error(f"Failed to update invoice: {error}")
+            )
                 
     def _show_view_invoice_dialog(self):
         """Show dialog to view invoice details"""
@@ -382,17 +386,23 @@ class InvoiceView(ctk.CTkFrame):
             
     def _confirm_delete_invoice(self):
         """Show confirmation dialog before deleting an invoice"""
-        if not self.selected_invoice_id:
+        invoice_id = self.selected_invoice_id
+        if not invoice_id:
             return
+        row = next(iter(self.tree.selection()), None)
             
         # Show confirmation dialog
         if messagebox.askyesno("Confirm Delete", 
                               "Are you sure you want to delete this invoice?\nThis action cannot be undone."):
-            success, result = self.controller.delete_invoice(self.selected_invoice_id)
-            if success:
-                self.show_info("Invoice deleted successfully")
-            else:
-                self.show_error(f"Failed to delete invoice: {result}")
+            row = find_row(self.tree, invoice_id, hint=row)
+            self.controller.save_in_background(
+                self.controller.delete_invoice, invoice_id,
+                optimistic=(lambda: optimistic_delete(self.tree, row)) if row else None,
+                on_success=lambda result: self.show_info("Invoice deleted successfully"),
+                on_failure=lambda error: self.show_error(f"Failed to delete invoice: {error}")
+            )
+            self.selected_invoice_id = None
+            self._update_action_buttons()
     
     def show_error(self, message):
         """Show error message"""
@@ -418,9 +428,6 @@ class InvoiceDialog(ctk.CTkToplevel):
         self.readonly = readonly
         self.result = None
         
-        # Store line items
-        self.line_items = []
-        
         # Get items for dropdown
         self.items = parent.controller.get_items()
         
@@ -515,8 +522,8 @@ class InvoiceDialog(ctk.CTkToplevel):
         customer_name_frame.pack(fill="x", pady=5)
         ctk.CTkLabel(customer_name_frame, text="Customer:").pack(side="left", padx=10)
         
-        # Customer dropdown with sorted names
-        client_names = [""] + sorted([client['name'] for client in self.clients])
+        # Customer dropdown with the first names; typing searches the rest
+        client_names = [""] + self.clients.name_index.search("")
         self.customer_var = ctk.StringVar()
         
         # Set the customer name if editing an existing invoice
@@ -567,36 +574,32 @@ class InvoiceDialog(ctk.CTkToplevel):
             add_item_button = ctk.CTkButton(
                 items_header, 
                 text="Add Item", 
-                command=self._add_line_item,
+                command=lambda: self.line_grid.add_line(),
                 width=100
             )
             add_item_button.pack(side="right", padx=10)
+            
+            remove_item_button = ctk.CTkButton(
+                items_header, 
+                text="Remove Selected", 
+                command=lambda: self.line_grid.delete_selected(),
+                width=130,
+                fg_color="red",
+                hover_color="darkred"
+            )
+            remove_item_button.pack(side="right", padx=10)
         
-        # Items list frame
-        items_list_frame = ctk.CTkFrame(items_frame)
-        items_list_frame.pack(fill="both", expand=True, padx=10, pady=10)
-        
-        # Items header row
-        header_row = ctk.CTkFrame(items_list_frame)
-        header_row.pack(fill="x", pady=(0, 5))
-        
-        ctk.CTkLabel(header_row, text="Item Code", width=80).pack(side="left", padx=(5, 0))
-        ctk.CTkLabel(header_row, text="Description", width=200).pack(side="left", padx=5)
-        ctk.CTkLabel(header_row, text="Quantity", width=80).pack(side="left", padx=5)
-        ctk.CTkLabel(header_row, text="Price", width=80).pack(side="left", padx=5)
-        ctk.CTkLabel(header_row, text="Total", width=80).pack(side="left", padx=5)
-        
-        # Items container (scrollable frame would be better for many items)
-        self.items_container = ctk.CTkScrollableFrame(items_list_frame, height=200)
-        self.items_container.pack(fill="both", expand=True)
-        
-        # Add existing line items
-        for item_data in self.items_data:
-            self._add_line_item(item_data)
+        # Items grid: one Treeview with an inline editor instead of widgets per line
+        self.total_var = ctk.StringVar()
+        self.line_grid = LineItemGrid(items_frame, self.items, self._on_total_changed, readonly=self.readonly)
+        self.line_grid.pack(fill="both", expand=True, padx=10, pady=10)
+        self.line_grid.load(self.items_data)
+        if not self.line_grid.lines:
+            self.total_var.set(f"₱{self.invoice_data.get('total_amount', 0.0):.2f}")
         
         # If it's a new invoice with no items, add an empty item row
         if not self.items_data and not self.readonly:
-            self._add_line_item()
+            self.line_grid.add_line()
         
         # Totals section
         totals_frame = ctk.CTkFrame(main_content)
@@ -608,7 +611,6 @@ class InvoiceDialog(ctk.CTkToplevel):
         
         ctk.CTkLabel(total_frame, text="Total Amount:", font=ctk.CTkFont(weight="bold")).pack(side="left", padx=10)
         
-        self.total_var = ctk.StringVar(value=f"₱{self.invoice_data.get('total_amount', 0.0):.2f}")
         total_label = ctk.CTkLabel(total_frame, textvariable=self.total_var, font=ctk.CTkFont(weight="bold"))
         total_label.pack(side="left", padx=10)
         
@@ -643,14 +645,14 @@ class InvoiceDialog(ctk.CTkToplevel):
             return
         
         # Find customer in clients list
-        for client in self.clients:
-            if client['name'] == customer_name:
-                # Set the address
-                self.address_text.delete("1.0", "end")
-                if client['address']:
-                    self.address_text.insert("1.0", client['address'])
-                break
+        client = self.clients.by_name.get(customer_name)
+        if client:
+            # Set the address
+            self.address_text.delete("1.0", "end")
+            if client['address']:
+                self.address_text.insert("1.0", client['address'])
     
+    @timed
     def _filter_customer_dropdown(self, event):
         """Filter customer dropdown options based on typed text"""
         typed_text = self.customer_dropdown.get().lower()
@@ -660,10 +662,9 @@ class InvoiceDialog(ctk.CTkToplevel):
                           'BackSpace', 'Delete', 'Escape', 'Tab'):
             return
         
-        # Find matching client names
+        # Find matching client names (capped, prefix matches first)
         if typed_text:
-            matches = [name for name in sorted([client['name'] for client in self.clients]) 
-                      if typed_text in name.lower()]
+            matches = self.clients.name_index.search(typed_text)
             
             # If matches found, update dropdown with matching values
             if matches:
@@ -673,170 +674,21 @@ class InvoiceDialog(ctk.CTkToplevel):
                 # Keep the typed text in the entry
                 self.customer_dropdown.set(typed_text)
             else:
-                # If no matches, keep typed text but show all options
-                self.customer_dropdown.configure(values=[""] + sorted([client['name'] for client in self.clients]))
+                # If no matches, keep typed text but show the first options
+                self.customer_dropdown.configure(values=[""] + self.clients.name_index.search(""))
         else:
-            # Reset to all options if text field is empty
-            self.customer_dropdown.configure(values=[""] + sorted([client['name'] for client in self.clients]))
-    
-    def _add_line_item(self, item_data=None):
-        """Add a line item row to the invoice items"""
-        # Create a frame for this line item
-        item_frame = ctk.CTkFrame(self.items_container)
-        item_frame.pack(fill="x", pady=2)
-        
-        # Item Code selection (dropdown) - changed from Item ID to Item Code
-        # Store item ID internally, but display item code in dropdown
-        item_id_var = ctk.StringVar(value=str(item_data.get('item_id', '')) if item_data else '')
-        
-        # Create the dropdown values for items - using item_code for display
-        item_code_to_id = {item['item_code']: str(item['id']) for item in self.items}
-        id_to_item_code = {str(item['id']): item['item_code'] for item in self.items}
-        
-        item_codes = [""] + [item['item_code'] for item in self.items]
-        
-        # Create the dropdown with item codes instead of IDs
-        item_dropdown = ctk.CTkComboBox(
-            item_frame, 
-            values=item_codes, 
-            width=80,
-            command=lambda code: self._item_selected(item_code_to_id.get(code, ""), item_frame)
-        )
-        item_dropdown.pack(side="left", padx=(5, 0))
-        
-        # If we have item data, set the selected item code
-        if item_data and item_data.get('item_id'):
-            item_code = id_to_item_code.get(str(item_data.get('item_id')), "")
-            if item_code:
-                item_dropdown.set(item_code)
-        
-        # Description
-        description_var = ctk.StringVar(value=item_data.get('description', '') if item_data else '')
-        description_entry = ctk.CTkEntry(item_frame, textvariable=description_var, width=200)
-        description_entry.pack(side="left", padx=5)
-        
-        # Quantity
-        quantity_var = ctk.StringVar(value=str(item_data.get('quantity', 1)) if item_data else '1')
-        quantity_entry = ctk.CTkEntry(item_frame, textvariable=quantity_var, width=80)
-        quantity_entry.pack(side="left", padx=5)
-        
-        # Price
-        price_var = ctk.StringVar(value=str(item_data.get('price', 0.0)) if item_data else '0.0')
-        price_entry = ctk.CTkEntry(item_frame, textvariable=price_var, width=80)
-        price_entry.pack(side="left", padx=5)
-        
-        # Total (calculated field)
-        total = float(item_data.get('quantity', 1)) * float(item_data.get('price', 0.0)) if item_data else 0.0
-        total_var = ctk.StringVar(value=f"₱{total:.2f}")
-        total_label = ctk.CTkLabel(item_frame, textvariable=total_var, width=80)
-        total_label.pack(side="left", padx=5)
-        
-        # Delete button
-        if not self.readonly:
-            delete_button = ctk.CTkButton(
-                item_frame,
-                text="X",
-                width=30,
-                height=24,
-                fg_color="red",
-                hover_color="darkred",
-                command=lambda: self._delete_line_item(item_frame)
-            )
-            delete_button.pack(side="left", padx=5)
-        
-        # If readonly, disable all inputs
-        if self.readonly:
-            item_dropdown.configure(state="disabled")
-            description_entry.configure(state="disabled")
-            quantity_entry.configure(state="disabled")
-            price_entry.configure(state="disabled")
-        
-        # Add event handlers for updating total
-        def update_total(*args):
-            try:
-                qty = int(quantity_var.get()) if quantity_var.get() else 0
-                prc = float(price_var.get()) if price_var.get() else 0.0
-                total_var.set(f"₱{qty * prc:.2f}")
-                self._calculate_invoice_total()
-            except ValueError:
-                total_var.set("₱0.00")
-        
-        quantity_var.trace_add("write", update_total)
-        price_var.trace_add("write", update_total)
-        
-        # Store the line item data
-        line_item = {
-            'frame': item_frame,
-            'item_id_var': item_id_var,  # Store the ID internally
-            'item_dropdown': item_dropdown,  # But display the code in the UI
-            'description_var': description_var,
-            'description_entry': description_entry,
-            'quantity_var': quantity_var,
-            'quantity_entry': quantity_entry,
-            'price_var': price_var,
-            'price_entry': price_entry,
-            'total_var': total_var
-        }
-        
-        self.line_items.append(line_item)
-        return line_item
-    
-    def _item_selected(self, item_id, item_frame):
-        """Handle item selection from dropdown"""
-        if not item_id:
-            return
-            
-        # Find the line item that corresponds to this frame
-        for line_item in self.line_items:
-            if line_item['frame'] == item_frame:
-                # Store the selected item_id
-                line_item['item_id_var'].set(item_id)
-                
-                # Find the selected item in the items list
-                for item in self.items:
-                    if str(item['id']) == item_id:
-                        # Set the description and price
-                        line_item['description_var'].set(item['name'])
-                        line_item['price_var'].set(str(item['price']))
-                        
-                        # Update the total
-                        try:
-                            qty = int(line_item['quantity_var'].get()) if line_item['quantity_var'].get() else 0
-                            prc = float(line_item['price_var'].get()) if line_item['price_var'].get() else 0.0
-                            line_item['total_var'].set(f"₱{qty * prc:.2f}")
-                            self._calculate_invoice_total()
-                        except ValueError:
-                            line_item['total_var'].set("₱0.00")
-                        break
-                break
+            # Reset to the first options if text field is empty
+            self.customer_dropdown.configure(values=[""] + self.clients.name_index.search(""))
     
-    def _delete_line_item(self, item_frame):
-        """Delete a line item from the invoice"""
-        for i, item in enumerate(self.line_items):
-            if item['frame'] == item_frame:
-                self.line_items.pop(i)
-                break
-                
-        item_frame.destroy()
-        self._calculate_invoice_total()
-    
-    def _calculate_invoice_total(self):
-        """Calculate the total amount of the invoice"""
-        total = 0.0
-        
-        for line_item in self.line_items:
-            try:
-                # Extract the numeric value from the total
-                total_text = line_item['total_var'].get().replace('₱', '')
-                item_total = float(total_text) if total_text else 0.0
-                total += item_total
-            except ValueError:
-                continue
-                
+    def _on_total_changed(self, total):
+        """Show the invoice total kept by the line item grid"""
         self.total_var.set(f"₱{total:.2f}")
     
     def _save(self):
         """Save the invoice data"""
+        # Keep a cell that is still being edited
+        self.line_grid.finish_editing()
+        
         # Validate required fields
         errors = []
         
@@ -849,30 +701,11 @@ class InvoiceDialog(ctk.CTkToplevel):
         if not self.customer_var.get():
             errors.append("Customer name is required")
             
-        if not self.line_items:
+        if not self.line_grid.lines:
             errors.append("At least one line item is required")
             
         # Check that all line items have item_id, description, quantity, and price
-        for i, item in enumerate(self.line_items):
-            if not item['item_id_var'].get():
-                errors.append(f"Item {i+1}: Item ID is required")
-                
-            if not item['description_var'].get():
-                errors.append(f"Item {i+1}: Description is required")
-                
-            try:
-                qty = int(item['quantity_var'].get())
-                if qty <= 0:
-                    errors.append(f"Item {i+1}: Quantity must be greater than zero")
-            except ValueError:
-                errors.append(f"Item {i+1}: Invalid quantity")
-                
-            try:
-                price = float(item['price_var'].get())
-                if price < 0:
-                    errors.append(f"Item {i+1}: Price cannot be negative")
-            except ValueError:
-                errors.append(f"Item {i+1}: Invalid price")
+        errors.extend(self.line_grid.validate())
         
         if errors:
             messagebox.showerror("Validation Error", "\n".join(errors))
@@ -884,29 +717,23 @@ class InvoiceDialog(ctk.CTkToplevel):
             'date': self.date_var.get(),
             'customer_name': self.customer_var.get(),
             'customer_address': self.address_text.get("1.0", "end-1c").strip(),
-            'total_amount': float(self.total_var.get().replace('₱', '')),
+            'total_amount': round(self.line_grid.total, 2),
             'mode_of_payment': self.payment_mode_var.get(),  # Add mode of payment to the saved data
             'payment_status': 'pending'  # Set default payment status to pending
         }
         
-        # Prepare line items data
+        # Prepare line items data; saved lines keep their ID so only changed ones are rewritten
         items_data = []
-        for item in self.line_items:
-            try:
-                item_id = int(item['item_id_var'].get())
-                description = item['description_var'].get()
-                quantity = int(item['quantity_var'].get())
-                price = float(item['price_var'].get())
-                
-                items_data.append({
-                    'item_id': item_id,
-                    'description': description,
-                    'quantity': quantity,
-                    'price': price
-                })
-            except ValueError:
-                # Skip invalid items (they should've been caught above)
-                continue
+        for line in self.line_grid.get_lines():
+            item_data = {
+                'item_id': line.item_id,
+                'description': line.description,
+                'quantity': line.quantity,
+                'price': line.price
+            }
+            if line.line_id is not None:
+                item_data['id'] = line.line_id
+            items_data.append(item_data)
                 
         # Set the result
         self.result = {
@@ -1,8 +1,10 @@
 import customtkinter as ctk
 import tkinter as tk
-from tkinter import messagebox
+from tkinter import messagebox, filedialog
 import logging
 from datetime import datetime
+from src.utils.mutations import optimistic_insert, optimistic_update, optimistic_delete, find_row
+from src.utils.ui_timing import timed
 
 class ItemView(ctk.CTkFrame):
     def __init__(self, parent, controller):
@@ -52,6 +54,14 @@ class ItemView(ctk.CTkFrame):
         )
         refresh_button.pack(side="right", padx=10, pady=10)
         
+        import_button = ctk.CTkButton(
+            title_frame, 
+            text="Import Items", 
+            command=self._import_items,
+            hover_color=("gray70", "gray30")
+        )
+        import_button.pack(side="right", padx=10, pady=10)
+        
         # Search and filter frame
         search_frame = ctk.CTkFrame(self)
         search_frame.pack(fill="x", padx=10, pady=(0, 10))
@@ -229,6 +239,7 @@ class ItemView(ctk.CTkFrame):
         self.sorted_column = None
         self.sort_ascending = True
         
+    @timed
     def display_items(self, items_data, pagination_info=None):
         """Display the list of items in the treeview"""
         # Clear existing items
@@ -248,23 +259,7 @@ class ItemView(ctk.CTkFrame):
         
         # Add items to the treeview
         for item in items_data:
-            # Format date
-            date_added = item['date_added'].strftime('%Y-%m-%d') if item['date_added'] else ""
-            
-            # Format price with peso symbol
-            price = f"₱{item['price']:.2f}"
-            
-            self.tree.insert(
-                "", 
-                "end", 
-                values=(
-                    item['id'],
-                    item['item_code'],
-                    item['name'],
-                    price,
-                    date_added
-                )
-            )
+            self.tree.insert("", "end", values=self._row_values(item))
             
         # Reset selection
         self.selected_item_id = None
@@ -280,6 +275,34 @@ class ItemView(ctk.CTkFrame):
         
         self.logger.info(message)
         
+    
+    def _row_values(self, item):
+        """Treeview values for an item record (or a not yet saved item without an id)"""
+        # Format date
+        date_added = item.get('date_added')
+        date_added = date_added.strftime('%Y-%m-%d') if hasattr(date_added, 'strftime') else (date_added or "")
+        
+        # Format price with peso symbol
+        return (
+            item.get('id') or "",
+            item['item_code'],
+            item['name'],
+            f"₱{item['price']:.2f}",
+            date_added
+        )
+    
+    def update_items(self, items):
+        """Replace the given items' rows in place, keeping the page and selection"""
+        updated = {item['id']: item for item in items}
+        self.items_data = [updated.get(item['id'], item) for item in self.items_data]
+        
+        for row in self.tree.get_children():
+            if 'unsaved' in self.tree.item(row, 'tags'):
+                continue
+            item = updated.get(int(self.tree.item(row, 'values')[0]))
+            if item:
+                self.tree.item(row, values=self._row_values(item))
+    
     def _update_pagination_controls(self):
         """Update pagination controls based on current state"""
         # Update pagination label
@@ -375,6 +398,7 @@ class ItemView(ctk.CTkFrame):
             search_text=self.search_var.get()
         )
     
+    @timed
     def _sort_by_column(self, column, reset=True):
         """Sort the tree data by column"""
         if reset or self.sorted_column != column:
@@ -421,7 +445,7 @@ class ItemView(ctk.CTkFrame):
     def _on_item_select(self, event):
         """Handle item selection"""
         selected_items = self.tree.selection()
-        if selected_items:
+        if selected_items and 'unsaved' not in self.tree.item(selected_items[0], "tags"):
             item = selected_items[0]
             self.selected_item_id = int(self.tree.item(item, "values")[0])
             self._update_action_buttons()
@@ -456,17 +480,23 @@ class ItemView(ctk.CTkFrame):
         self.wait_window(dialog)  # Wait until the dialog is closed
         
         if dialog.result:
-            # Process the form data
-            success, result = self.controller.add_item(dialog.result)
-            if success:
-                self.show_info(f"Item added successfully with code: {result}")
-            else:
-                self.show_error(f"Failed to add item: {result}")
+            # Save in the background and show the new item until the page reloads
+            item = dialog.result
+            self.controller.save_in_background(
+                self.controller.add_item, item,
+                optimistic=lambda: optimistic_insert(self.tree, self._row_values(item)),
+                on_success=lambda result: self.show_info(f"Item added successfully with code: {result}"),
+                on_failure=lambda error: self.show_error(f"Failed to add item: {error}")
+            )
                 
     def _show_edit_item_dialog(self):
         """Show dialog to edit an existing item"""
+        # A refresh while the dialog is open can clear the selection, so remember it now
+        item_id = self.selected_item_id
+        row = next(iter(self.tree.selection()), None)
+        
         # Get the item data
-        item_data = self.controller.get_item(self.selected_item_id)
+        item_data = self.controller.get_item(item_id)
         if not item_data:
             self.show_error("Failed to load item data")
             return
@@ -476,12 +506,15 @@ class ItemView(ctk.CTkFrame):
         self.wait_window(dialog)  # Wait until the dialog is closed
         
         if dialog.result:
-            # Process the form data
-            success, result = self.controller.update_item(self.selected_item_id, dialog.result)
-            if success:
-                self.show_info(f"Item updated successfully")
-            else:
-                self.show_error(f"Failed to update item: {result}")
+            # Save in the background and show the new values right away
+            item = dict(dialog.result, id=item_id)
+            row = find_row(self.tree, item_id, hint=row)
+            self.controller.save_in_background(
+                self.controller.update_item, item_id, dialog.result,
+                optimistic=(lambda: optimistic_update(self.tree, row, self._row_values(item))) if row else None,
+                on_success=lambda result: self.show_info(f"Item updated successfully"),
+                on_failure=lambda error: self.show_error(f"Failed to update item: {error}")
+            )
                 
     def _show_view_item_dialog(self):
         """Show dialog to view item details"""
@@ -497,17 +530,46 @@ class ItemView(ctk.CTkFrame):
             
     def _confirm_delete_item(self):
         """Show confirmation dialog before deleting an item"""
-        if not self.selected_item_id:
+        item_id = self.selected_item_id
+        if not item_id:
             return
+        row = next(iter(self.tree.selection()), None)
             
         # Show confirmation dialog
         if messagebox.askyesno("Confirm Delete", 
                               "Are you sure you want to delete this item?\nThis action cannot be undone."):
-            success, result = self.controller.delete_item(self.selected_item_id)
-            if success:
-                self.show_info("Item deleted successfully")
-            else:
-                self.show_error(f"Failed to delete item: {result}")
+            row = find_row(self.tree, item_id, hint=row)
+            self.controller.save_in_background(
+                self.controller.delete_item, item_id,
+                optimistic=(lambda: optimistic_delete(self.tree, row)) if row else None,
+                on_success=lambda result: self.show_info("Item deleted successfully"),
+                on_failure=lambda error: self.show_error(f"Failed to delete item: {error}")
+            )
+            self.selected_item_id = None
+            self._update_action_buttons()
+    
+    def _import_items(self):
+        """Pick a CSV or Excel file and import its items in the background"""
+        file_path = filedialog.askopenfilename(
+            title="Import Items",
+            filetypes=[("CSV files", "*.csv"), ("Excel files", "*.xlsx *.xls"), ("All files", "*.*")]
+        )
+        if file_path:
+            self.controller.import_items(file_path)
+    
+    def show_import_result(self, result):
+        """Show the summary of a bulk import"""
+        if result.get('error'):
+            self.show_error(f"Import failed: {result['error']}")
+            return
+        
+        message = f"Imported {result['imported']} of {result['total']} items in {result['seconds']:.1f} seconds."
+        if result['failed']:
+            first_errors = "\n".join(f"Row {row}: {error}" for row, error in result['errors'][:5])
+            message += f"\n\n{result['failed']} row(s) were rejected:\n{first_errors}"
+            if result['error_report']:
+                message += f"\n\nFull error report: {result['error_report']}"
+        self.show_info(message)
     
     def show_error(self, message):
         """Show error message"""
@@ -0,0 +1,280 @@
+import customtkinter as ctk
+import tkinter as tk
+from tkinter import ttk
+from src.utils.ui_timing import timed
+
+class LineItem:
+    """Typed state of one invoice line"""
+
+    __slots__ = ('line_id', 'item_id', 'item_code', 'description', 'quantity', 'price', 'total')
+
+    def __init__(self, item_id=None, item_code='', description='', quantity=1, price=0.0, line_id=None):
+        self.line_id = line_id  # Stored InvoiceItem ID, None until the line is saved
+        self.item_id = item_id
+        self.item_code = item_code
+        self.description = description
+        self.quantity = quantity
+        self.price = price
+        self.total = quantity * price
+
+
+class LineItemGrid(ctk.CTkFrame):
+    """Editable invoice line items on a single Treeview
+
+    Lines are Treeview rows backed by LineItem objects, so opening an
+    invoice with hundreds of lines creates no widgets per line. One inline
+    editor at a time is placed over the cell being edited: a combobox that
+    searches the item catalog for the code column, an entry for the others.
+    Quantity and price are parsed when an edit is committed, and the invoice
+    total is adjusted by the difference of the changed line only.
+    """
+
+    columns = ("code", "description", "quantity", "price", "total")
+    editable = ("code", "description", "quantity", "price")
+
+    def __init__(self, parent, items, on_total_changed=None, readonly=False):
+        """
+        Args:
+            items: ItemReferenceSet offered in the item code picker
+            on_total_changed: Called with the new invoice total after every change
+            readonly: Show the lines without editing
+        """
+        super().__init__(parent)
+        self.items = items
+        self.on_total_changed = on_total_changed
+        self.readonly = readonly
+
+        self.lines = {}  # Treeview iid -> LineItem
+        self.total = 0.0
+        self._editing = None  # (iid, column) of the open editor
+
+        self.tree = ttk.Treeview(self, columns=self.columns, show="headings", selectmode="extended", height=8)
+        for column, heading, width, anchor in (
+            ("code", "Item Code", 110, "w"),
+            ("description", "Description", 260, "w"),
+            ("quantity", "Quantity", 80, "e"),
+            ("price", "Price", 90, "e"),
+            ("total", "Total", 100, "e")
+        ):
+            self.tree.heading(column, text=heading)
+            self.tree.column(column, width=width, anchor=anchor)
+
+        scrollbar = ttk.Scrollbar(self, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+
+        if not self.readonly:
+            # The two inline editors, placed over whichever cell is being edited
+            self.entry_editor = tk.Entry(self.tree, borderwidth=1)
+            self.code_editor = ttk.Combobox(self.tree)
+            for editor in (self.entry_editor, self.code_editor):
+                editor.bind("<Return>", lambda event: self._commit_edit(advance=True))
+                editor.bind("<Tab>", lambda event: self._commit_edit(advance=True) or "break")
+                editor.bind("<Escape>", lambda event: self._cancel_edit())
+            # Not for the combobox: opening its list also takes the focus away
+            self.entry_editor.bind("<FocusOut>", lambda event: self._commit_edit())
+            self.code_editor.bind("<KeyRelease>", self._filter_code_editor)
+            self.code_editor.bind("<<ComboboxSelected>>", lambda event: self._commit_edit(advance=True))
+
+            self.tree.bind("<Button-1>", lambda event: self._commit_edit(), add="+")
+            self.tree.bind("<Double-1>", self._on_double_click)
+            self.tree.bind("<Return>", lambda event: self._edit_focused())
+            self.tree.bind("<F2>", lambda event: self._edit_focused())
+            self.tree.bind("<Delete>", lambda event: self.delete_selected())
+
+    def load(self, items_data):
+        """Replace the lines with saved invoice items (dicts with id, item_id, description, quantity, price)"""
+        self.tree.delete(*self.tree.get_children())
+        self.lines = {}
+        self.total = 0.0
+        for item_data in items_data:
+            item_id = item_data.get('item_id')
+            item = self.items.by_id.get(int(item_id)) if item_id else None
+            line = LineItem(
+                item_id=int(item_id) if item_id else None,
+                item_code=item['item_code'] if item else '',
+                description=item_data.get('description') or '',
+                quantity=int(item_data.get('quantity', 1)),
+                price=float(item_data.get('price', 0.0)),
+                line_id=item_data.get('id')
+            )
+            self.lines[self.tree.insert("", "end", values=self._row_values(line))] = line
+            self.total += line.total
+        self._total_changed()
+
+    def add_line(self):
+        """Append an empty line and start editing its item code"""
+        line = LineItem()
+        iid = self.tree.insert("", "end", values=self._row_values(line))
+        self.lines[iid] = line
+        self.tree.see(iid)
+        self.tree.selection_set(iid)
+        self.tree.focus(iid)
+        self.after_idle(lambda: self._begin_edit(iid, "code"))
+        return iid
+
+    def delete_selected(self):
+        """Remove the selected lines"""
+        self._cancel_edit()
+        for iid in self.tree.selection():
+            line = self.lines.pop(iid)
+            self.total -= line.total
+            self.tree.delete(iid)
+        self._total_changed()
+
+    def finish_editing(self):
+        """Commit the cell being edited, if any"""
+        self._commit_edit()
+
+    def get_lines(self):
+        """Lines in display order"""
+        return [self.lines[iid] for iid in self.tree.get_children()]
+
+    def validate(self):
+        """Validation messages for the current lines (empty if they can be saved)"""
+        errors = []
+        for number, line in enumerate(self.get_lines(), start=1):
+            if not line.item_id:
+                errors.append(f"Item {number}: Item ID is required")
+            if not line.description:
+                errors.append(f"Item {number}: Description is required")
+            if line.quantity <= 0:
+                errors.append(f"Item {number}: Quantity must be greater than zero")
+            if line.price < 0:
+                errors.append(f"Item {number}: Price cannot be negative")
+        return errors
+
+    def _row_values(self, line):
+        return (line.item_code, line.description, line.quantity, f"{line.price:.2f}", f"₱{line.total:.2f}")
+
+    def _update_line(self, iid, line):
+        """Recompute one line's total and apply the difference to the invoice total"""
+        new_total = line.quantity * line.price
+        self.total += new_total - line.total
+        line.total = new_total
+        self.tree.item(iid, values=self._row_values(line))
+        self._total_changed()
+
+    def _total_changed(self):
+        if not self.lines:
+            # Drop floating point drift left by the incremental updates
+            self.total = 0.0
+        if self.on_total_changed:
+            self.on_total_changed(self.total)
+
+    def _on_double_click(self, event):
+        iid = self.tree.identify_row(event.y)
+        column_id = self.tree.identify_column(event.x)
+        if not iid or not column_id:
+            return
+        column = self.columns[int(column_id[1:]) - 1]
+        if column in self.editable:
+            self._begin_edit(iid, column)
+
+    def _edit_focused(self):
+        iid = self.tree.focus()
+        if iid:
+            self._begin_edit(iid, "code")
+        return "break"
+
+    def _begin_edit(self, iid, column):
+        # Moving straight from one editor to the next keeps the focus out of the tree
+        self._hide_editors()
+        if iid not in self.lines:
+            return
+        self.tree.see(iid)
+        bbox = self.tree.bbox(iid, column)
+        if not bbox:
+            return
+        x, y, width, height = bbox
+        line = self.lines[iid]
+
+        if column == "code":
+            editor = self.code_editor
+            editor.configure(values=self.items.name_index.search(line.item_code))
+            value = line.item_code
+        else:
+            editor = self.entry_editor
+            value = {
+                "description": line.description,
+                "quantity": str(line.quantity),
+                "price": str(line.price)
+            }[column]
+
+        editor.delete(0, "end")
+        editor.insert(0, value)
+        editor.select_range(0, "end")
+        editor.place(x=x, y=y, width=width, height=height)
+        editor.focus_set()
+        self._editing = (iid, column)
+
+    def _hide_editors(self):
+        if self._editing is None:
+            return
+        self._editing = None
+        self.entry_editor.place_forget()
+        self.code_editor.place_forget()
+
+    def _cancel_edit(self):
+        if self._editing is None:
+            return
+        self._hide_editors()
+        self.tree.focus_set()
+
+    def _commit_edit(self, advance=False):
+        """Parse the open editor's value into the line; keep the editor open if it is invalid"""
+        if self._editing is None:
+            return
+        iid, column = self._editing
+        line = self.lines.get(iid)
+        if line is None:
+            self._cancel_edit()
+            return
+
+        if column == "code":
+            text = self.code_editor.get().strip()
+            if text != line.item_code:
+                item = self._item_for_text(text)
+                if item is None:
+                    self.bell()
+                    return
+                line.item_id = item['id']
+                line.item_code = item['item_code']
+                line.description = item['name'] or ''
+                line.price = float(item['price'] or 0.0)
+        else:
+            text = self.entry_editor.get().strip()
+            try:
+                if column == "quantity":
+                    line.quantity = int(text) if text else 0
+                elif column == "price":
+                    line.price = float(text) if text else 0.0
+                else:
+                    line.description = text
+            except ValueError:
+                self.bell()
+                return
+
+        self._update_line(iid, line)
+        following = self.editable.index(column) + 1
+        if advance and following < len(self.editable):
+            self._begin_edit(iid, self.editable[following])
+        else:
+            self._cancel_edit()
+
+    def _item_for_text(self, text):
+        """Item for a picker label or a typed code, else the best search match"""
+        item = self.items.by_label.get(text) or self.items.by_code.get(text)
+        if item is None and text:
+            matches = self.items.name_index.search(text, limit=1)
+            item = self.items.by_label.get(matches[0]) if matches else None
+        return item
+
+    @timed
+    def _filter_code_editor(self, event):
+        """Show the catalog items matching the typed code or name"""
+        # Don't filter on navigation keys, only on actual text input
+        if event.keysym in ('Up', 'Down', 'Left', 'Right', 'Home', 'End', 'Escape', 'Tab', 'Return'):
+            return
+        self.code_editor.configure(values=self.items.name_index.search(self.code_editor.get()))
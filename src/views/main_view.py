@@ -3,6 +3,7 @@ import tkinter as tk
 from PIL import Image
 import os
 import logging
+from src.views.view_cache import ViewCache
 
 class MainView:
     def __init__(self, root, controller):
@@ -56,6 +57,11 @@ class MainView:
         self.reports_button = ctk.CTkButton(self.sidebar, text="Reports", command=self.show_reports)
         self.reports_button.grid(row=7, column=0, padx=20, pady=10)
         
+        # Only offered while the query profiler or the main loop watchdog is recording
+        if self.controller.db.profiler or self.controller.watchdog:
+            self.diagnostics_button = ctk.CTkButton(self.sidebar, text="Diagnostics", command=self.show_diagnostics)
+            self.diagnostics_button.grid(row=8, column=0, padx=20, pady=10, sticky="n")
+        
         # Appearance mode selector at the bottom
         self.appearance_label = ctk.CTkLabel(self.sidebar, text="Appearance Mode:")
         self.appearance_label.grid(row=9, column=0, padx=20, pady=(10, 0))
@@ -72,19 +78,39 @@ class MainView:
         self.main_frame = ctk.CTkFrame(self.root)
         self.main_frame.grid(row=0, column=1, sticky="nsew", padx=20, pady=20)
         
+        # Pages stay alive between sidebar clicks and only reload when the data changed
+        appearance_config = (self.controller.config.get('appearance') if self.controller.config else None) or {}
+        self.view_cache = ViewCache(
+            self.main_frame,
+            max_views=appearance_config.get('view_cache_size', 0),
+            version_source=self.controller.db.get_version
+        )
+        
+        # Reload the visible page as soon as one of its tables is committed to
+        self._refresh_pending = False
+        self._pending_rows = []
+        self.unsubscribe_changes = self.controller.db.events.subscribe(None, self._on_data_changed, rows=True)
+        
         # Default view - Dashboard
         self.show_dashboard()
     
     def show_dashboard(self):
-        self.clear_main_frame()
         self.logger.info("Showing dashboard")
-        
+        self.view_cache.show(
+            'dashboard',
+            self._build_dashboard,
+            self.controller.dashboard_controller.refresh_dashboard,
+            self.controller.dashboard_controller.tables
+        )
+    
+    def _build_dashboard(self, parent):
+        """Create the dashboard widgets inside parent"""
         # Create dashboard title
-        title_label = ctk.CTkLabel(self.main_frame, text="Dashboard", font=ctk.CTkFont(size=24, weight="bold"))
+        title_label = ctk.CTkLabel(parent, text="Dashboard", font=ctk.CTkFont(size=24, weight="bold"))
         title_label.pack(pady=(20, 10))
         
         # Create refresh button
-        refresh_frame = ctk.CTkFrame(self.main_frame)
+        refresh_frame = ctk.CTkFrame(parent)
         refresh_frame.pack(fill="x", padx=20, pady=(0, 10))
         
         refresh_button = ctk.CTkButton(
@@ -96,7 +122,7 @@ class MainView:
         refresh_button.pack(side="right", padx=10, pady=5)
         
         # Create summary cards
-        summary_frame = ctk.CTkFrame(self.main_frame)
+        summary_frame = ctk.CTkFrame(parent)
         summary_frame.pack(fill="x", padx=20, pady=10)
         
         # Configure grid columns to be equal width
@@ -127,7 +153,7 @@ class MainView:
         )
         
         # Recent invoices section
-        recent_frame = ctk.CTkFrame(self.main_frame)
+        recent_frame = ctk.CTkFrame(parent)
         recent_frame.pack(fill="both", expand=True, padx=20, pady=10)
         
         recent_title = ctk.CTkLabel(
@@ -257,41 +283,63 @@ class MainView:
         self.recent_invoices_tree.tag_configure('partial', background='#0095de')
     
     def show_clients(self):
-        self.clear_main_frame()
         self.logger.info("Showing clients view")
-        self.controller.client_controller.load_view(self.main_frame)
+        self._show_controller_view('clients', self.controller.client_controller)
     
     def show_invoices(self):
-        self.clear_main_frame()
         self.logger.info("Showing invoices view")
-        self.controller.invoice_controller.load_view(self.main_frame)
+        self._show_controller_view('invoices', self.controller.invoice_controller)
     
     def show_payments(self):
-        self.clear_main_frame()
         self.logger.info("Showing payments view")
-        self.controller.payment_controller.load_view(self.main_frame)
+        self._show_controller_view('payments', self.controller.payment_controller)
     
     def show_items(self):
         """Show the items view"""
-        self.clear_main_frame()
         self.logger.info("Showing items view")
-        self.controller.item_controller.load_view(self.main_frame)
+        self._show_controller_view('items', self.controller.item_controller)
     
     def show_print_invoices(self):
         """Show the print invoices view"""
-        self.clear_main_frame()
         self.logger.info("Showing print invoices view")
-        self.controller.print_controller.load_view(self.main_frame)
+        self._show_controller_view('print_invoices', self.controller.print_controller)
+    
+    def _show_controller_view(self, name, controller):
+        """Show a controller's view from the cache, building it on first use"""
+        self.view_cache.show(
+            name, controller.load_view, controller.refresh_view, controller.tables,
+            getattr(controller, 'apply_changes', None)
+        )
+    
+    def _on_data_changed(self, changes, rows):
+        """Event bus callback (any thread): schedule one refresh of the visible page"""
+        self._pending_rows.extend(rows)
+        if self._refresh_pending:
+            return
+        self._refresh_pending = True
+        try:
+            # Short delay so a burst of commits (imports, API batches) costs a single reload
+            self.root.after(100, self._refresh_current_page)
+        except RuntimeError:
+            # Main loop already gone during shutdown
+            self._refresh_pending = False
+    
+    def _refresh_current_page(self):
+        self._refresh_pending = False
+        rows, self._pending_rows = self._pending_rows, []
+        self.view_cache.refresh_current(rows=rows)
     
     def show_reports(self):
-        self.clear_main_frame()
         self.logger.info("Showing reports view")
-        
-        label = ctk.CTkLabel(self.main_frame, text="Reports", font=ctk.CTkFont(size=24, weight="bold"))
+        self.view_cache.show('reports', self._build_reports)
+    
+    def _build_reports(self, parent):
+        """Create the reports page inside parent"""
+        label = ctk.CTkLabel(parent, text="Reports", font=ctk.CTkFont(size=24, weight="bold"))
         label.pack(pady=20)
         
         # Report generation options
-        options_frame = ctk.CTkFrame(self.main_frame)
+        options_frame = ctk.CTkFrame(parent)
         options_frame.pack(fill="x", padx=20, pady=10)
         
         ctk.CTkLabel(options_frame, text="Report Type:").grid(row=0, column=0, padx=10, pady=10)
@@ -309,12 +357,21 @@ class MainView:
         generate_button = ctk.CTkButton(options_frame, text="Generate Report")
         generate_button.grid(row=3, column=0, columnspan=2, padx=10, pady=20)
     
-    def clear_main_frame(self):
-        """Clear all widgets from the main frame"""
-        for widget in self.main_frame.winfo_children():
-            widget.destroy()
+    def show_diagnostics(self):
+        self.logger.info("Showing diagnostics view")
+        self.view_cache.show('diagnostics', self._build_diagnostics, lambda: self.diagnostics_view.refresh())
+    
+    def _build_diagnostics(self, parent):
+        from src.views.diagnostics_view import DiagnosticsView
+        self.diagnostics_view = DiagnosticsView(parent, self.controller.db, self.controller.watchdog)
     
     def change_appearance_mode(self, new_appearance_mode):
         """Change the app's appearance mode (light/dark)"""
         ctk.set_appearance_mode(new_appearance_mode)
         self.logger.info(f"Changed appearance mode to {new_appearance_mode}")
+        
+        # Treeview colors are chosen when a page is built, so rebuild cached pages in the new mode
+        current = self.view_cache.current
+        self.view_cache.clear()
+        if current:
+            getattr(self, f"show_{current}")()
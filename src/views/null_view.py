@@ -0,0 +1,82 @@
+import logging
+import threading
+
+class _Value:
+    """Minimal stand-in for a Tk variable"""
+    def __init__(self, value=""):
+        self._value = value
+
+    def get(self):
+        return self._value
+
+    def set(self, value):
+        self._value = value
+
+
+class NullView:
+    """View used when controllers run without a GUI
+
+    Controllers hand results to their view through ``view.after(0, ...)`` and
+    ``display_*``/``show_*``/``update_*`` calls. This view runs ``after``
+    callbacks immediately and records every such call, so headless callers can
+    wait for a background load with mark()/wait_for() and read back what a
+    real view would have displayed.
+    """
+
+    def __init__(self, per_page=20):
+        self.logger = logging.getLogger('invoice_manager')
+        self.root = self  # DashboardController schedules through main_view.root
+        self.current_page = 1
+        self.per_page = per_page
+        self.search_var = _Value("")
+        self.calls = {}  # method name -> list of argument tuples
+        self._condition = threading.Condition()
+
+    def after(self, ms, callback=None, *args):
+        if callback:
+            callback(*args)
+        return None
+
+    def show_error(self, message):
+        self.logger.error(message)
+        self._record('show_error', (message,))
+
+    def show_info(self, message):
+        self.logger.info(message)
+        self._record('show_info', (message,))
+
+    def mark(self):
+        """Snapshot the call counts, to be passed to wait_for() after starting an operation"""
+        with self._condition:
+            return {name: len(calls) for name, calls in self.calls.items()}
+
+    def wait_for(self, name, mark=None, timeout=None):
+        """Block until ``name`` is called after ``mark`` or an error is shown
+
+        Returns:
+            Arguments of the latest ``name`` call, or None on error or timeout
+        """
+        mark = mark or {}
+
+        def called(method):
+            return len(self.calls.get(method, [])) > mark.get(method, 0)
+
+        with self._condition:
+            self._condition.wait_for(lambda: called(name) or called('show_error'), timeout)
+            return self.calls[name][-1] if called(name) else None
+
+    def last_message(self, name='show_error'):
+        """Text of the latest show_error (or show_info) call"""
+        with self._condition:
+            calls = self.calls.get(name)
+            return calls[-1][0] if calls else None
+
+    def _record(self, name, args):
+        with self._condition:
+            self.calls.setdefault(name, []).append(args)
+            self._condition.notify_all()
+
+    def __getattr__(self, name):
+        if name.startswith(('display_', 'show_', 'update_')):
+            return lambda *args, **kwargs: self._record(name, args)
+        raise AttributeError(name)
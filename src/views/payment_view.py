@@ -3,6 +3,8 @@ import tkinter as tk
 from tkinter import messagebox
 import logging
 from datetime import datetime
+from src.utils.mutations import optimistic_insert, optimistic_update, optimistic_delete, find_row
+from src.utils.ui_timing import timed
 
 class PaymentView(ctk.CTkFrame):
     def __init__(self, parent, controller):
@@ -321,6 +323,7 @@ class PaymentView(ctk.CTkFrame):
         # Store invoices data
         self.invoices_data = []
     
+    @timed
     def display_payments(self, payments_data):
         """Display the list of payments in the treeview"""
         # Clear existing items
@@ -332,32 +335,33 @@ class PaymentView(ctk.CTkFrame):
         
         # Add payments to the treeview
         for payment in payments_data:
-            # Format date
-            payment_date = payment['payment_date'].strftime('%Y-%m-%d') if payment['payment_date'] else ""
-            
-            # Format amount with peso symbol
-            amount = f"₱{payment['amount']:.2f}"
-            
-            # Format payment method
-            method = payment['payment_method'].replace('_', ' ').title()
-            
-            self.payments_tree.insert(
-                "", 
-                "end", 
-                values=(
-                    payment['id'],
-                    payment['invoice_number'],
-                    amount,
-                    payment_date,
-                    method,
-                    payment['reference_number'] or ""
-                )
-            )
+            self.payments_tree.insert("", "end", values=self._payment_row_values(payment))
             
         # Reset selection
         self.selected_payment_id = None
         self._update_payment_action_buttons()
     
+    def _payment_row_values(self, payment):
+        """Treeview values for a payment record (or a not yet saved payment without an id)"""
+        # Format date
+        payment_date = payment['payment_date'].strftime('%Y-%m-%d') if payment['payment_date'] else ""
+        
+        # Format amount with peso symbol
+        amount = f"₱{payment['amount']:.2f}"
+        
+        # Format payment method
+        method = payment['payment_method'].replace('_', ' ').title()
+        
+        return (
+            payment.get('id') or "",
+            payment['invoice_number'],
+            amount,
+            payment_date,
+            method,
+            payment['reference_number'] or ""
+        )
+    
+    @timed
     def display_invoices(self, invoices_data):
         """Display the list of invoices in the treeview"""
         # Clear existing items
@@ -402,6 +406,7 @@ class PaymentView(ctk.CTkFrame):
         self.selected_invoice_id = None
         self._update_invoice_action_buttons()
     
+    @timed
     def _filter_payments(self, *args):
         """Filter payments based on search text and method"""
         search_text = self.payment_search_var.get().lower()
@@ -449,6 +454,7 @@ class PaymentView(ctk.CTkFrame):
                 )
             )
     
+    @timed
     def _filter_invoices(self, *args):
         """Filter invoices based on search text"""
         search_text = self.invoice_search_var.get().lower()
@@ -497,7 +503,7 @@ class PaymentView(ctk.CTkFrame):
     def _on_payment_select(self, event):
         """Handle payment selection"""
         selected_items = self.payments_tree.selection()
-        if selected_items:
+        if selected_items and 'unsaved' not in self.payments_tree.item(selected_items[0], "tags"):
             item = selected_items[0]
             self.selected_payment_id = int(self.payments_tree.item(item, "values")[0])
             self._update_payment_action_buttons()
@@ -556,8 +562,10 @@ class PaymentView(ctk.CTkFrame):
     
     def _update_invoice_status(self, new_status):
         """Update the payment status of the selected invoice"""
-        if not self.selected_invoice_id:
+        invoice_id = self.selected_invoice_id
+        if not invoice_id:
             return
+        row = next(iter(self.invoices_tree.selection()), None)
         
         # Confirm before changing status
         message = f"Change payment status to {new_status.capitalize()}?"
@@ -565,12 +573,17 @@ class PaymentView(ctk.CTkFrame):
             message = "Are you sure you want to mark this invoice as Cancelled?\nThis might affect reports and statistics."
         
         if messagebox.askyesno("Confirm Status Change", message):
-            success, error = self.controller.update_payment_status(self.selected_invoice_id, new_status)
-            
-            if success:
-                self.show_info(f"Payment status updated to {new_status.capitalize()}")
-            else:
-                self.show_error(f"Failed to update payment status: {error}")
+            # Save in the background and recolor the invoice right away
+            row = find_row(self.invoices_tree, invoice_id, hint=row)
+            values = list(self.invoices_tree.item(row, 'values')) if row else None
+            if values:
+                values[-1] = new_status.capitalize()
+            self.controller.save_in_background(
+                self.controller.update_payment_status, invoice_id, new_status,
+                optimistic=(lambda: optimistic_update(self.invoices_tree, row, values, tags=(new_status,))) if row else None,
+                on_success=lambda result: self.show_info(f"Payment status updated to {new_status.capitalize()}"),
+                on_failure=lambda error: self.show_error(f"Failed to update payment status: {error}")
+            )
     
     def _show_add_payment_dialog(self):
         """Show dialog to add a new payment"""
@@ -585,12 +598,7 @@ class PaymentView(ctk.CTkFrame):
         self.wait_window(dialog)  # Wait until the dialog is closed
         
         if dialog.result:
-            # Process the form data
-            success, result = self.controller.add_payment(dialog.result)
-            if success:
-                self.show_info(f"Payment recorded successfully with ID: {result}")
-            else:
-                self.show_error(f"Failed to record payment: {result}")
+            self._record_payment(dialog.result, invoices)
     
     def _show_add_payment_for_invoice(self):
         """Show dialog to add a payment for the selected invoice"""
@@ -608,17 +616,33 @@ class PaymentView(ctk.CTkFrame):
         self.wait_window(dialog)  # Wait until the dialog is closed
         
         if dialog.result:
-            # Process the form data
-            success, result = self.controller.add_payment(dialog.result)
-            if success:
-                self.show_info(f"Payment recorded successfully with ID: {result}")
-            else:
-                self.show_error(f"Failed to record payment: {result}")
+            self._record_payment(dialog.result, invoices)
+    
+    def _record_payment(self, payment_data, invoices):
+        """Save a new payment in the background and list it until the payments reload"""
+        payment = dict(payment_data, invoice_number=self._invoice_number(payment_data['invoice_id'], invoices))
+        self.controller.save_in_background(
+            self.controller.add_payment, payment_data,
+            optimistic=lambda: optimistic_insert(self.payments_tree, self._payment_row_values(payment)),
+            on_success=lambda payment_id: self.show_info(f"Payment recorded successfully with ID: {payment_id}"),
+            on_failure=lambda error: self.show_error(f"Failed to record payment: {error}")
+        )
+    
+    def _invoice_number(self, invoice_id, invoices):
+        """Invoice number for a payment's invoice, from the dialog's invoice list"""
+        for invoice in invoices or ():
+            if invoice['id'] == invoice_id:
+                return invoice['invoice_number']
+        return ""
     
     def _show_edit_payment_dialog(self):
         """Show dialog to edit an existing payment"""
+        # A refresh while the dialog is open can clear the selection, so remember it now
+        payment_id = self.selected_payment_id
+        row = next(iter(self.payments_tree.selection()), None)
+        
         # Get the payment data
-        payment_data = self.controller.get_payment(self.selected_payment_id)
+        payment_data = self.controller.get_payment(payment_id)
         if not payment_data:
             self.show_error("Failed to load payment data")
             return
@@ -631,12 +655,17 @@ class PaymentView(ctk.CTkFrame):
         self.wait_window(dialog)  # Wait until the dialog is closed
         
         if dialog.result:
-            # Process the form data
-            success, result = self.controller.update_payment(self.selected_payment_id, dialog.result)
-            if success:
-                self.show_info(f"Payment updated successfully")
-            else:
-                self.show_error(f"Failed to update payment: {result}")
+            # Save in the background and show the new values right away
+            row = find_row(self.payments_tree, payment_id, hint=row)
+            invoice_number = (payment_data['invoice_number'] if dialog.result['invoice_id'] == payment_data['invoice_id']
+                              else self._invoice_number(dialog.result['invoice_id'], invoices))
+            payment = dict(dialog.result, id=payment_id, invoice_number=invoice_number)
+            self.controller.save_in_background(
+                self.controller.update_payment, payment_id, dialog.result,
+                optimistic=(lambda: optimistic_update(self.payments_tree, row, self._payment_row_values(payment))) if row else None,
+                on_success=lambda result: self.show_info(f"Payment updated successfully"),
+                on_failure=lambda error: self.show_error(f"Failed to update payment: {error}")
+            )
     
     def _show_view_payment_dialog(self):
         """Show dialog to view payment details"""
@@ -655,17 +684,23 @@ class PaymentView(ctk.CTkFrame):
     
     def _confirm_delete_payment(self):
         """Show confirmation dialog before deleting a payment"""
-        if not self.selected_payment_id:
+        payment_id = self.selected_payment_id
+        if not payment_id:
             return
+        row = next(iter(self.payments_tree.selection()), None)
             
         # Show confirmation dialog
         if messagebox.askyesno("Confirm Delete", 
                               "Are you sure you want to delete this payment?\nThis action cannot be undone."):
-            success, result = self.controller.delete_payment(self.selected_payment_id)
-            if success:
-                self.show_info("Payment deleted successfully")
-            else:
-                self.show_error(f"Failed to delete payment: {result}")
+            row = find_row(self.payments_tree, payment_id, hint=row)
+            self.controller.save_in_background(
+                self.controller.delete_payment, payment_id,
+                optimistic=(lambda: optimistic_delete(self.payments_tree, row)) if row else None,
+                on_success=lambda result: self.show_info("Payment deleted successfully"),
+                on_failure=lambda error: self.show_error(f"Failed to delete payment: {error}")
+            )
+            self.selected_payment_id = None
+            self._update_payment_action_buttons()
     
     def show_error(self, message):
         """Show error message"""
@@ -3,6 +3,7 @@ import tkinter as tk
 from tkinter import messagebox
 import logging
 from datetime import datetime
+from src.utils.ui_timing import timed
 
 class PrintView(ctk.CTkFrame):
     def __init__(self, parent, controller):
@@ -73,6 +74,23 @@ class PrintView(ctk.CTkFrame):
         )
         multi_select_checkbox.pack(side="right", padx=10, pady=10)
         
+        # Sheet layout for batch printing (several invoices tiled on one A4/Letter sheet)
+        self.sheet_layouts = dict(self.controller.get_sheet_layouts())
+        default_per_sheet = (self.controller.config.get('printing') or {}).get('invoices_per_sheet', 1)
+        default_layout = next(
+            (label for label, per_sheet in self.sheet_layouts.items() if per_sheet == default_per_sheet),
+            next(iter(self.sheet_layouts))
+        )
+        self.sheet_layout_var = ctk.StringVar(value=default_layout)
+        sheet_layout_menu = ctk.CTkOptionMenu(
+            search_frame,
+            values=list(self.sheet_layouts),
+            variable=self.sheet_layout_var,
+            width=180
+        )
+        sheet_layout_menu.pack(side="right", padx=10, pady=10)
+        ctk.CTkLabel(search_frame, text="Batch Layout:").pack(side="right", padx=(10, 0), pady=10)
+        
         # Invoice list frame
         list_frame = ctk.CTkFrame(self)
         list_frame.pack(fill="both", expand=True, padx=10, pady=10)
@@ -174,6 +192,17 @@ class PrintView(ctk.CTkFrame):
         self.print_selected_button.pack(side="right", padx=10, pady=10)
         self.print_selected_button.pack_forget()  # Hide initially
         
+        # Print queue status, updated by the controller as the spooler works through jobs
+        self.queue_status_label = ctk.CTkLabel(action_frame, text="Print queue: idle")
+        self.queue_status_label.pack(side="right", padx=10, pady=10)
+        
+        self.retry_failed_button = ctk.CTkButton(
+            action_frame,
+            text="Retry Failed Jobs",
+            width=140,
+            command=self._retry_failed_jobs
+        )
+        
         # Add a processing indicator (initially hidden)
         self.processing_frame = ctk.CTkFrame(self)
         self.processing_label = ctk.CTkLabel(
@@ -189,6 +218,7 @@ class PrintView(ctk.CTkFrame):
         # Store invoices data
         self.invoices_data = []
         
+    @timed
     def display_invoices(self, invoices_data):
         """Display the list of invoices in the treeview"""
         # Clear existing items and selection
@@ -222,6 +252,7 @@ class PrintView(ctk.CTkFrame):
         # Update status message
         self.logger.info(f"Displaying {len(invoices_data)} invoices for printing")
         
+    @timed
     def _filter_invoices(self):
         """Filter invoices based on search text"""
         search_text = self.search_var.get().lower()
@@ -406,7 +437,8 @@ class PrintView(ctk.CTkFrame):
             
         # Convert the set to a list for printing
         invoice_ids = list(self.selected_invoices)
-        self.controller.print_multiple_invoices(invoice_ids)
+        per_sheet = self.sheet_layouts.get(self.sheet_layout_var.get(), 1)
+        self.controller.print_multiple_invoices(invoice_ids, per_sheet=per_sheet)
     
     def _print_selected_invoices(self):
         """Print all selected invoices"""
@@ -429,6 +461,36 @@ class PrintView(ctk.CTkFrame):
         else:
             self.show_info(f"Printed {success_count} invoice(s). Failed to print {fail_count} invoice(s).")
     
+    def update_print_queue_status(self, metrics):
+        """Show print queue depth from the spooler metrics"""
+        if not self.winfo_exists():
+            return
+            
+        queue = metrics.get('queue', {})
+        waiting = queue.get('queued', 0)
+        printing = queue.get('printing', 0)
+        failed = queue.get('failed', 0)
+        
+        if waiting or printing:
+            text = f"Print queue: {waiting} waiting, {printing} printing"
+        else:
+            text = "Print queue: idle"
+        if failed:
+            text += f", {failed} failed"
+        self.queue_status_label.configure(text=text)
+        
+        # Only offer the retry button while there is something to retry
+        if failed:
+            self.retry_failed_button.pack(side="right", padx=10, pady=10)
+        else:
+            self.retry_failed_button.pack_forget()
+    
+    def _retry_failed_jobs(self):
+        """Requeue all failed print jobs"""
+        count = self.controller.retry_failed_jobs()
+        self.show_info(f"Requeued {count} failed print job(s)")
+        self.controller.refresh_print_queue_status()
+    
     def show_processing_indicator(self, show=True, message=None):
         """Show or hide the processing indicator during batch printing"""
         if show:
@@ -0,0 +1,120 @@
+import time
+import logging
+from collections import OrderedDict
+import customtkinter as ctk
+from src.utils.ui_timing import ui_stats
+
+class ViewCache:
+    """Keeps the pages behind the sidebar alive between clicks
+
+    Each page is built once into its own frame inside ``parent``. Switching
+    pages hides the current frame with pack_forget() and shows the cached one
+    again instead of destroying and rebuilding the widget tree. A page is only
+    refreshed when the versions of the tables it displays, as reported by
+    ``version_source(tables)``, moved since it was last loaded.
+    With ``max_views`` set, the least recently shown pages are destroyed
+    once the limit is exceeded.
+    """
+
+    def __init__(self, parent, max_views=None, version_source=None):
+        self.parent = parent
+        self.max_views = max_views or None
+        self.version_source = version_source
+        self.current = None
+        self.logger = logging.getLogger('invoice_manager')
+        self._pages = OrderedDict()  # name -> {'frame', 'version', 'refresh', 'tables', 'apply'}
+
+    def show(self, name, build, refresh=None, tables=None, apply_changes=None):
+        """Show the page ``name``, building it with ``build(frame)`` on first use
+
+        Args:
+            name: Cache key of the page
+            build: Callable that creates the page's widgets inside the given frame
+            refresh: Optional callable that reloads the page's data
+            tables: Table names the page displays; a cached page is refreshed
+                when their versions differ (None refreshes on every show)
+            apply_changes: Optional callable given the changed rows while the page
+                is visible; returns True when it patched the page in place
+        """
+        version = self._version(tables)
+        if self.current and self.current != name and self.current in self._pages:
+            self._pages[self.current]['frame'].pack_forget()
+
+        page = self._pages.get(name)
+        if page is None:
+            frame = ctk.CTkFrame(self.parent, fg_color="transparent")
+            frame.pack(fill="both", expand=True)
+            self._pages[name] = {'frame': frame, 'version': version, 'refresh': refresh, 'tables': tables,
+                                'apply': apply_changes}
+            self.current = name
+            started = time.perf_counter()
+            build(frame)
+            ui_stats.record(f"page.{name}.build", time.perf_counter() - started)
+            self._evict()
+            return
+
+        self._pages.move_to_end(name)
+        if self.current != name:
+            page['frame'].pack(fill="both", expand=True)
+        self.current = name
+
+        self._refresh(name, page, version)
+
+    def refresh_current(self, changed_tables=None, rows=None):
+        """Refresh the visible page if one of its tables changed since it was loaded
+
+        Args:
+            changed_tables: Names of the tables that changed (None checks the page regardless)
+            rows: Changed (table_name, row_id, operation) rows; offered to the page's
+                apply_changes first so it can patch rows instead of reloading
+        """
+        page = self._pages.get(self.current)
+        if page is None or page['tables'] is None:
+            return
+        if changed_tables is not None and set(page['tables']).isdisjoint(changed_tables):
+            return
+        version = self._version(page['tables'])
+        if version == page['version']:
+            return
+        if page['apply'] and rows and page['apply'](rows):
+            self.logger.debug(f"Patched {len(rows)} changed rows into the {self.current} view")
+            page['version'] = version
+            return
+        self._refresh(self.current, page, version)
+
+    def _refresh(self, name, page, version):
+        if page['refresh'] and (version is None or version != page['version']):
+            self.logger.debug(f"Refreshing cached {name} view (data version {page['version']} -> {version})")
+            page['version'] = version
+            started = time.perf_counter()
+            page['refresh']()
+            ui_stats.record(f"page.{name}.refresh", time.perf_counter() - started)
+
+    def _version(self, tables):
+        if tables is None or self.version_source is None:
+            return None
+        return self.version_source(tables)
+
+    def invalidate(self, name=None):
+        """Force a refresh of one page (or all pages) the next time it is shown"""
+        for page_name, page in self._pages.items():
+            if name is None or page_name == name:
+                page['version'] = object()
+
+    def clear(self):
+        """Destroy every cached page"""
+        for page in self._pages.values():
+            page['frame'].destroy()
+        self._pages.clear()
+        self.current = None
+
+    def _evict(self):
+        """Destroy least recently shown pages beyond max_views (never the current page)"""
+        if not self.max_views:
+            return
+        while len(self._pages) > self.max_views:
+            name = next(iter(self._pages))
+            if name == self.current:
+                break
+            self.logger.debug(f"Evicting cached {name} view")
+            self._pages.pop(name)['frame'].destroy()